@@ -0,0 +1,70 @@
+"""
+Benchmark of .dia parsing: pandas read with regex separator against graph_viewer.dia.read_dia
+Usage: python benchmarks/bench_parse.py [--rows 10000 1000000 10000000] [--columns 10] [--workers N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graph_viewer.dia import read_dia
+
+
+def make_dia(filename, rows, columns, chunk=100000):
+    """
+    Writing synthetic SOCRAT diagnostic file
+    :return: None
+    """
+    rng = np.random.default_rng(0)
+    with open(filename, 'w') as fh:
+        fh.write(' SOCRAT diagnostic file\n')
+        fh.write('  '.join(['Time'] + [f'T_{i}' for i in range(1, columns)]) + '\n')
+        for start in range(0, rows, chunk):
+            stop = min(start + chunk, rows)
+            data = rng.random((stop - start, columns)) * 1000
+            data[:, 0] = np.arange(start, stop) * 0.1
+            np.savetxt(fh, data, fmt='%14.6E')
+
+
+def best_of(function, repeat):
+    timings = list()
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 1000000, 10000000])
+    parser.add_argument('--columns', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print(f'cores: {os.cpu_count()}, workers: {args.workers or os.cpu_count()}')
+    with tempfile.TemporaryDirectory() as directory:
+        print(f'{"rows":>10} {"size, MB":>10} {"pandas, s":>10} {"read_dia, s":>12} {"speedup":>8}')
+        for rows in args.rows:
+            filename = os.path.join(directory, f'bench#{rows}.dia')
+            make_dia(filename, rows, args.columns)
+            size = os.path.getsize(filename) / 2 ** 20
+            time_pandas, expected = best_of(
+                lambda: pd.read_csv(filename, sep=r'\s+', skiprows=1, encoding='utf-8'), args.repeat)
+            time_dia, result = best_of(lambda: read_dia(filename, workers=args.workers), args.repeat)
+            if not expected.equals(result):
+                raise AssertionError(f'read_dia result differs from pandas for {rows} rows')
+            print(f'{rows:>10} {size:>10.1f} {time_pandas:>10.3f} {time_dia:>12.3f} '
+                  f'{time_pandas / time_dia:>7.2f}x')
+            os.remove(filename)
+
+
+if __name__ == '__main__':
+    main()
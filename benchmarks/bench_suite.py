@@ -0,0 +1,275 @@
+"""
+Benchmarks of the stages of work with results: import of the application, parsing, opening from the cache, loading of some columns,
+indexing of directories, filling of the table and plotting
+Files are generated by make_dia, so the results are the same on every run of the same machine.
+Every stage is timed as the best of several runs and its peak memory is taken by tracemalloc in one more run.
+Import is timed in fresh interpreters, it must not load the modules of HEAVY_MODULES, which are imported later.
+Table and graph window are made in the withdrawn Tk root, plots are drawn by Agg. Without display the table
+is skipped and plots are drawn by the renderer of graph_viewer.batch.
+
+Usage:
+    python benchmarks/bench_suite.py --save results.json
+    python benchmarks/bench_suite.py --baseline results.json --tolerance 0.25 --budgets budgets.json
+Budgets file is JSON with the limit of seconds of the stage: {"startup/import": 0.3, "parse/1000000x10": 3.0}.
+Exit code is 1 if some stage is slower than the baseline by more than the tolerance or it exceeds the budget,
+or if the import loads heavy modules.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_parse import make_dia
+from graph_viewer.cache import ColumnCache
+from graph_viewer.index import TaskIndex
+from graph_viewer.models import GraphData
+
+# modules which must not be imported with the application, they are imported after the main window is shown
+HEAVY_MODULES = ('numpy', 'pandas', 'matplotlib')
+# script which prints seconds of the import, peak of the traced memory and loaded heavy modules
+STARTUP_SCRIPT = """
+import sys, time, tracemalloc
+if sys.argv[1] == 'memory':
+    tracemalloc.start()
+start = time.perf_counter()
+import graph_viewer.application
+seconds = time.perf_counter() - start
+print(seconds, tracemalloc.get_traced_memory()[1], *[name for name in sys.argv[2:] if name in sys.modules])
+"""
+
+
+def measure(function, repeat):
+    """
+    :return: best time in seconds and peak of the traced memory in MB
+    """
+    timings = list()
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak / 2 ** 20
+
+
+def bench_startup(repeat):
+    """
+    Import of the application in fresh interpreters, Tk window is not made
+    :return: dict with result of the stage and list of the heavy modules which are loaded by the import
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def run(mode):
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, mode, *HEAVY_MODULES], cwd=root,
+                                capture_output=True, text=True, check=True).stdout.split()
+        return float(output[0]), int(output[1]), output[2:]
+
+    seconds = min(run('time')[0] for _ in range(repeat))
+    _, peak, loaded = run('memory')
+    return {'startup/import': (seconds, peak / 2 ** 20)}, loaded
+
+
+def make_tree(directory, files, tasks=100):
+    """
+    Writing small files of many tasks in nested directories
+    :return: None
+    """
+    header = ' SOCRAT diagnostic file\n' + '  '.join(['Time'] + [f'T_{i}' for i in range(1, 10)]) + '\n'
+    for i in range(files):
+        task = i % tasks
+        subdirectory = os.path.join(directory, f'run{task % 10}')
+        os.makedirs(subdirectory, exist_ok=True)
+        with open(os.path.join(subdirectory, f'task{task}#T{i}.dia'), 'w') as fh:
+            fh.write(header + '  '.join(['0.0'] * 10) + '\n')
+
+
+def bench_files(directory, rows, columns, repeat):
+    """
+    Parsing, opening from the cache and loading of two columns of one file
+    :return: dict with results of the stages
+    """
+    filename = f'bench#{rows}x{columns}.dia'
+    make_dia(os.path.join(directory, filename), rows, columns)
+    cache = ColumnCache(os.path.join(directory, 'cache'))
+    results = dict()
+    key = f'{rows}x{columns}'
+    results[f'parse/{key}'] = measure(lambda: GraphData(directory).get_graph_data(filename), repeat)
+    GraphData(directory, cache=cache).get_graph_data(filename)
+    results[f'open_cached/{key}'] = measure(lambda: GraphData(directory, cache=cache).get_graph_data(filename), repeat)
+    results[f'columns/{key}'] = measure(
+        lambda: GraphData(directory).get_columns(filename, ['Time', f'T_{columns - 1}']), repeat)
+    return results
+
+
+def bench_index(directory, files, repeat):
+    """
+    Scanning of the tree from scratch and with the persistent index when nothing is changed
+    :return: dict with results of the stages
+    """
+    root = os.path.join(directory, f'tree{files}')
+    make_tree(root, files)
+    database = os.path.join(directory, f'index{files}.sqlite')
+    results = dict()
+    results[f'index/{files}'] = measure(lambda: GraphData(root, index=TaskIndex(':memory:')).get_task_list(), repeat)
+    GraphData(root, index=TaskIndex(database)).get_task_list()
+    results[f'index_warm/{files}'] = measure(lambda: GraphData(root, index=TaskIndex(database)).get_task_list(), repeat)
+    return results
+
+
+def bench_table(root, data, repeat, scrolls=100):
+    """
+    Filling of the table with the file and scrolling it by pages
+    :return: dict with results of the stages
+    """
+    from graph_viewer.widgets import VirtualTable
+    table = VirtualTable(root)
+    table.pack()
+    columns = data.columns.tolist()
+
+    def fill():
+        table.set_source(columns, len(data), lambda names: data[names])
+        root.update_idletasks()
+
+    def scroll():
+        for i in range(scrolls):
+            table.scroll_to(i * len(data) // scrolls)
+        root.update_idletasks()
+
+    key = f'{len(data)}x{len(columns)}'
+    results = {f'table_fill/{key}': measure(fill, repeat), f'table_scroll/{key}': measure(scroll, repeat)}
+    table.destroy()
+    return results
+
+
+def bench_plot(root, graph_data, filename, lines, repeat):
+    """
+    Drawing of the lines in the graph window or by the batch renderer if there is no display
+    :return: dict with results of the stages
+    """
+    data = graph_data.get_graph_data(filename)
+    columns = [data.columns[1 + i % (len(data.columns) - 1)] for i in range(lines)]
+    key = f'plot/{len(data)}x{lines}'
+    if root is None:
+        from graph_viewer.batch import _draw
+        plot = {'lines': [{'filename': filename, 'column': column} for column in columns], 'legend': False}
+        return {key: measure(lambda: _draw(graph_data, plot, 100, True).canvas.draw(), repeat)}
+    from graph_viewer.graphics import GraphicWindow
+
+    def draw():
+        window = GraphicWindow(root, title='bench')
+        window.withdraw()
+        window.set_source(data, pyramid=lambda: graph_data.get_pyramid(filename))
+        window.set_lines(columns)
+        window.draw_plot()
+        window.canvas_tkagg.draw()
+        window.destroy()
+
+    return {key: measure(draw, repeat)}
+
+
+def make_root():
+    """
+    :return: withdrawn Tk root or None if there is no display
+    """
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        return None
+    root.withdraw()
+    return root
+
+
+def compare(results, baseline, tolerance, budgets):
+    """
+    :return: list of messages about the stages which are slower than the baseline or exceed the budget
+    """
+    failures = list()
+    for key, value in results.items():
+        seconds = value['seconds']
+        if key in baseline and seconds > baseline[key]['seconds'] * (1 + tolerance):
+            failures.append(f'{key}: {seconds:.3f} s, baseline {baseline[key]["seconds"]:.3f} s')
+        if key in budgets and seconds > budgets[key]:
+            failures.append(f'{key}: {seconds:.3f} s, budget {budgets[key]:.3f} s')
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks of parsing, indexing, table and plotting')
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--columns', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--files', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--lines', type=int, nargs='+', default=[1, 24, 100])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', help='JSON file for the results')
+    parser.add_argument('--baseline', help='JSON file with results of the previous run')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown against the baseline')
+    parser.add_argument('--budgets', help='JSON file with the limit of seconds of the stages')
+    args = parser.parse_args(argv)
+
+    results, loaded = bench_startup(args.repeat)
+    root = make_root()
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            for columns in args.columns:
+                results.update(bench_files(directory, rows, columns, args.repeat))
+        for files in args.files:
+            results.update(bench_index(directory, files, args.repeat))
+        rows, columns = max(args.rows), min(args.columns)
+        graph_data = GraphData(directory, cache=ColumnCache(os.path.join(directory, 'cache')))
+        filename = f'bench#{rows}x{columns}.dia'
+        if root is not None:
+            results.update(bench_table(root, graph_data.get_graph_data(filename), args.repeat))
+        for lines in args.lines:
+            results.update(bench_plot(root, graph_data, filename, lines, args.repeat))
+    if root is not None:
+        root.destroy()
+    results = {key: {'seconds': seconds, 'peak_mb': peak} for key, (seconds, peak) in results.items()}
+
+    print(f'{"stage":<32} {"time, s":>10} {"peak, MB":>10}')
+    for key, value in results.items():
+        print(f'{key:<32} {value["seconds"]:>10.3f} {value["peak_mb"]:>10.1f}')
+    if root is None:
+        print('No display: table is skipped, plots are drawn by the batch renderer')
+    report = {'machine': {'platform': platform.platform(), 'python': platform.python_version(),
+                          'cores': os.cpu_count(), 'display': root is not None},
+              'results': results}
+    if args.save:
+        with open(args.save, 'w') as fh:
+            json.dump(report, fh, indent=2)
+    baseline, budgets = dict(), dict()
+    if args.baseline:
+        with open(args.baseline, 'r') as fh:
+            baseline = json.load(fh)['results']
+    if args.budgets:
+        with open(args.budgets, 'r') as fh:
+            budgets = json.load(fh)
+    failures = compare(results, baseline, args.tolerance, budgets)
+    if loaded:
+        failures.append(f'startup/import: {", ".join(loaded)} imported with the application')
+    for failure in failures:
+        print(f'SLOW {failure}', file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,5 @@
 from graph_viewer.application import Application
 
-app = Application()
-app.mainloop()
+if __name__ == '__main__':
+    app = Application()
+    app.mainloop()
@@ -1 +1,6 @@
-from .application import Application
\ No newline at end of file
+def __getattr__(name):
+    # the GUI and tkinter are imported only when Application is used, the batch CLI runs without them
+    if name == 'Application':
+        from .application import Application
+        return Application
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -1,9 +1,15 @@
 import tkinter as tk
 from tkinter import ttk
 from . import view as v
-from . import models as m
 from tkinter import messagebox, filedialog
 from .mainmenu import MainMenu
+from .loader import Loader, import_in_background
+from functools import partial
+
+# modules with pandas and matplotlib, they are imported in background when the main window is shown
+DEFERRED_MODULES = ('.models', '.graphics')
+# delay of their import in ms, the window is drawn in this time
+IMPORT_DELAY = 100
 
 
 class Application(tk.Tk):
@@ -16,32 +22,279 @@ class Application(tk.Tk):
         event_callbacks = {
             '<<DirectorySelect>>': self._on_file_select,
             '<<FileQuit>>': lambda _: self.quit(),
-            '<<SelectGraphFont>>': self._on_select_graph_font
+            '<<SelectGraphFont>>': self._on_select_graph_font,
+            '<<SelectMemoryBudget>>': self._on_select_memory_budget,
+            '<<SelectCompactData>>': self._on_select_compact_data,
+            '<<ShowMemoryUsage>>': self._on_show_memory_usage,
+            '<<SelectAutoPreload>>': self._on_select_auto_preload,
+            '<<ShowPerformance>>': self._on_show_performance
         }
         for sequence, callback in event_callbacks.items():
             self.bind(sequence, callback)
+        self.status_bar = v.StatusBar(self)
+        self.status_bar.pack(side=tk.BOTTOM, fill=tk.X, expand=0)
+        self.status_bar.bind('<<StatusBarCancel>>', self._on_cancel_loading)
         self.main_window = v.MainWindow(self)
         self.main_window.pack(fill=tk.BOTH, expand=1)
         self.main_window.bind('<<MainWindowSelectTransducer>>', self._select_transducer)
+        self.main_window.bind('<<MainWindowCompare>>', self._compare)
+        self.main_window.bind('<<MainWindowFetchColumns>>', self._fetch_columns)
+        self.main_window.bind('<<MainWindowDefineChannel>>', self._define_channel)
+        self.main_window.bind('<<MainWindowPreloadTask>>', self._preload_task)
         self.graph_data = None
+        # cache, index and accountant of memory are made with the first use of models
+        self.column_cache = None
+        self.task_index = None
+        self.memory = None
+        # expressions of the derived channels, they are kept when another directory is selected
+        self.channels = dict()
+        self.loader = Loader()
+        # name of the data which is being loaded, callables which take loaded data and which are called on failure
+        self._loading = None
+        self._poll_interval = 100
+        self._polling = False
+        # preloading goes separately, so selection of files doesn't cancel it
+        self.preloader = Loader()
+        self._preloading = None
+        # scanning of a new directory goes separately too, files of the current one are loaded meanwhile
+        self.scanner = Loader()
+        self._scanning = None
+        self.performance_window = None
 
         self.protocol('WM_DELETE_WINDOW', self._on_close)
+        self.after(IMPORT_DELAY, lambda: import_in_background(*DEFERRED_MODULES, package=__package__))
+
+    def _models(self):
+        """
+        :return: module models, it is imported in background after the start, so usually it is ready
+        """
+        from . import models as m
+        if self.memory is None:
+            self.column_cache = m.ColumnCache()
+            self.task_index = m.TaskIndex()
+            self.memory = m.MemoryAccountant()
+            self.main_window.memory = self.memory
+        return m
 
     def _select_transducer(self, *_):
-        self.main_window.calc_data = self.graph_data.get_graph_data(self.main_window.filename)
+        """
+        Starting loading of the selected file in background, previous loading is superseded
+        """
+        filename = self.main_window.filename
+        self._start_loading(filename, partial(self._on_data_loaded, self.graph_data, filename),
+                            self.graph_data.get_preview, filename, self.main_window.preview_columns)
+
+    def _fetch_columns(self, *_):
+        """
+        Loading of columns of the selected file which are not loaded yet, only these columns are parsed
+        """
+        filename = self.main_window.filename
+        columns = self.main_window.requested_columns
+        self._start_loading(f'{filename}: {len(columns)} columns', lambda _: self.main_window.columns_loaded(),
+                            self.graph_data.get_columns, filename, columns, on_failed=self.main_window.columns_failed)
+
+    def _define_channel(self, *_):
+        from .expressions import Expression
+        name, expression = self.main_window.channel_definition
+        try:
+            if self.graph_data is not None:
+                self.graph_data.define_channel(name, expression)
+            else:
+                Expression(expression)
+        except ValueError as error:
+            messagebox.showerror(title='Error', message=f'Cannot define channel {name}', detail=str(error),
+                                 parent=self)
+            return
+        self.channels[name] = expression
+        if self.graph_data is not None and self.main_window.columns:
+            self.main_window.columns = self.graph_data.get_header(self.main_window.filename)
+            self.main_window.show_data()
+        self.status_bar.set(f'Channel {name} = {expression}')
+
+    def _preload_task(self, *_):
+        """
+        Parsing all the files of the task into the cache in background
+        """
+        task = self.main_window.preload_task
+        if self.graph_data is None or task not in self.main_window.list_of_tasks_and_transducers:
+            return
+        filenames = [self.graph_data.get_filename(task, transducer)
+                     for transducer in self.main_window.list_of_tasks_and_transducers[task]]
+        polling = self.preloader.busy
+        self._preloading = task
+        self.preloader.start(self.graph_data.preload, filenames, workers=self.menu.get_preload_workers())
+        if not polling:
+            self.after(self._poll_interval, self._poll_preloader)
+
+    def _poll_preloader(self):
+        task = self._preloading
+        for kind, value in self.preloader.poll():
+            if kind == 'progress':
+                loaded_bytes, total_bytes, files = value
+                if not self.loader.busy:
+                    self.status_bar.set(f'Preloading {task}: {files} files, {loaded_bytes / 2 ** 20:.1f} of '
+                                        f'{total_bytes / 2 ** 20:.1f} MB')
+            elif kind == 'done':
+                self.status_bar.set(f'{task}: preloaded' if not value else
+                                    f'{task}: preloaded, {len(value)} files failed: {", ".join(value)}')
+            elif kind == 'error':
+                self.status_bar.set(f'Preloading of {task} failed: {value}')
+        if self.preloader.busy:
+            self.after(self._poll_interval, self._poll_preloader)
+
+    def _compare(self, *_):
+        """
+        Loading of Time and the chosen columns of every compared file
+        """
+        lines = self.main_window.compare_lines
+        requests = dict()
+        for line in lines:
+            requests.setdefault(line['path'], ['Time']).append(line['column'])
+        self._start_loading(f'{len(requests)} files', partial(self.main_window.show_comparison, lines),
+                            self.graph_data.load_columns, requests)
+
+    def _start_loading(self, name, on_done, function, *args, on_failed=None):
+        """
+        Starting loading in background, previous loading is superseded
+        :param on_done: callable which takes loaded data, it is called in the Tk thread
+        :param on_failed: callable which is called if loading was cancelled or failed
+        """
+        self._loading = (name, on_done, on_failed)
+        self.loader.start(function, *args)
+        self.status_bar.set(f'Loading {name}...', busy=True)
+        if not self._polling:
+            self._polling = True
+            self.after(self._poll_interval, self._poll_loader)
+
+    def _on_data_loaded(self, graph_data, filename, preview):
+        columns, data = preview
+        self.main_window.columns = columns
+        self.main_window.fetch = partial(graph_data.peek_columns, filename)
+        self.main_window.calc_data = data
+        self.main_window.source_path = graph_data.path / filename
+        # follow mode parses only the rows appended to the loaded columns, the other columns are never parsed
+        self.main_window.source = partial(graph_data.get_columns, filename)
+        self.main_window.pyramid = partial(graph_data.get_pyramid, filename)
+        self.main_window.show_data()
+        self.status_bar.set(f'{filename}: {len(data)} rows')
+
+    def _poll_loader(self):
+        filename, on_done, on_failed = self._loading
+        for kind, value in self.loader.poll():
+            if kind == 'progress':
+                parsed_bytes, total_bytes, rows = value
+                self.status_bar.set(f'Loading {filename}: {parsed_bytes / 2 ** 20:.1f} of '
+                                    f'{total_bytes / 2 ** 20:.1f} MB, {rows} rows', busy=True)
+            elif kind == 'done':
+                self.status_bar.set(f'{filename}: loaded')
+                on_done(value)
+            elif kind == 'cancelled':
+                self.status_bar.set(f'Loading of {filename} was cancelled')
+                if on_failed is not None:
+                    on_failed()
+            elif kind == 'error':
+                self.status_bar.set(f'Loading of {filename} failed')
+                if on_failed is not None:
+                    on_failed()
+                messagebox.showerror(title='Error', message=f'Cannot load {filename}', detail=str(value), parent=self)
+        if self.loader.busy:
+            self.after(self._poll_interval, self._poll_loader)
+        else:
+            self._polling = False
+
+    def _on_cancel_loading(self, *_):
+        self.loader.cancel()
+        self.scanner.cancel()
 
     def _on_file_select(self, *_):
         directory = filedialog.askdirectory(
             title='Select directory with the results'
         )
         if directory:
-            self.graph_data = m.GraphData(directory)
-            self.main_window.list_of_tasks_and_transducers = self.graph_data.get_task_list()
-            self.main_window.change_directory()
+            self.preloader.cancel()
+            m = self._models()
+            graph_data = m.GraphData(directory, cache=self.column_cache, index=self.task_index,
+                                     accountant=self.memory, compact=self.menu.compact_var.get(),
+                                     channels=self.channels)
+            # the tree of a network store can take minutes to scan, so it is scanned in background
+            polling = self.scanner.busy
+            self._scanning = (graph_data, directory)
+            self.scanner.start(graph_data.get_task_list)
+            self.status_bar.set(f'Scanning {directory}...', busy=True)
+            if not polling:
+                self.after(self._poll_interval, self._poll_scanner)
+
+    def _poll_scanner(self):
+        graph_data, directory = self._scanning
+        for kind, value in self.scanner.poll():
+            if kind == 'progress':
+                scanned, found, files = value
+                if not self.loader.busy:
+                    self.status_bar.set(f'Scanning {directory}: {scanned} of {found} directories, {files} files',
+                                        busy=True)
+            elif kind == 'done':
+                self.status_bar.set(f'{directory}: {len(value)} tasks')
+                self._on_directory_scanned(graph_data, directory, value)
+            elif kind == 'cancelled':
+                self.status_bar.set(f'Scanning of {directory} was cancelled')
+            elif kind == 'error':
+                self.status_bar.set(f'Scanning of {directory} failed')
+                messagebox.showerror(title='Error', message=f'Cannot scan {directory}', detail=str(value), parent=self)
+        if self.scanner.busy:
+            self.after(self._poll_interval, self._poll_scanner)
+
+    def _on_directory_scanned(self, graph_data, directory, tasks):
+        """
+        Showing the tasks of the new directory, files of the previous one are used until then
+        """
+        # loading of a file of the previous directory would show it in the new one
+        self.loader.cancel()
+        self.graph_data = graph_data
+        self.memory.track(self.graph_data, f'Files of {directory}')
+        self.main_window.list_of_tasks_and_transducers = tasks
+        self.main_window.files = self.graph_data.get_files()
+        self.main_window.search = self.graph_data.search_channels
+        self.main_window.get_range = self.graph_data.get_range
+        self.main_window.get_summary = self.graph_data.get_summary
+        self.main_window.change_directory()
 
     def _on_select_graph_font(self, *_):
         self.main_window.set_graph_font(self.menu.font_var.get())
 
+    def _on_select_memory_budget(self, *_):
+        self._models()
+        self.memory.budget = self.menu.get_budget()
+        released = self.memory.check()
+        if released:
+            self.status_bar.set(f'{released / 2 ** 20:.1f} MB of parsed data released')
+
+    def _on_select_compact_data(self, *_):
+        if self.graph_data is not None:
+            # files which are already parsed keep their types
+            self.graph_data.compact = self.menu.compact_var.get()
+
+    def _on_select_auto_preload(self, *_):
+        self.main_window.auto_preload = self.menu.auto_preload_var.get()
+
+    def _on_show_memory_usage(self, *_):
+        self._models()
+        lines = list()
+        for owner, usage in self.memory.report().items():
+            lines.append(f'{owner}: {sum(usage.values()) / 2 ** 20:.1f} MB')
+            lines.extend(f'    {name}: {size / 2 ** 20:.1f} MB' for name, size in usage.items())
+        budget = self.memory.budget
+        message = f'Parsed files: {self.memory.files_bytes() / 2 ** 20:.1f} MB'
+        if budget is not None:
+            message += f' of {budget / 2 ** 20:.0f} MB'
+        messagebox.showinfo(title='Memory usage', message=message,
+                            detail='\n'.join(lines) or 'Nothing is loaded', parent=self)
+
+    def _on_show_performance(self, *_):
+        if self.performance_window is not None and self.performance_window.winfo_exists():
+            self.performance_window.lift()
+            return
+        self.performance_window = v.PerformanceWindow(self)
+
     def _on_close(self):
         if messagebox.askokcancel('Exit', 'Are you sure you want to exit?'):
             self.quit()
@@ -0,0 +1,241 @@
+"""
+Rendering of graphs without GUI
+Plot spec is a JSON file:
+{
+    "formats": ["png"], "dpi": 100, "font": "DejaVu Sans",
+    "channels": {"dT": "T_12 - T_11"},
+    "plots": [
+        {
+            "name": "{task}_temperature", "task": "*",
+            "title": "Temperature", "x_label": "t, s", "y_label": "T, K",
+            "x_min": 0, "x_max": 100, "y_min": 300, "y_max": 1500,
+            "x_scale": "linear", "y_scale": "linear", "legend": true,
+            "lines": [
+                {"transducer": "T1", "column": "T_12", "label": "T 12", "color": "red", "width": 1.5, "style": "solid"}
+            ]
+        }
+    ]
+}
+Task of the plot is a pattern, the plot is rendered for every matching task which has all the transducers.
+Task of the line overrides task of the plot.
+Channels are derived columns which lines can use as the other columns, see graph_viewer.expressions.
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from matplotlib import rc_context
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from . import styles
+from .cache import ColumnCache
+from .decimate import minmax, is_monotonic, visible_slice
+from .index import TaskIndex
+from .models import GraphData
+
+FIGURE_SIZE = (7, 5)
+
+
+def expand_spec(spec, tasks, files=None):
+    """
+    Making list of plots for every matching task
+    :param tasks: dict with transducers of every task as returned by GraphData.get_task_list
+    :param files: dict with path of the file of every (task, transducer) as returned by GraphData.get_files
+    :return: list of plots with name and lines with file names
+    """
+    plots = list()
+    for number, plot in enumerate(spec.get('plots', [])):
+        pattern = plot.get('task', '*')
+        for task in sorted(tasks):
+            if not fnmatch(task, pattern):
+                continue
+            lines = list()
+            for line in plot.get('lines', []):
+                line_task = line.get('task', task)
+                if line.get('transducer') not in tasks.get(line_task, []):
+                    break
+                filename = (files or {}).get((line_task, line['transducer']), f"{line_task}#{line['transducer']}.dia")
+                lines.append(dict(line, filename=filename))
+            else:
+                name = plot.get('name', f'plot{number}_{{task}}').format(task=task)
+                plots.append(dict(plot, name=name, lines=lines))
+            if all('task' in line for line in plot.get('lines', [])):
+                # lines do not depend on the task of the plot
+                break
+    return plots
+
+
+def render_plot(directory, plot, output, formats, dpi=100, font=None, cache_directory=None, decimate=True,
+                channels=None, workers=None):
+    """
+    Rendering one plot into files of the given formats
+    :param cache_directory: directory of the column cache, None to parse files without cache
+    :param decimate: if True, lines are decimated to two points per pixel of the figure
+    :param channels: dict with expression of every derived channel
+    :param workers: processes which parse one big file, 1 in the workers of the pool, by default number of cores
+    :return: list of saved files
+    """
+    cache = ColumnCache(cache_directory) if cache_directory else None
+    graph_data = GraphData(directory, cache=cache, channels=channels)
+    graph_data.workers = workers
+    return _save(graph_data, plot, output, formats, dpi, font, decimate)
+
+
+def _save(graph_data, plot, output, formats, dpi, font, decimate):
+    """
+    :return: list of saved files
+    """
+    with rc_context({'font.family': font} if font else {}):
+        figure = _draw(graph_data, plot, dpi, decimate)
+        saved = list()
+        for file_format in formats:
+            filename = os.path.join(output, f"{plot['name']}.{file_format}")
+            figure.savefig(filename, format=file_format)
+            saved.append(filename)
+    return saved
+
+
+def _draw(graph_data, plot, dpi, decimate):
+    """
+    :return: Figure with the Agg canvas, pyplot and Tk are not used
+    """
+    figure = Figure(figsize=FIGURE_SIZE, dpi=dpi)
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot(1, 1, 1)
+    axes.grid(True)
+    axes.set_xscale(plot.get('x_scale', 'linear'))
+    axes.set_yscale(plot.get('y_scale', 'linear'))
+    x_range = _limits(plot, 'x')
+    buckets = int(FIGURE_SIZE[0] * dpi)
+    colors = styles.palette(len(plot['lines']))
+    for i, line in enumerate(plot['lines']):
+        x_column = line.get('x') or graph_data.get_header(line['filename'])[0]
+        # only x and the column of the line are parsed
+        data = graph_data.get_columns(line['filename'], [x_column, line['column']])
+        x = data[x_column].to_numpy()
+        y = data[line['column']].to_numpy()
+        if decimate:
+            monotonic = is_monotonic(x)
+            pyramid = graph_data.get_pyramid(line['filename'])
+            index = None
+            if pyramid is not None and line['column'] in pyramid:
+                visible = visible_slice(x, x_range if monotonic else None)
+                index = pyramid.minmax_indices(line['column'], y, visible.start, visible.stop, buckets)
+            x, y = (x[index], y[index]) if index is not None else minmax(x, y, x_range if monotonic else None,
+                                                                            buckets=buckets)
+        axes.plot(x, y, color=line.get('color', colors[i]),
+                  ls=line.get('style', styles.DEFAULT_LINE_TYPE), lw=line.get('width', styles.DEFAULT_WIDTH),
+                  label=line.get('label', line['column']))
+    if x_range is not None:
+        axes.set_xlim(left=x_range[0], right=x_range[1])
+    y_range = _limits(plot, 'y')
+    if y_range is not None:
+        axes.set_ylim(bottom=y_range[0], top=y_range[1])
+    for axis in ('x', 'y'):
+        name = plot.get(f'{axis}_label')
+        if name:
+            axes.set(**{f'{axis}label': r'$\mathregular{' + name + '}$'})
+    axes.set_title(plot.get('title', ''))
+    if plot.get('legend', True):
+        axes.legend()
+    return figure
+
+
+def _limits(plot, axis):
+    low, high = plot.get(f'{axis}_min'), plot.get(f'{axis}_max')
+    if low is None or high is None or high <= low:
+        return None
+    return low, high
+
+
+def group_plots(plots):
+    """
+    Splitting plots into groups which have no files in common
+    :return: list of lists of plots, plots of the group keep their order
+    """
+    groups = list()
+    for number, plot in enumerate(plots):
+        files = {line['filename'] for line in plot['lines']}
+        numbers = [number]
+        for group in [group for group in groups if group[0] & files]:
+            groups.remove(group)
+            files |= group[0]
+            numbers += group[1]
+        groups.append((files, sorted(numbers)))
+    return [[plots[number] for number in numbers] for _, numbers in groups]
+
+
+def _render_job(job):
+    """
+    Rendering the group of plots in the worker process, files of the group are parsed once and only this process
+    writes their cache entries. Errors are returned instead of raised so one bad plot doesn't stop the batch
+    :return: list of name of the plot, saved files and error message
+    """
+    plots, kwargs = job
+    cache = ColumnCache(kwargs['cache_directory']) if kwargs['cache_directory'] else None
+    graph_data = GraphData(kwargs['directory'], cache=cache, channels=kwargs['channels'])
+    graph_data.workers = kwargs['workers']
+    results = list()
+    for plot in plots:
+        try:
+            saved = _save(graph_data, plot, kwargs['output'], kwargs['formats'], kwargs['dpi'], kwargs['font'],
+                          kwargs['decimate'])
+            results.append((plot['name'], saved, None))
+        except Exception as error:
+            results.append((plot['name'], [], f'{type(error).__name__}: {error}'))
+    return results
+
+
+def render(directory, spec, output, jobs=None, formats=None, cache_directory=None, decimate=True):
+    """
+    Rendering all the plots of the spec in the process pool
+    :return: list of (name, saved files, error message)
+    """
+    os.makedirs(output, exist_ok=True)
+    graph_data = GraphData(directory, index=TaskIndex() if cache_directory else None)
+    plots = expand_spec(spec, graph_data.get_task_list(), graph_data.get_files())
+    kwargs = {'directory': directory, 'output': output, 'formats': formats or spec.get('formats', ['png']),
+              'dpi': spec.get('dpi', 100), 'font': spec.get('font'), 'cache_directory': cache_directory,
+              'decimate': decimate, 'channels': spec.get('channels')}
+    jobs = jobs or os.cpu_count() or 1
+    # the process of the pool doesn't start processes of its own, otherwise there are jobs * cores processes
+    kwargs['workers'] = None if jobs == 1 else 1
+    # plots of the same files are rendered by one job, so the files are parsed once
+    # and processes of the pool never write the same cache entry
+    job_list = [(group, kwargs) for group in group_plots(plots)]
+    if jobs == 1:
+        results = [_render_job(job) for job in job_list]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_render_job, job_list))
+    return [result for group in results for result in group]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render graphs of SOCRAT results without GUI')
+    parser.add_argument('directory', help='directory with the results')
+    parser.add_argument('spec', help='JSON file with the plot spec')
+    parser.add_argument('-o', '--output', default='plots', help='directory for the rendered files')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of processes, by default number of cores')
+    parser.add_argument('-f', '--format', dest='formats', action='append', choices=['png', 'svg', 'pdf'],
+                        help='output format, overrides formats of the spec, can be repeated')
+    parser.add_argument('--no-cache', action='store_true', help='parse and scan files without the cache and the index')
+    parser.add_argument('--full', action='store_true', help='draw all the points of the lines')
+    args = parser.parse_args(argv)
+
+    with open(args.spec, 'r') as fh:
+        spec = json.load(fh)
+    cache_directory = None if args.no_cache else ColumnCache().directory
+    results = render(args.directory, spec, args.output, jobs=args.jobs, formats=args.formats,
+                     cache_directory=cache_directory, decimate=not args.full)
+    failed = 0
+    for name, saved, error in results:
+        if error:
+            failed += 1
+            print(f'{name}: {error}', file=sys.stderr)
+        else:
+            print('\n'.join(saved))
+    print(f'Rendered {len(results) - failed} of {len(results)} plots', file=sys.stderr)
+    return 1 if failed else 0
@@ -0,0 +1,375 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from . import dia
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+META_FILE = 'meta.json'
+LOCK_DIRECTORY = 'locks'
+
+
+class ColumnCache:
+    """
+    Persistent binary cache of parsed .dia files
+    Every file has its own entry directory with one raw binary file per column and meta.json.
+    Entry is valid while size and modification time of the source file are the same.
+    Entries are opened as memory mapped arrays, so reopening of the file costs no parsing.
+    Columns have no header, so rows appended to the source file are appended to the entry in place.
+    Entry can keep only some columns of the file, other columns of the same rows are added to it when they are parsed.
+    When total size of the cache exceeds the limit, least recently used entries are removed.
+    Several processes can write the same entry, so every change of the entry is made under its lock file.
+    Files are written under temporary names and renamed, readers see only the files which meta describes.
+    """
+
+    def __init__(self, directory=None, size_limit=4 * 2 ** 30):
+        self.directory = Path(directory or Path.home() / '.graph_viewer' / 'cache')
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.size_limit = size_limit
+
+    def entry(self, filename):
+        """
+        :return: path of the cache entry of the file
+        """
+        key = hashlib.sha1(os.path.abspath(filename).encode('utf-8')).hexdigest()
+        return self.directory / key
+
+    def read_meta(self, filename, validate=True):
+        """
+        :param validate: if True, stale entry is removed
+        :return: meta of the entry or None if there is no entry or it is stale
+        """
+        entry = self.entry(filename)
+        try:
+            with open(entry / META_FILE, 'r') as fh:
+                meta = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        if validate and meta.get('signature') != dia.signature(filename):
+            self.invalidate(filename)
+            return None
+        return meta
+
+    def get(self, filename, validate=True):
+        """
+        Getting parsed data of the file from the cache
+        :param validate: if False, the entry is returned even if the source file was changed
+        :return: DataFrame with memory mapped columns or None if the entry is missing or stale
+        """
+        meta = self.read_meta(filename, validate=validate)
+        if meta is None or 'columns' not in meta:
+            return None
+        entry = self.entry(filename)
+        try:
+            columns = dict()
+            for i, name in enumerate(meta['columns']):
+                columns[name] = self._map(entry / f'{i}.bin', meta['dtypes'][i], meta['rows'])
+        except (OSError, ValueError, KeyError):
+            self.invalidate(filename)
+            return None
+        try:
+            os.utime(entry / META_FILE)
+        except OSError:
+            # the entry has just been replaced by another process
+            pass
+        return pd.DataFrame(columns, columns=meta['columns'], copy=False)
+
+    def put(self, filename, data, signature=None, **extra):
+        """
+        Saving parsed data of the file, the existing entry is replaced
+        :param signature: size and mtime of the file at the moment of parsing, by default current ones
+        :param extra: additional values to keep in meta
+        :return: None
+        """
+        entry = self.entry(filename)
+        with self._locked(entry):
+            self._replace_entry(filename, data, signature, extra)
+        self.evict()
+
+    def put_columns(self, filename, data, signature=None, **extra):
+        """
+        Adding columns to the entry of the file, columns which are already in the entry are not written again
+        If there is no entry, or it has other rows or another signature, the entry is made of data by put
+        :param data: DataFrame with all the columns of the file which are known, rows are the same as in the entry
+        :param signature: size and mtime of the file at the moment of parsing, by default current ones
+        :return: None
+        """
+        signature = signature or dia.signature(filename)
+        entry = self.entry(filename)
+        with self._locked(entry):
+            meta = self.read_meta(filename, validate=False)
+            if meta is None or meta['signature'] != signature or meta.get('rows', len(data)) != len(data):
+                self._replace_entry(filename, data, signature, extra)
+            else:
+                # the entry can have only arrays, for example the index of the rows
+                meta.setdefault('columns', [])
+                meta.setdefault('dtypes', [])
+                for name in data.columns:
+                    if name in meta['columns']:
+                        continue
+                    values = np.ascontiguousarray(data[name].to_numpy())
+                    if values.dtype.hasobject:
+                        continue
+                    self._write_array(entry / f"{len(meta['columns'])}.bin", values)
+                    meta['columns'].append(name)
+                    meta['dtypes'].append(values.dtype.str)
+                meta['rows'] = len(data)
+                meta.update(extra)
+                self._write_meta(entry, meta)
+        self.evict()
+
+    def append(self, filename, data, signature=None, replace=0, **extra):
+        """
+        Appending new rows of the file to the existing entry
+        Meta is replaced only after all the columns are written, bytes of unfinished append
+        are cut off by the next one.
+        :param data: DataFrame with new rows of all the columns of the entry, other columns are skipped
+        :param replace: number of the last rows of the entry which are replaced by the new rows
+        :return: True if rows were appended, False if there is no entry or it can not keep the new rows
+        """
+        entry = self.entry(filename)
+        with self._locked(entry):
+            meta = self.read_meta(filename, validate=False)
+            if (meta is None or 'columns' not in meta or not all(name in data for name in meta['columns'])
+                    or meta['rows'] < replace):
+                return False
+            dtypes = [np.dtype(dtype) for dtype in meta['dtypes']]
+            for name, dtype in zip(meta['columns'], dtypes):
+                if not np.can_cast(data[name].dtype, dtype, casting='safe'):
+                    return False
+            rows = meta['rows'] - replace
+            for i, (name, dtype) in enumerate(zip(meta['columns'], dtypes)):
+                self._append_array(entry / f'{i}.bin', rows * dtype.itemsize,
+                                   np.ascontiguousarray(data[name].to_numpy(), dtype=dtype))
+            meta['rows'] = rows + len(data)
+            meta['signature'] = signature or dia.signature(filename)
+            meta.update(extra)
+            self._write_meta(entry, meta)
+        return True
+
+    def put_arrays(self, filename, name, arrays, create=False, **params):
+        """
+        Saving additional arrays of the file next to its columns, for example summaries of the columns
+        :param name: name of the group of arrays
+        :param arrays: dict with arrays, they are appended along the first axis
+        :param create: if True and the file is not cached, the entry without columns is made for the arrays
+        :param params: values to keep in meta of the group
+        :return: True if arrays were saved
+        """
+        entry = self.entry(filename)
+        with self._locked(entry):
+            meta = self.read_meta(filename, validate=False)
+            if meta is None and create:
+                meta = {'path': os.path.abspath(filename), 'signature': dia.signature(filename)}
+                entry.mkdir(exist_ok=True)
+            if meta is None:
+                return False
+            # every version of the group has its own directory, the old one is removed after meta is replaced
+            group = Path(tempfile.mkdtemp(prefix=f'{name}.', dir=entry))
+            described = dict()
+            for key, values in arrays.items():
+                values = np.ascontiguousarray(values)
+                values.tofile(group / f'{key}.bin')
+                described[key] = {'dtype': values.dtype.str, 'shape': list(values.shape)}
+            old = meta.get(name)
+            meta[name] = dict(params, directory=group.name, arrays=described)
+            self._write_meta(entry, meta)
+            if old is not None:
+                shutil.rmtree(entry / old.get('directory', name), ignore_errors=True)
+        return True
+
+    def append_arrays(self, filename, name, arrays):
+        """
+        Appending rows to the arrays saved by put_arrays, missing arrays are created
+        :return: True if arrays were appended, False if there is no such group
+        """
+        entry = self.entry(filename)
+        with self._locked(entry):
+            meta = self.read_meta(filename, validate=False)
+            if meta is None or name not in meta:
+                return False
+            group = entry / meta[name].get('directory', name)
+            described = meta[name]['arrays']
+            for key, values in arrays.items():
+                if key not in described:
+                    values = np.ascontiguousarray(values)
+                    self._write_array(group / f'{key}.bin', values)
+                    described[key] = {'dtype': values.dtype.str, 'shape': list(values.shape)}
+                    continue
+                dtype = np.dtype(described[key]['dtype'])
+                values = np.ascontiguousarray(values, dtype=dtype)
+                self._append_array(group / f'{key}.bin', int(np.prod(described[key]['shape'])) * dtype.itemsize,
+                                   values)
+                described[key]['shape'][0] += len(values)
+            self._write_meta(entry, meta)
+        return True
+
+    def get_arrays(self, filename, name):
+        """
+        :return: params and dict with memory mapped arrays of the group or None if there is no such group
+        """
+        meta = self.read_meta(filename, validate=False)
+        if meta is None or name not in meta:
+            return None
+        params = dict(meta[name])
+        described = params.pop('arrays')
+        group = self.entry(filename) / params.pop('directory', name)
+        try:
+            arrays = {key: self._map(group / f'{key}.bin', value['dtype'], tuple(value['shape']))
+                      for key, value in described.items()}
+        except (OSError, ValueError):
+            return None
+        return params, arrays
+
+    def invalidate(self, filename):
+        entry = self.entry(filename)
+        with self._locked(entry):
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def clear(self):
+        for entry in self.directory.iterdir():
+            if entry.name == LOCK_DIRECTORY:
+                continue
+            with self._locked(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def size(self):
+        """
+        :return: total size of the cache in bytes
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """
+        Removing least recently used entries until the cache fits the size limit
+        :return: None
+        """
+        entries = sorted(self._entries(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in entries)
+        for entry, size, _ in entries:
+            if total <= self.size_limit:
+                break
+            with self._locked(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def _entries(self):
+        """
+        :return: list of (entry, size in bytes, time of last access)
+        """
+        entries = list()
+        for entry in self.directory.iterdir():
+            meta = entry / META_FILE
+            if entry.suffix == '.tmp' or not meta.exists():
+                continue
+            try:
+                size = sum(item.stat().st_size for item in entry.rglob('*') if item.is_file())
+                last_access = meta.stat().st_mtime
+            except OSError:
+                continue
+            entries.append((entry, size, last_access))
+        return entries
+
+    def _replace_entry(self, filename, data, signature, extra):
+        """
+        Writing the entry into temporary directory and renaming it, so readers never see half written entry
+        The lock of the entry is held by the caller
+        """
+        entry = self.entry(filename)
+        temporary = Path(tempfile.mkdtemp(prefix=f'{entry.name}.', suffix='.tmp', dir=self.directory))
+        columns = data.columns.tolist()
+        dtypes = list()
+        for i, name in enumerate(columns):
+            values = np.ascontiguousarray(data[name].to_numpy())
+            if values.dtype.hasobject:
+                # only numeric tables are cached, the old entry is stale anyway
+                shutil.rmtree(temporary, ignore_errors=True)
+                shutil.rmtree(entry, ignore_errors=True)
+                return
+            values.tofile(temporary / f'{i}.bin')
+            dtypes.append(values.dtype.str)
+        meta = {'path': os.path.abspath(filename), 'signature': signature or dia.signature(filename),
+                'columns': columns, 'dtypes': dtypes, 'rows': len(data)}
+        meta.update(extra)
+        with open(temporary / META_FILE, 'w') as fh:
+            json.dump(meta, fh)
+        shutil.rmtree(entry, ignore_errors=True)
+        try:
+            os.replace(temporary, entry)
+        except OSError:
+            # files of the old entry are still open, on Windows they can not be removed
+            shutil.rmtree(temporary, ignore_errors=True)
+
+    @contextmanager
+    def _locked(self, entry):
+        """
+        Holding the lock of the entry, the lock files are kept apart, so removing of the entry keeps its lock
+        """
+        directory = self.directory / LOCK_DIRECTORY
+        directory.mkdir(exist_ok=True)
+        with open(directory / Path(entry).name.split('.')[0], 'a+b') as fh:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            else:
+                fh.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        # LK_LOCK gives up after 10 seconds
+                        continue
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+                else:
+                    fh.seek(0)
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+    @staticmethod
+    def _write_meta(entry, meta):
+        fd, temporary = tempfile.mkstemp(prefix=f'{META_FILE}.', suffix='.tmp', dir=entry)
+        with open(fd, 'w') as fh:
+            json.dump(meta, fh)
+        os.replace(temporary, entry / META_FILE)
+
+    @staticmethod
+    def _write_array(path, values):
+        """
+        Writing the array under temporary name and renaming it, so the file is never half written
+        """
+        fd, temporary = tempfile.mkstemp(prefix=f'{path.name}.', suffix='.tmp', dir=path.parent)
+        with open(fd, 'wb') as fh:
+            values.tofile(fh)
+        os.replace(temporary, path)
+
+    @staticmethod
+    def _append_array(path, size, values):
+        """
+        Writing the values after the first size bytes of the file, bytes of unfinished append are overwritten
+        Existing bytes are not cut off before writing, so memory maps of them stay valid
+        """
+        with open(path, 'r+b') as fh:
+            fh.seek(size)
+            fh.write(values.tobytes())
+            fh.truncate()
+
+    @staticmethod
+    def _map(path, dtype, shape):
+        shape = shape if isinstance(shape, tuple) else (shape,)
+        if not np.prod(shape):
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=shape)
+
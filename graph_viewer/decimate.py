@@ -0,0 +1,56 @@
+import numpy as np
+
+
+def visible_slice(x, x_range):
+    """
+    Finding points of the monotonic x inside the range with one more point on every side,
+    so the line goes up to the borders of the axes
+    :param x_range: (x min, x max) or None for the whole line
+    :return: slice of the visible points
+    """
+    if x_range is None or len(x) == 0:
+        return slice(0, len(x))
+    start = max(int(np.searchsorted(x, x_range[0], side='left')) - 1, 0)
+    stop = min(int(np.searchsorted(x, x_range[1], side='right')) + 1, len(x))
+    return slice(start, stop)
+
+
+def minmax(x, y, x_range=None, buckets=1000):
+    """
+    Decimation of the line by min and max of the y values in every bucket
+    Points of the visible range are split into buckets with equal number of points,
+    from every bucket only the points with minimal and maximal y are taken in their original order.
+    So peaks are never lost and the line has not more than 2 * buckets + 2 points.
+    :param x: monotonic x values
+    :param x_range: (x min, x max) of the visible part, None for the whole line
+    :param buckets: number of buckets, usually width of the axes in pixels
+    :return: decimated x and y, they are views of the original arrays if there is nothing to decimate
+    """
+    visible = visible_slice(x, x_range)
+    start, stop = visible.start, visible.stop
+    if stop - start <= 2 * buckets + 2:
+        return x[visible], y[visible]
+    size = (stop - start) // buckets
+    end = start + size * buckets
+    blocks = np.asarray(y[start:end]).reshape(buckets, size)
+    offsets = start + np.arange(buckets) * size
+    low = offsets + np.argmin(blocks, axis=1)
+    high = offsets + np.argmax(blocks, axis=1)
+    index = np.empty(2 * buckets + 2, dtype=np.intp)
+    index[0] = start
+    index[1:-1:2] = np.minimum(low, high)
+    index[2:-1:2] = np.maximum(low, high)
+    index[-1] = stop - 1
+    if end < stop - 1:
+        rest = np.asarray(y[end:stop])
+        extra = end + np.array(sorted({int(np.argmin(rest)), int(np.argmax(rest))}))
+        index = np.concatenate([index[:-1], extra, index[-1:]])
+    return x[index], y[index]
+
+
+def is_monotonic(x):
+    """
+    :return: True if x values never decrease, decimation by visible range works only for such x
+    """
+    x = np.asarray(x)
+    return bool(len(x) < 2 or np.all(x[1:] >= x[:-1]))
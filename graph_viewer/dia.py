@@ -0,0 +1,449 @@
+import gzip
+import io
+import lzma
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import pandas as pd
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Suffixes of the result files, archived results are compressed
+SUFFIXES = ('.dia', '.dia.gz', '.dia.xz', '.dia.zst')
+
+# Files smaller than this are parsed in the current process, starting of the workers costs more
+PARALLEL_THRESHOLD = 128 * 2 ** 20
+# Number of bytes before the parsed offset which are compared to find out if the file was only appended
+FINGERPRINT_SIZE = 256
+# Rows parsed between two calls of the progress callback
+PROGRESS_ROWS = 100000
+# Seconds between two calls of the progress callback while chunks are parsed by the processes
+PROGRESS_INTERVAL = 0.1
+# Chunks of the body per process, smaller chunks give finer progress
+CHUNKS_PER_WORKER = 4
+# Every this row is kept in the sparse index of the rows
+ROW_INDEX_STEP = 4096
+# Bytes which are read at once when rows are indexed
+ROW_INDEX_BLOCK = 16 * 2 ** 20
+# Decompressed bytes which are passed to the parser at once and number of blocks decompressed ahead of it
+DECOMPRESS_BLOCK = 2 ** 20
+DECOMPRESS_AHEAD = 8
+
+
+def is_dia(name):
+    """
+    :return: True if the name is of the plain or compressed result file
+    """
+    return str(name).endswith(SUFFIXES)
+
+
+def is_compressed(filename):
+    return str(filename).endswith(SUFFIXES[1:])
+
+
+def strip_suffix(name):
+    """
+    :return: name of the result file without .dia and suffix of the compression
+    """
+    for suffix in sorted(SUFFIXES, key=len, reverse=True):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def read_columns(filename):
+    """
+    Reading only the header of the .dia file
+    First line of the file is a title, second one contains names of the columns
+    :return: list of column names, duplicates are mangled the same way as pandas does it
+    """
+    with _open_text(filename) as fh:
+        fh.readline()
+        names = fh.readline().split()
+    if not names:
+        raise pd.errors.EmptyDataError(f'No columns in the header of {filename}')
+    # header is split by hand, it is much faster than read_csv, which matters when thousands of files are indexed
+    header = set(names)
+    counts = dict()
+    for i, name in enumerate(names):
+        column = name
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[name] = count + 1
+            column = f'{name}.{count}'
+            count = count + 1 if column in header else counts.get(column, 0)
+        names[i] = column
+        counts[column] = count + 1
+    return names
+
+
+def read_dia(filename, workers=None, stop=None, progress=None, usecols=None):
+    """
+    Reading the .dia file into DataFrame
+    Values are parsed by the C engine of pandas. Big files are cut into chunks on line boundaries
+    and the chunks are parsed in separate processes, so the time of reading scales with number of cores.
+    Compressed files are decompressed by the stream in the thread, which goes ahead of the parser.
+    :param workers: number of processes, by default number of cores
+    :param stop: offset where reading stops, by default the end of the last complete line
+    or the end of the file, if its last line has no line break but has all the columns
+    :param progress: callable which takes parsed bytes, total bytes and parsed rows,
+    it can raise an exception to stop reading
+    :param usecols: names of the columns to read, other columns are skipped by the tokenizer, by default all
+    :return: DataFrame with columns from the header of the file
+    """
+    workers = workers or os.cpu_count() or 1
+    columns = read_columns(filename)
+    if is_compressed(filename):
+        return _read_stream(filename, columns, progress=progress, usecols=usecols)
+    if stop is None:
+        stop = complete_size(filename)
+        stop += pending_size(filename, stop, columns)
+    if stop < PARALLEL_THRESHOLD:
+        workers = 1
+    ranges = _split_body(filename, body_offset(filename), stop, workers * CHUNKS_PER_WORKER if workers > 1 else 1)
+    if len(ranges) < 2:
+        return read_range(filename, ranges[0] if ranges else (stop, stop), columns, progress=progress,
+                          usecols=usecols)
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(ranges)))
+    finished = False
+    try:
+        futures = {executor.submit(read_range, filename, byte_range, columns, usecols=usecols): byte_range
+                   for byte_range in ranges}
+        total = sum(end - start for start, end in ranges)
+        parsed = rows = 0
+        running = set(futures)
+        while running:
+            # progress is called even if no chunk is done, so cancelling doesn't wait for the processes
+            done, running = wait(running, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                start, end = futures[future]
+                parsed += end - start
+                rows += len(future.result())
+            if progress is not None:
+                progress(parsed, total, rows)
+        finished = True
+        return pd.concat([future.result() for future in futures], ignore_index=True)
+    finally:
+        if not finished:
+            _terminate(executor)
+        executor.shutdown(wait=finished, cancel_futures=True)
+
+
+def read_tail(filename, offset, columns, progress=None, usecols=None):
+    """
+    Reading of the lines appended to the file after offset
+    Last line is taken only if it ends with the line break, so the file can be read while it is written
+    :param usecols: names of the columns to parse, by default all
+    :return: DataFrame with new rows and offset of the end of the last complete line
+    """
+    stop = complete_size(filename)
+    if stop <= offset:
+        return read_range(filename, (offset, offset), columns, usecols=usecols), offset
+    return read_range(filename, (offset, stop), columns, progress=progress, usecols=usecols), stop
+
+
+def read_range(filename, byte_range, columns, progress=None, usecols=None):
+    """
+    Parsing lines of the body between two offsets
+    Bytes after the stop offset are never read, even if the file grows while it is parsed
+    :param columns: names of all the columns of the file
+    :param progress: if it is given, lines are parsed by chunks and progress is called after every chunk
+    :param usecols: names of the columns to parse, by default all
+    :return: DataFrame with given columns in the order of the file
+    """
+    start, stop = byte_range
+    with open(filename, 'rb', buffering=0) as fh:
+        fh.seek(start)
+        reader = io.BufferedReader(_RangeReader(fh, stop))
+        return _read_csv(reader, columns, usecols, progress, lambda: (fh.tell() - start, stop - start))
+
+
+def _read_stream(filename, columns, progress=None, usecols=None):
+    """
+    Parsing of the compressed file, it is never expanded on disk
+    Progress is given in compressed bytes
+    :return: DataFrame with given columns in the order of the file
+    """
+    total = os.path.getsize(filename)
+    with _DecompressingReader(filename) as raw:
+        reader = io.BufferedReader(raw)
+        reader.readline()
+        reader.readline()
+        return _read_csv(reader, columns, usecols, progress, lambda: (raw.position(), total))
+
+
+def _read_csv(reader, columns, usecols, progress, position):
+    """
+    :param position: callable which returns parsed and total bytes for the progress
+    :return: DataFrame, columns without rows are float64 like the values which are appended to them later
+    """
+    data = None
+    try:
+        if progress is None:
+            data = pd.read_csv(reader, sep=r'\s+', header=None, names=columns, usecols=usecols, engine='c',
+                               encoding='utf-8')
+        else:
+            parts = list()
+            rows = 0
+            with pd.read_csv(reader, sep=r'\s+', header=None, names=columns, usecols=usecols, engine='c',
+                             encoding='utf-8', chunksize=PROGRESS_ROWS) as chunks:
+                for part in chunks:
+                    parts.append(part)
+                    rows += len(part)
+                    progress(*position(), rows)
+            data = pd.concat(parts, ignore_index=True) if parts else None
+    except pd.errors.EmptyDataError:
+        pass
+    if data is None or data.empty:
+        # pandas gives object columns for the input without rows
+        names = [name for name in columns if usecols is None or name in usecols]
+        return pd.DataFrame({name: np.empty(0) for name in names}, columns=names)
+    return data
+
+
+def index_rows(filename, start, stop, column=0, step=ROW_INDEX_STEP):
+    """
+    Making sparse index of the rows between two offsets: offset and value of the column of every step-th row
+    Line breaks are found by numpy in big blocks and only the indexed rows are parsed,
+    so indexing takes about the time of reading of the file.
+    :param start: offset of the first row, it is always indexed
+    :param column: number of the column which values are kept, usually Time
+    :return: int64 array with offsets and float64 array with values of the indexed rows
+    """
+    offsets = [start] if start < stop else []
+    rows = 0
+    position = start
+    with open(filename, 'rb') as fh:
+        fh.seek(start)
+        while position < stop:
+            block = fh.read(min(ROW_INDEX_BLOCK, stop - position))
+            if not block:
+                break
+            breaks = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord('\n'))
+            # row number rows + k + 1 starts right after the break number k of the block
+            first = (-(rows + 1)) % step
+            offsets.extend((position + breaks[first::step] + 1).tolist())
+            rows += len(breaks)
+            position += len(block)
+        if offsets and offsets[-1] >= stop:
+            # there is no row after the last line break
+            offsets.pop()
+        values = list()
+        for offset in offsets:
+            fh.seek(offset)
+            values.append(float(fh.readline().split()[column]))
+    return np.array(offsets, dtype=np.int64), np.array(values, dtype=np.float64)
+
+
+def body_offset(filename):
+    """
+    :return: offset of the first line with values in bytes
+    """
+    with open(filename, 'rb') as fh:
+        fh.readline()
+        fh.readline()
+        return fh.tell()
+
+
+def complete_size(filename, block=64 * 2 ** 10):
+    """
+    Looking for the end of the last complete line, the line which is still being written is skipped
+    Compressed files are archived results, they are always complete.
+    :return: offset right after the last line break, size of the compressed file
+    """
+    if is_compressed(filename):
+        return os.path.getsize(filename)
+    with open(filename, 'rb') as fh:
+        position = fh.seek(0, os.SEEK_END)
+        while position > 0:
+            start = max(position - block, 0)
+            fh.seek(start)
+            index = fh.read(position - start).rfind(b'\n')
+            if index >= 0:
+                return start + index + 1
+            position = start
+    return 0
+
+
+def pending_size(filename, offset, columns):
+    """
+    Finished files can end without the line break, their last line is parsed if it has all the columns
+    Such line can be still written, so it is parsed again when the file is changed.
+    :param offset: end of the last complete line
+    :param columns: names of all the columns of the file
+    :return: number of bytes of the last line after offset or 0 if it is not taken
+    """
+    if is_compressed(filename):
+        return 0
+    with open(filename, 'rb') as fh:
+        fh.seek(offset)
+        rest = fh.read()
+    if not rest or b'\n' in rest or len(rest.split()) != len(columns) or offset < body_offset(filename):
+        return 0
+    return len(rest)
+
+
+def signature(filename):
+    """
+    :return: size and modification time of the file
+    """
+    stat = os.stat(filename)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+
+def fingerprint(filename, offset):
+    """
+    :return: hex string with bytes right before offset, they are the same while the file is only appended
+    """
+    with open(filename, 'rb') as fh:
+        fh.seek(max(offset - FINGERPRINT_SIZE, 0))
+        return fh.read(min(offset, FINGERPRINT_SIZE)).hex()
+
+
+def _terminate(executor):
+    """
+    Stopping the processes of the pool which are still parsing, shutdown cancels only chunks which are not started
+    """
+    terminate = getattr(executor, 'terminate_workers', None)
+    if terminate is not None:
+        terminate()
+        return
+    for process in list((executor._processes or dict()).values()):
+        process.terminate()
+
+
+def _split_body(filename, start, stop, number_of_chunks):
+    """
+    Cutting the body of the file into chunks of equal size, every chunk ends with a full line
+    :return: list of (start, stop) offsets
+    """
+    step = max((stop - start) // number_of_chunks, 1)
+    ranges = list()
+    with open(filename, 'rb') as fh:
+        while start < stop:
+            fh.seek(min(start + step, stop))
+            fh.readline()
+            end = min(fh.tell(), stop)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _decompress(filename, raw):
+    """
+    :param raw: binary file with compressed bytes, it is not closed with the stream
+    :return: binary stream with decompressed bytes
+    """
+    filename = str(filename)
+    if filename.endswith('.gz'):
+        return gzip.GzipFile(fileobj=raw, mode='rb')
+    if filename.endswith('.xz'):
+        return lzma.LZMAFile(raw)
+    if zstandard is None:
+        raise ValueError(f'Cannot read {filename}: zstandard package is not installed')
+    return zstandard.ZstdDecompressor().stream_reader(raw, closefd=False)
+
+
+def _open_text(filename):
+    if not is_compressed(filename):
+        return open(filename, 'r', encoding='utf-8')
+    if str(filename).endswith('.zst'):
+        if zstandard is None:
+            raise ValueError(f'Cannot read {filename}: zstandard package is not installed')
+        return zstandard.open(filename, 'rt', encoding='utf-8')
+    return (gzip if str(filename).endswith('.gz') else lzma).open(filename, 'rt', encoding='utf-8')
+
+
+class _DecompressingReader(io.RawIOBase):
+    """
+    File-like object with decompressed bytes of the file
+    Blocks are decompressed in the thread ahead of the reader. zlib, lzma and zstd release GIL,
+    so decompression goes in parallel with parsing.
+    """
+
+    def __init__(self, filename):
+        super().__init__()
+        self._raw = open(filename, 'rb')
+        self._blocks = queue.Queue(maxsize=DECOMPRESS_AHEAD)
+        self._stop = threading.Event()
+        self._rest = memoryview(b'')
+        self._finished = False
+        self._thread = threading.Thread(target=self._run, args=(filename,), daemon=True)
+        self._thread.start()
+
+    def _run(self, filename):
+        try:
+            with _decompress(filename, self._raw) as stream:
+                while not self._stop.is_set():
+                    block = stream.read(DECOMPRESS_BLOCK)
+                    self._put(block)
+                    if not block:
+                        return
+        except Exception as error:
+            # error of the broken file is raised by the reader
+            self._put(error)
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def position(self):
+        """
+        :return: number of compressed bytes which are already read
+        """
+        return self._raw.tell()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self._rest:
+            if self._finished:
+                return 0
+            item = self._blocks.get()
+            if isinstance(item, Exception):
+                raise item
+            if not item:
+                self._finished = True
+                return 0
+            self._rest = memoryview(item)
+        size = min(len(buffer), len(self._rest))
+        buffer[:size] = self._rest[:size]
+        self._rest = self._rest[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+            self._raw.close()
+        super().close()
+
+
+class _RangeReader(io.RawIOBase):
+    """
+    File-like object which ends at the stop offset of the underlying file
+    """
+
+    def __init__(self, fh, stop):
+        super().__init__()
+        self._fh = fh
+        self._stop = stop
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._stop - self._fh.tell())
+        if size <= 0:
+            return 0
+        return self._fh.readinto(memoryview(buffer)[:size])
@@ -0,0 +1,168 @@
+"""
+Expressions of derived channels
+Expression is written in Python syntax with columns as names, for example:
+    T_out - T_in
+    (T_12 - 273.15) * 1.8 + 32
+    mean(P_3, 100)
+    deriv(T_1)
+    col('T_1.1') / 2
+Names which are not identifiers are written as col('name').
+Allowed operators are + - * / // % **, functions are listed in FUNCTIONS.
+Expressions are evaluated by NumPy over whole columns, nothing is computed row by row.
+"""
+import ast
+import numpy as np
+
+
+def moving_average(values, window):
+    """
+    Mean of the last window rows, first rows are averaged over the rows which exist
+    Sums are taken from the cumulative sum, so it costs the same for any window
+    """
+    window = int(window)
+    if window < 1:
+        raise ValueError('Window of the moving average must be positive')
+    values = np.asarray(values, dtype=np.float64)
+    total = np.concatenate([[0.0], np.cumsum(values)])
+    stop = np.arange(1, len(values) + 1)
+    start = np.maximum(stop - window, 0)
+    return (total[stop] - total[start]) / (stop - start)
+
+
+def derivative(values, time):
+    """
+    Derivative by time, central differences inside and one-sided ones on the borders
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 2:
+        return np.full(len(values), np.nan)
+    return np.gradient(values, np.asarray(time, dtype=np.float64))
+
+
+def integral(values, time):
+    """
+    Cumulative integral by time by the trapezoidal rule, it starts from zero
+    """
+    values = np.asarray(values, dtype=np.float64)
+    time = np.asarray(time, dtype=np.float64)
+    result = np.zeros(len(values))
+    if len(values) > 1:
+        result[1:] = np.cumsum((values[1:] + values[:-1]) * np.diff(time) / 2)
+    return result
+
+
+# name: (function, number of arguments, True if the function takes Time after the arguments)
+FUNCTIONS = {
+    'abs': (np.abs, 1, False),
+    'sqrt': (np.sqrt, 1, False),
+    'exp': (np.exp, 1, False),
+    'log': (np.log, 1, False),
+    'log10': (np.log10, 1, False),
+    'sin': (np.sin, 1, False),
+    'cos': (np.cos, 1, False),
+    'tan': (np.tan, 1, False),
+    'min': (np.minimum, 2, False),
+    'max': (np.maximum, 2, False),
+    'mean': (moving_average, 2, False),
+    'deriv': (derivative, 1, True),
+    'integral': (integral, 1, True),
+}
+
+OPERATORS = {
+    ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.true_divide,
+    ast.FloorDiv: np.floor_divide, ast.Mod: np.mod, ast.Pow: np.power,
+    ast.USub: np.negative, ast.UAdd: np.positive,
+}
+
+
+class Expression:
+    """
+    Parsed expression of the derived channel
+    Only arithmetic, numbers, columns and FUNCTIONS are allowed, so the expression can not run any code.
+    """
+
+    def __init__(self, text, time_column='Time'):
+        """
+        :raise ValueError: if the expression can not be parsed or it uses something which is not allowed
+        """
+        self.text = text.strip()
+        self.time_column = time_column
+        try:
+            tree = ast.parse(self.text, mode='eval')
+        except SyntaxError as error:
+            raise ValueError(f'Invalid expression {self.text!r}: {error.msg}') from None
+        # names of the used columns in order of appearance
+        self.columns = list()
+        self._tree = tree.body
+        self._check(self._tree)
+        if not self.columns:
+            raise ValueError(f'Expression {self.text!r} uses no columns')
+
+    def __str__(self):
+        return self.text
+
+    def evaluate(self, columns):
+        """
+        :param columns: mapping with arrays of all the used columns
+        :return: float64 array with value of every row
+        """
+        rows = len(columns[self.columns[0]])
+        with np.errstate(all='ignore'):
+            result = self._evaluate(self._tree, columns)
+        result = np.asarray(result, dtype=np.float64)
+        return np.full(rows, result) if result.ndim == 0 else result
+
+    def _use(self, name):
+        if name not in self.columns:
+            self.columns.append(name)
+
+    def _check(self, node):
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise ValueError(f'Only numbers are allowed in {self.text!r}, not {node.value!r}')
+        elif isinstance(node, ast.Name):
+            self._use(node.id)
+        elif isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+            self._check(node.left)
+            self._check(node.right)
+        elif isinstance(node, ast.UnaryOp) and type(node.op) in OPERATORS:
+            self._check(node.operand)
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            name = node.func.id
+            if name == 'col':
+                if len(node.args) != 1 or not isinstance(node.args[0], ast.Constant) \
+                        or not isinstance(node.args[0].value, str):
+                    raise ValueError(f"col takes name of the column in quotes in {self.text!r}")
+                self._use(node.args[0].value)
+                return
+            if name not in FUNCTIONS:
+                raise ValueError(f'Unknown function {name} in {self.text!r}, '
+                                 f'known ones are col, {", ".join(FUNCTIONS)}')
+            _, count, uses_time = FUNCTIONS[name]
+            if len(node.args) != count:
+                raise ValueError(f'{name} takes {count} arguments in {self.text!r}')
+            if name == 'mean' and not (isinstance(node.args[1], ast.Constant) and isinstance(node.args[1].value, int)):
+                raise ValueError(f'Window of mean must be number of rows in {self.text!r}')
+            for argument in node.args:
+                self._check(argument)
+            if uses_time:
+                self._use(self.time_column)
+        else:
+            raise ValueError(f'{ast.unparse(node)!r} is not allowed in {self.text!r}')
+
+    def _evaluate(self, node, columns):
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Name):
+            return columns[node.id]
+        if isinstance(node, ast.BinOp):
+            return OPERATORS[type(node.op)](self._evaluate(node.left, columns), self._evaluate(node.right, columns))
+        if isinstance(node, ast.UnaryOp):
+            return OPERATORS[type(node.op)](self._evaluate(node.operand, columns))
+        if node.func.id == 'col':
+            return columns[node.args[0].value]
+        function, _, uses_time = FUNCTIONS[node.func.id]
+        arguments = [self._evaluate(argument, columns) for argument in node.args]
+        if uses_time:
+            arguments.append(columns[self.time_column])
+        return function(*arguments)
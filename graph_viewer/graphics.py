@@ -0,0 +1,869 @@
+"""
+Graph window with its panel of properties of the lines and axes
+It is imported on the first graph, so matplotlib is not loaded at the start of the viewer.
+"""
+import tkinter as tk
+from tkinter import ttk
+from tkinter import messagebox
+from . import widgets as w
+from . import styles
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg, NavigationToolbar2Tk)
+import numpy as np
+import queue
+import threading
+from .watcher import FileWatcher
+from .decimate import minmax, is_monotonic, visible_slice
+from .memory import frame_bytes
+from .profiling import timed
+
+matplotlib.use('TkAgg')
+
+
+class ToolBar(ttk.Frame):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._vars_graph = {'Graph title': tk.StringVar(), 'X min': tk.DoubleVar(), 'X max': tk.DoubleVar(),
+                            'Y min': tk.DoubleVar(), 'Y max': tk.DoubleVar(), 'Legend': tk.BooleanVar(),
+                            'X axis': tk.StringVar(), 'Y axis': tk.StringVar()}
+        self._vars_line = {'Choose line': tk.StringVar(), 'Line label': tk.StringVar(), 'Color': tk.StringVar(),
+                           'Width': tk.DoubleVar(), 'Line type': tk.StringVar(), 'X scale': tk.StringVar(),
+                           'Y scale': tk.StringVar()}
+        self._default_colors = list(styles.DEFAULT_COLORS)
+        self._default_line_types = list(styles.LINE_TYPES)
+        self._default_axis_scales = list(styles.AXIS_SCALES)
+        self._default_font_names = ['DejaVu Sans', 'Times New Roman', 'Helvetica', 'Times', 'Utopia',
+                                    'ITC Avant Garde Gothic', 'Courier', 'Symbol', 'Computer Modern']
+        self._line_types = list()
+        self._colors = list()
+        self._width = list()
+        self._line_label = list()
+        self._x_log = 'linear'
+        self._y_log = 'linear'
+
+        line_frame = ttk.LabelFrame(self, text='Line properties')
+        line_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=1)
+        self.line_label_combobox = w.LabelInput(line_frame, 'Choose line', self._vars_line['Choose line'],
+                                                input_class=w.ValidatedCombobox,
+                                                input_args={'values': self._line_types},
+                                                pad_args={'padx': 2, 'pady': 2})
+        self.line_label_combobox.grid(row=0, column=0)
+        self.line_label_entry = w.LabelInput(line_frame, 'Line label', self._vars_line['Line label'],
+                                             input_class=w.RequiredEntry, pad_args={'padx': 2, 'pady': 2},
+                                             disable_var=self._vars_line['Choose line'])
+        self.line_label_entry.grid(row=1, column=0)
+        self.color_combobox = w.LabelInput(line_frame, 'Color', self._vars_line['Color'],
+                                           input_class=w.ValidatedCombobox, input_args={'values': self._default_colors},
+                                           disable_var=self._vars_line['Choose line'], pad_args={'padx': 2, 'pady': 2})
+        self.color_combobox.grid(row=2, column=0)
+        self.width_entry = w.LabelInput(line_frame, 'Width', self._vars_line['Width'], input_class=w.RequiredEntry,
+                                        disable_var=self._vars_line['Choose line'], pad_args={'padx': 2, 'pady': 2})
+        self.width_entry.grid(row=3, column=0)
+        self.line_type_combobox = w.LabelInput(line_frame, 'Line type', self._vars_line['Line type'],
+                                               input_class=w.ValidatedCombobox,
+                                               input_args={'values': self._default_line_types},
+                                               disable_var=self._vars_line['Choose line'],
+                                               pad_args={'padx': 2, 'pady': 2})
+        self.line_type_combobox.grid(row=4, column=0)
+        self.x_scale_combobox = w.LabelInput(line_frame, 'X-axis scale', self._vars_line['X scale'],
+                                             input_class=w.ValidatedCombobox,
+                                             input_args={'values': self._default_axis_scales},
+                                             disable_var=self._vars_line['Choose line'],
+                                             pad_args={'padx': 2, 'pady': 2})
+        self.x_scale_combobox.grid(row=5, column=0)
+        self.y_scale_combobox = w.LabelInput(line_frame, 'Y-axis scale', self._vars_line['Y scale'],
+                                             input_class=w.ValidatedCombobox,
+                                             input_args={'values': self._default_axis_scales},
+                                             disable_var=self._vars_line['Choose line'],
+                                             pad_args={'padx': 2, 'pady': 2})
+        self.y_scale_combobox.grid(row=6, column=0)
+
+        line_buttons = tk.Frame(line_frame)
+        line_buttons.grid(row=7, column=0)
+        self.ok_line_button = ttk.Button(line_buttons, text='Ok', command=self.master._on_replot_line)
+        self.ok_line_button.pack(side=tk.LEFT)
+        self.reset_line_button = ttk.Button(line_buttons, text='Reset', command=self.master._on_reset_line)
+        self.reset_line_button.pack(side=tk.RIGHT)
+        self._vars_line['Choose line'].trace_add('write', self._on_select_line)
+
+        graph_frame = ttk.LabelFrame(self, text='Graph Properties')
+        graph_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=1)
+        w.LabelInput(graph_frame, 'Graph title', self._vars_graph['Graph title'], input_class=ttk.Entry,
+                     pad_args={'padx': 2, 'pady': 2}).grid(row=0, column=0)
+        w.LabelInput(graph_frame, 'Name of x axis', self._vars_graph['X axis'], input_class=ttk.Entry,
+                     pad_args={'padx': 2, 'pady': 2}).grid(row=1, column=0)
+        w.LabelInput(graph_frame, 'Name of y axis', self._vars_graph['Y axis'], input_class=ttk.Entry,
+                     pad_args={'padx': 2, 'pady': 2}).grid(row=2, column=0)
+        w.LabelInput(graph_frame, 'Min x', self._vars_graph['X min'], input_class=w.RequiredEntry,
+                     pad_args={'padx': 2, 'pady': 2}).grid(row=3, column=0)
+        w.LabelInput(graph_frame, 'Max x', self._vars_graph['X max'], input_class=w.RequiredEntry,
+                     pad_args={'padx': 2, 'pady': 2}).grid(row=4, column=0)
+        w.LabelInput(graph_frame, 'Min y', self._vars_graph['Y min'], input_class=w.RequiredEntry,
+                     pad_args={'padx': 2, 'pady': 2}).grid(row=5, column=0)
+        w.LabelInput(graph_frame, 'Max y', self._vars_graph['Y max'], input_class=w.RequiredEntry,
+                     pad_args={'padx': 2, 'pady': 2}).grid(row=6, column=0)
+        self.legend_checkbutton = w.LabelInput(graph_frame, 'Legend', self._vars_graph['Legend'],
+                                               input_class=ttk.Checkbutton, pad_args={'padx': 2, 'pady': 2})
+        self.legend_checkbutton.grid(row=7, column=0)
+        self._vars_graph['Legend'].trace_add('write', self.master._on_click_legend)
+        self.follow_var = tk.BooleanVar()
+        self.follow_checkbutton = w.LabelInput(graph_frame, 'Follow file', self.follow_var,
+                                               input_class=ttk.Checkbutton, pad_args={'padx': 2, 'pady': 2})
+        self.follow_checkbutton.grid(row=8, column=0)
+        self.follow_var.trace_add('write', self.master._on_click_follow)
+        self.decimate_var = tk.BooleanVar(value=True)
+        w.LabelInput(graph_frame, 'Decimate lines', self.decimate_var, input_class=ttk.Checkbutton,
+                     pad_args={'padx': 2, 'pady': 2}).grid(row=9, column=0)
+        self.decimate_var.trace_add('write', self.master._on_click_decimate)
+        self.full_export_var = tk.BooleanVar()
+        w.LabelInput(graph_frame, 'Save all points', self.full_export_var, input_class=ttk.Checkbutton,
+                     pad_args={'padx': 2, 'pady': 2}).grid(row=10, column=0)
+
+        graph_buttons = tk.Frame(graph_frame)
+        graph_buttons.grid(row=11, column=0)
+        self.ok_graph_button = ttk.Button(graph_buttons, text='Ok', command=self.master._on_replot_graph)
+        self.ok_graph_button.pack(side=tk.LEFT)
+        self.reset_graph_button = ttk.Button(graph_buttons, text='Reset', command=self.master._on_reset_graph)
+        self.reset_graph_button.pack(side=tk.RIGHT)
+
+    def set(self, line_label, color=None, width=styles.DEFAULT_WIDTH, line_type=styles.DEFAULT_LINE_TYPE):
+        """
+        Setting line properties
+        :param color: color of the line, by default the next of the default colors
+        :return: None
+        """
+        if color is None:
+            color = self._default_colors[len(self._line_label) % len(self._default_colors)]
+        elif color not in self._default_colors:
+            # colors of the palette can be chosen for other lines too
+            self._default_colors.append(color)
+            self.color_combobox.input.configure(values=self._default_colors)
+        self._line_types.append(line_type)
+        self._line_label.append(line_label)
+        self._colors.append(color)
+        self._width.append(width)
+        self.line_label_combobox.input.configure(values=self._line_label)
+
+    def get(self):
+        """
+        Get line properties
+        Not a good decision to make dict like this, but as for now it is the best option
+        :return: data dict with properties of line type, line label, color, width
+        TODO: remake filling of the dictionary
+        """
+        data = dict()
+        data['Choose line'] = self._line_label
+        data['Line label'] = self._line_label
+        data['Color'] = self._colors
+        data['Width'] = self._width
+        data['Line type'] = self._line_types
+        data['X scale'] = self._x_log
+        data['Y scale'] = self._y_log
+        return data
+
+    def get_new_line_properties(self):
+        """
+        Asking all the label inputs about its values
+        :return: data dict with all the values of line properties field
+        """
+        data = dict()
+        for key, variable in self._vars_line.items():
+            try:
+                data[key] = variable.get()
+            except tk.TclError:
+                message = f'Error in field: {key}. Data was not saved'
+                raise ValueError(message)
+        return data
+
+    def get_line_index(self):
+        """
+        Getting an index of the line which is chosen in combobox
+        :return: index of the line
+        """
+        try:
+            index = self._line_label.index(self._vars_line.get('Choose line').get())
+        except ValueError:
+            return None
+        return index
+
+    def set_new_line_properties(self):
+        """
+        Setting new line properties
+        :return: index of the changed line
+        """
+        line_properties = self.get_new_line_properties()
+        index = self._line_label.index(line_properties['Choose line'])
+        if line_properties['Line label']:
+            self._line_label[index] = line_properties['Line label']
+            self._vars_line.get('Choose line').set(line_properties.get('Line label'))
+        self._colors[index] = line_properties['Color']
+        self._line_types[index] = line_properties['Line type']
+        self._width[index] = line_properties['Width']
+        self._x_log = line_properties['X scale']
+        self._y_log = line_properties['Y scale']
+        self.line_label_combobox.input.configure(values=self._line_label)
+        return index
+
+    def reset_line_properties(self):
+        for key, var in self._vars_line.items():
+            if isinstance(var, tk.BooleanVar):
+                var.set(False)
+            else:
+                if key != 'Choose line':
+                    var.set('')
+
+    def get_new_graph_properties(self):
+        """
+        Asking all the label inputs about its values
+        :return: dict with all the values of graph properties field
+        """
+        data = dict()
+        for key, variable in self._vars_graph.items():
+            try:
+                data[key] = variable.get()
+            except tk.TclError:
+                message = f'Error in field: {key}. Data was not saved'
+                raise ValueError(message)
+        return data
+
+    def get_legend_value(self):
+        return self._vars_graph.get('Legend').get()
+
+    def get_follow_value(self):
+        return self.follow_var.get()
+
+    def get_decimate_value(self):
+        return self.decimate_var.get()
+
+    def get_full_export_value(self):
+        return self.full_export_var.get()
+
+    def get_font_name(self):
+        return self._vars_graph.get('Font').get()
+
+    def set_limits(self, x_limits=None, y_limits=None):
+        """
+        Filling min and max of the axes, limits which are None are kept
+        :return: None
+        """
+        for (low, high), limits in ((('X min', 'X max'), x_limits), (('Y min', 'Y max'), y_limits)):
+            if limits is not None:
+                self._vars_graph[low].set(limits[0])
+                self._vars_graph[high].set(limits[1])
+
+    def reset_graph_properties(self):
+        for var in self._vars_graph.values():
+            if isinstance(var, tk.BooleanVar):
+                var.set(False)
+            else:
+                var.set('')
+
+    def renew_widgets(self):
+        index = self.get_line_index()
+        if index is not None:
+            data = self.get()
+            keys = list(data.keys())
+            for var, i in zip(self._vars_line.values(), range(len(keys))):
+                if isinstance(var, tk.BooleanVar):
+                    var.set(False)
+                else:
+                    if keys[i] == 'X scale' or keys[i] == 'Y scale':
+                        var.set(data.get(keys[i]))
+                    else:
+                        var.set(data.get(keys[i])[index])
+
+    def get_errors_line(self):
+        errors = {}
+        for key, var in self._vars_line.items():
+            inp = var.label_widget.input
+            error = var.label_widget.error
+            if hasattr(inp, 'trigger_focusout_validation'):
+                inp.trigger_focusout_validation()
+            if error.get():
+                errors[key] = error.get()
+        return errors
+
+    def get_errors_graph(self):
+        errors = {}
+        for key, var in self._vars_graph.items():
+            inp = var.label_widget.input
+            error = var.label_widget.error
+            if hasattr(inp, 'trigger_focusout_validation'):
+                inp.trigger_focusout_validation()
+            if error.get():
+                errors[key] = error.get()
+        return errors
+
+    def _on_select_line(self, *_):
+        for key, var in self._vars_line.items():
+            var.label_widget.input.config(state=tk.NORMAL)
+        self.renew_widgets()
+
+
+class GraphToolbar(NavigationToolbar2Tk):
+    """
+    Navigation toolbar which can save the figure with all the points of decimated lines
+    """
+
+    def __init__(self, canvas, window, *args, **kwargs):
+        super().__init__(canvas, window, *args, **kwargs)
+        self.graphic_window = window
+
+    def save_figure(self, *args):
+        full = self.graphic_window.toolbar_own.get_full_export_value()
+        if full:
+            self.graphic_window.set_lines_data(full=True)
+        try:
+            return super().save_figure(*args)
+        finally:
+            if full:
+                self.graphic_window.set_lines_data()
+
+
+class GraphicWindow(w.TopLevelWindow):
+    # how often new data of the followed file is applied to the lines, ms
+    follow_interval = 2000
+    # how often the followed file is checked, s
+    watch_interval = 1.0
+    # if there are more lines, they are drawn as one LineCollection
+    collection_threshold = 24
+
+    # number of lines which values are shown next to the cursor coordinates
+    readout_lines = 5
+    # ranges with more rows are not drawn at full resolution, lines are decimated as usual
+    window_rows = 2 * 10 ** 6
+    # how often the range which is loaded in background is checked, ms
+    window_poll_interval = 100
+
+    def __init__(self, parent, title, *args, source_path=None, source=None, **kwargs):
+        """
+        :param source_path: path of the file with data of the first source, it is watched in follow mode
+        :param source: callable which returns current data of the file, it is called from the thread of the watcher
+        """
+        super().__init__(parent, title, *args, **kwargs)
+        self._source_path = source_path
+        self._source = source
+        self._watcher = None
+        self._updates = queue.Queue()
+        self._windows = queue.Queue()
+        self.figure = Figure(figsize=(7, 5), dpi=100)
+        self.canvas_tkagg = FigureCanvasTkAgg(self.figure, master=self)
+        # draw_idle calls draw of the instance, so idle redraws are timed too
+        self.canvas_tkagg.draw = timed('canvas_tkagg.draw')(self.canvas_tkagg.draw)
+        canvas = self.canvas_tkagg.get_tk_widget()
+        canvas.pack(fill=tk.BOTH, expand=1)
+        self.toolbar = GraphToolbar(self.canvas_tkagg, self)
+        self.toolbar_own = ToolBar(self)
+        self.toolbar_own.pack(fill=tk.BOTH, expand=1)
+        self.axes = self.figure.add_subplot(1, 1, 1)
+        self.axes.grid(True)
+        # lines share frames of the sources and their x columns, only source and name of y column are kept per line
+        self._sources = list()
+        self._lines = list()
+        self._plots = list()
+        self._collection = None
+        # indices of the lines which have entries in the legend, in the order of the entries
+        self._legend_lines = list()
+        # lines and the legend are animated, they are drawn over the background of the last full redraw,
+        # so restyling of a line redraws only them
+        self._background = None
+        self._view_range = None
+        self._decimate_scheduled = False
+        self.axes.callbacks.connect('xlim_changed', self._on_xlim_changed)
+        self.canvas_tkagg.mpl_connect('draw_event', self._on_draw)
+        self.axes.format_coord = self._format_coord
+        ttk.Label(self, text='Status: ')
+        if source_path is None or source is None:
+            self.toolbar_own.follow_checkbutton.input.configure(state=tk.DISABLED)
+        self.protocol('WM_DELETE_WINDOW', self._on_close)
+        w.TopLevelWindow.center(self)
+
+    def set_source(self, data, x_column='Time', pyramid=None, window=None):
+        """
+        Adding the frame with data of the lines, it is referenced, not copied
+        Lines of different sources can have different x values, they are not merged
+        :param x_column: name of the column with x values of the lines of the source
+        :param pyramid: callable which returns current summaries of the columns of the source or None
+        :param window: callable which takes x min and x max and returns rows of the range with all the columns
+        of the lines, it is called from the thread when X min and X max are set
+        :return: index of the source
+        """
+        self._sources.append({'x_column': x_column, 'pyramid': pyramid, 'window': window, 'range': None})
+        self._update_source(len(self._sources) - 1, data)
+        return len(self._sources) - 1
+
+    def memory_usage(self):
+        """
+        :return: dict with bytes of columns of the lines of every source, they are shared with the parsed files
+        """
+        usage = dict()
+        for i, source in enumerate(self._sources):
+            names = {source['x_column']} | {column for index, column in self._lines if index == i}
+            frames = [{name: source['data'][name] for name in names}]
+            if source['range'] is not None:
+                frames.append(source['range']['data'])
+            usage[f'Source {i + 1}'] = frame_bytes(frames)
+        return usage
+
+    def _update_source(self, index, data):
+        source = self._sources[index]
+        if source.get('range') is not None and len(source['x']) and source['range']['end'] >= source['x'][-1]:
+            # loaded range has no appended rows
+            source['range'] = None
+        source['data'] = data
+        source['x'] = data[source['x_column']].to_numpy()
+        # lines with monotonic x are decimated only in the visible range
+        source['monotonic'] = is_monotonic(source['x'])
+
+    def set(self, column, label, color=None, source=0):
+        """
+        Adding the line of the column of the source frame
+        :return: None
+        """
+        self._lines.append((source, column))
+        self.toolbar_own.set(label, color=color)
+
+    def set_lines(self, columns, labels=None, sources=None):
+        """
+        Adding lines of the columns with colors of the palette, which is generated for any number of lines
+        :param sources: index of the source of every line, by default all the lines are of the first source
+        :return: None
+        """
+        labels = labels or columns
+        sources = sources or [0] * len(columns)
+        for column, label, color, source in zip(columns, labels, styles.palette(len(columns)), sources):
+            self.set(column, label, color=color, source=source)
+
+    def prefill_limits(self, summaries):
+        """
+        Filling limits of the axes in the panel with extremes of the lines, so they are edited, not typed
+        :param summaries: summary statistics of the columns of every source, as GraphData.get_summary returns
+        :return: None
+        """
+        x_values, y_values = list(), list()
+        for index, column in self._lines:
+            summary = summaries[index]
+            for values, name in ((x_values, self._sources[index]['x_column']), (y_values, column)):
+                if name in summary and summary[name]['count']:
+                    values.extend((summary[name]['min'], summary[name]['max']))
+        self.toolbar_own.set_limits(x_limits=(min(x_values), max(x_values)) if x_values else None,
+                                    y_limits=(min(y_values), max(y_values)) if y_values else None)
+
+    @timed('GraphicWindow.draw_plot')
+    def draw_plot(self):
+        line_properties = self.toolbar_own.get()
+        self.axes.set_xscale(line_properties.get('X scale'))
+        self.axes.set_yscale(line_properties.get('Y scale'))
+        if len(self._lines) > self.collection_threshold:
+            # one artist for all the lines, its segments and properties are updated by one call
+            self._collection = LineCollection([self._segment(i) for i in range(len(self._lines))],
+                                              colors=line_properties.get('Color'),
+                                              linestyles=line_properties.get('Line type'),
+                                              linewidths=line_properties.get('Width'), animated=True)
+            self.axes.add_collection(self._collection)
+            self.axes.autoscale_view()
+            return
+        for i in range(len(self._lines)):
+            self._plots.append(self.axes.plot(*self._line_data(i),
+                                              color=line_properties.get('Color')[i],
+                                              ls=line_properties.get('Line type')[i],
+                                              label=line_properties.get('Choose line')[i],
+                                              lw=line_properties.get('Width')[i], animated=True))
+
+    def _line_data(self, i, full=False):
+        """
+        Getting points of the line to plot
+        Decimated line has about two points per pixel of the axes width in the visible range
+        :param full: if True, all the points are returned
+        :return: x and y arrays
+        """
+        source, column = self._lines[i]
+        source = self._sources[source]
+        # views of the source columns, nothing is copied unless the line is decimated
+        x = source['x']
+        y = source['data'][column].to_numpy()
+        if full or not self.toolbar_own.get_decimate_value():
+            return x, y
+        x_range = self._view_range if source['monotonic'] else None
+        loaded = source['range']
+        if loaded is not None and x_range is not None and loaded['start'] <= x_range[0] and x_range[1] <= loaded['end']:
+            # view is inside of the range loaded by X min and X max, all its points are drawn
+            return loaded['x'], loaded['data'][column].to_numpy()
+        buckets = max(int(self.axes.bbox.width), 100)
+        if len(self._lines) > self.collection_threshold:
+            # overlaid lines are indistinguishable at full resolution, fewer points keep redrawing fast
+            buckets //= 2
+        pyramid = source['pyramid']() if source['pyramid'] is not None else None
+        if pyramid is not None and column in pyramid:
+            # summaries give min and max of every bucket without reading all the visible points
+            visible = visible_slice(x, x_range)
+            index = pyramid.minmax_indices(column, y, visible.start, visible.stop, buckets)
+            if index is not None:
+                return x[index], y[index]
+        return minmax(x, y, x_range, buckets=buckets)
+
+    def values_at(self, x):
+        """
+        Values of the lines at x, lines with different x values are aligned by linear interpolation
+        Only two points of every line around x are used, they are found by binary search
+        :return: list of (label, value), value is nan outside of the line
+        """
+        labels = self.toolbar_own.get().get('Choose line')
+        values = list()
+        for i, (source, column) in enumerate(self._lines):
+            source = self._sources[source]
+            xs = source['x']
+            if not source['monotonic'] or len(xs) == 0:
+                continue
+            k = int(np.searchsorted(xs, x))
+            if k == 0 or k == len(xs):
+                value = source['data'][column].iat[k] if k < len(xs) and xs[k] == x else np.nan
+            else:
+                ys = source['data'][column].to_numpy()
+                value = np.interp(x, xs[k - 1:k + 1], ys[k - 1:k + 1])
+            values.append((labels[i], value))
+        return values
+
+    def _format_coord(self, x, y):
+        text = f'x={x:.6g} y={y:.6g}'
+        if len(self._sources) < 2:
+            return text
+        values = self.values_at(x)[:self.readout_lines]
+        return text + '\n' + ', '.join(f'{label}: {value:.6g}' for label, value in values)
+
+    def _segment(self, i, full=False):
+        """
+        :return: points of the line as (n, 2) array for LineCollection
+        """
+        return np.column_stack(self._line_data(i, full))
+
+    def _set_scales(self):
+        """
+        Setting scales of the axes, they are changed only if they differ, because it resets the ticks
+        :return: True if a scale was changed
+        """
+        line_properties = self.toolbar_own.get()
+        changed = False
+        if self.axes.get_xscale() != line_properties.get('X scale'):
+            self.axes.set_xscale(line_properties.get('X scale'))
+            changed = True
+        if self.axes.get_yscale() != line_properties.get('Y scale'):
+            self.axes.set_yscale(line_properties.get('Y scale'))
+            changed = True
+        return changed
+
+    def _restyle_line(self, i):
+        """
+        Setting properties of the line to its artist, points of the line are not touched
+        :return: None
+        """
+        line_properties = self.toolbar_own.get()
+        line = self._plots[i][0]
+        line.set_color(line_properties.get('Color')[i])
+        line.set_linestyle(line_properties.get('Line type')[i])
+        line.set_linewidth(line_properties.get('Width')[i])
+        line.set_label(line_properties.get('Choose line')[i])
+
+    def _restyle_collection(self):
+        """
+        Setting properties of all the lines of the collection at once
+        :return: None
+        """
+        line_properties = self.toolbar_own.get()
+        self._collection.set_color(line_properties.get('Color'))
+        self._collection.set_linestyle(line_properties.get('Line type'))
+        self._collection.set_linewidth(line_properties.get('Width'))
+
+    def _legend(self):
+        """
+        Making legend, lines of the collection are shown by proxy artists
+        Lines which labels start with underscore have no entries, as in matplotlib.
+        :return: Legend
+        """
+        line_properties = self.toolbar_own.get()
+        labels = line_properties.get('Choose line')
+        self._legend_lines = [i for i, label in enumerate(labels) if not label.startswith('_')]
+        if self._collection is None:
+            legend = self.axes.legend(handles=[self._plots[i][0] for i in self._legend_lines])
+        else:
+            handles = [Line2D([], [], color=line_properties.get('Color')[i], ls=line_properties.get('Line type')[i],
+                              lw=line_properties.get('Width')[i], label=labels[i]) for i in self._legend_lines]
+            legend = self.axes.legend(handles=handles, fontsize='small')
+        legend.set_animated(True)
+        return legend
+
+    def _update_legend(self, i):
+        """
+        Setting properties of the line to its entry of the legend, the legend is made again only
+        if the line gets or loses its entry
+        :return: None
+        """
+        legend = self.axes.get_legend()
+        if legend is None:
+            return
+        line_properties = self.toolbar_own.get()
+        label = line_properties.get('Choose line')[i]
+        if (i in self._legend_lines) == label.startswith('_'):
+            self._legend()
+            return
+        if i not in self._legend_lines:
+            return
+        entry = self._legend_lines.index(i)
+        handle = legend.legend_handles[entry]
+        handle.set_color(line_properties.get('Color')[i])
+        handle.set_linestyle(line_properties.get('Line type')[i])
+        handle.set_linewidth(line_properties.get('Width')[i])
+        legend.get_texts()[entry].set_text(label)
+
+    def _animated(self):
+        """
+        :return: artists which are drawn over the background, in the order of drawing
+        """
+        artists = [plot[0] for plot in self._plots]
+        if self._collection is not None:
+            artists.append(self._collection)
+        if self.axes.get_legend() is not None:
+            artists.append(self.axes.get_legend())
+        return artists
+
+    def _on_draw(self, event):
+        """
+        Saving the background of the full redraw, then the lines and the legend are drawn over it
+        Saved figures have the animated artists drawn as the others.
+        """
+        if event.canvas.is_saving():
+            return
+        self._background = (self.canvas_tkagg.copy_from_bbox(self.figure.bbox), tuple(self.figure.bbox.size))
+        for artist in self._animated():
+            self.figure.draw_artist(artist)
+
+    def _blit(self):
+        """
+        Redrawing only the lines and the legend over the saved background, axes, ticks and labels are not drawn
+        """
+        if self._background is None or self._background[1] != tuple(self.figure.bbox.size):
+            # the window was resized, the background is saved by the next full redraw
+            self.canvas_tkagg.draw_idle()
+            return
+        self.canvas_tkagg.restore_region(self._background[0])
+        for artist in self._animated():
+            self.figure.draw_artist(artist)
+        self.canvas_tkagg.blit(self.figure.bbox)
+
+    def set_lines_data(self, full=False):
+        """
+        Setting points of the visible range to the existing lines
+        :param full: if True, lines get all the points, it is used for saving of the figure
+        :return: None
+        """
+        self._decimate_scheduled = False
+        if self._collection is not None:
+            self._collection.set_segments([self._segment(i, full) for i in range(len(self._lines))])
+        for i, plot in enumerate(self._plots):
+            plot[0].set_data(*self._line_data(i, full))
+        self.canvas_tkagg.draw_idle()
+
+    def _on_xlim_changed(self, axes):
+        self._view_range = axes.get_xlim()
+        if not self._decimate_scheduled:
+            self._decimate_scheduled = True
+            self.after_idle(self.set_lines_data)
+
+    def load_range(self, start, end):
+        """
+        Loading rows of the range of every source in background, lines get all the points of the range
+        :return: None
+        """
+        # range which covers all the rows gives nothing to the decimated lines
+        jobs = [(i, source['window']) for i, source in enumerate(self._sources)
+                if source['window'] is not None and source['monotonic'] and len(source['x'])
+                and (start > source['x'][0] or end < source['x'][-1])]
+        if not jobs:
+            return
+        threading.Thread(target=self._read_windows, args=(jobs, start, end), daemon=True).start()
+        self.after(self.window_poll_interval, self._apply_windows)
+
+    def _read_windows(self, jobs, start, end):
+        """
+        Reading of the ranges in the thread, they are applied in the Tk thread when all the sources are read
+        """
+        results = list()
+        for i, window in jobs:
+            try:
+                results.append((i, window(start, end), None))
+            except (OSError, ValueError, KeyError) as error:
+                results.append((i, None, error))
+        self._windows.put((start, end, results))
+
+    def _apply_windows(self):
+        if self._windows.empty():
+            self.after(self.window_poll_interval, self._apply_windows)
+            return
+        start, end, results = self._windows.get_nowait()
+        errors = list()
+        for i, data, error in results:
+            source = self._sources[i]
+            if error is not None:
+                errors.append(str(error))
+            elif len(data) <= self.window_rows:
+                # rows of the range with one more row on every side
+                source['range'] = {'start': start, 'end': end, 'x': data[source['x_column']].to_numpy(), 'data': data}
+        self.set_lines_data()
+        if errors:
+            messagebox.showerror(title='Error', message='Cannot load the range', detail='\n'.join(errors), parent=self)
+
+    def _on_click_decimate(self, *_):
+        self.set_lines_data()
+
+    def _on_click_legend(self, *_):
+        legend = self.toolbar_own.get_legend_value()
+        if legend:
+            self._legend()
+        else:
+            try:
+                self.axes.get_legend().remove()
+            except AttributeError:
+                pass
+        # the legend is animated, the background stays the same
+        self._blit()
+
+    def _on_click_follow(self, *_):
+        if self.toolbar_own.get_follow_value():
+            if self._watcher is None:
+                self._watcher = FileWatcher([self._source_path], self._on_source_changed, interval=self.watch_interval)
+                self._watcher.start()
+                self.after(self.follow_interval, self._apply_updates)
+        elif self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def _on_source_changed(self, _):
+        """
+        Reading of new data in the thread of the watcher, only appended rows of the loaded columns are parsed
+        The table and the summary are read meanwhile, parsing holds only the lock of the file.
+        """
+        try:
+            self._updates.put(self._source())
+        except (OSError, ValueError):
+            # file is being rewritten, it will be read on the next change
+            pass
+
+    def _apply_updates(self):
+        """
+        Applying the latest data to the existing lines, not more often than follow_interval
+        """
+        if self._watcher is None:
+            return
+        data = None
+        while not self._updates.empty():
+            data = self._updates.get_nowait()
+        if data is not None:
+            self.update_lines(data)
+        self.after(self.follow_interval, self._apply_updates)
+
+    def update_lines(self, data):
+        """
+        Setting new data to the lines without replotting
+        :param data: DataFrame with all the columns of the lines of the first source
+        :return: None
+        """
+        view_range = self._view_range
+        self._view_range = None
+        self._update_source(0, data)
+        if self._collection is not None:
+            self._collection.set_segments([self._segment(i) for i in range(len(self._lines))])
+        for i, plot in enumerate(self._plots):
+            plot[0].set_data(*self._line_data(i))
+        self._view_range = view_range
+        self.axes.relim()
+        if self._collection is not None:
+            # relim takes only lines into account
+            self.axes.update_datalim(self._collection.get_datalim(self.axes.transData).get_points())
+        self.axes.autoscale_view()
+        self._on_xlim_changed(self.axes)
+
+    def _on_close(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+        self.destroy()
+
+    @timed('GraphicWindow._on_replot_line')
+    def _on_replot_line(self):
+        errors = self.toolbar_own.get_errors_line()
+        if not errors:
+            # only properties of the artists are changed, points of the lines stay the same
+            index = self.toolbar_own.set_new_line_properties()
+            scales_changed = self._set_scales()
+            if self._collection is not None:
+                self._restyle_collection()
+            else:
+                self._restyle_line(index)
+            self._update_legend(index)
+            self.toolbar_own.renew_widgets()
+            if scales_changed:
+                self.canvas_tkagg.draw_idle()
+            else:
+                self._blit()
+        else:
+            message = 'Cannot replot line'
+            detail = (
+                'The following field have errors:'
+                '\n * {}'.format(
+                    '\n * '.join(errors.keys())
+                )
+            )
+            messagebox.showerror(
+                title='Error',
+                message=message,
+                detail=detail,
+                parent=self
+            )
+            return False
+
+    @timed('GraphicWindow._on_replot_graph')
+    def _on_replot_graph(self):
+        errors = self.toolbar_own.get_errors_graph()
+        if not errors:
+            graph_properties = self.toolbar_own.get_new_graph_properties()
+            name_x = graph_properties['X axis']
+            name_y = graph_properties['Y axis']
+            name_x = r'$\mathregular{' + name_x + '}$'
+            name_y = r'$\mathregular{' + name_y + '}$'
+
+            self.axes.set(ylabel=name_y or '', xlabel=name_x or '')
+            if graph_properties['X max'] > graph_properties['X min']:
+                self.axes.set_xlim(left=graph_properties['X min'], right=graph_properties['X max'])
+                self.load_range(graph_properties['X min'], graph_properties['X max'])
+            else:
+                self.axes.set_xlim(left=self.axes.get_xlim()[0], right=self.axes.get_xlim()[1])
+            if graph_properties['Y max'] > graph_properties['Y min']:
+                self.axes.set_ylim(bottom=graph_properties['Y min'], top=graph_properties['Y max'])
+            else:
+                self.axes.set_ylim(bottom=self.axes.get_ylim()[0], top=self.axes.get_ylim()[1])
+            self.axes.set_title(graph_properties['Graph title'])
+            self.canvas_tkagg.draw_idle()
+        else:
+            message = 'Cannot replot graph'
+            detail = (
+                'The following field have errors:'
+                '\n * {}'.format(
+                    '\n * '.join(errors.keys())
+                )
+            )
+            messagebox.showerror(
+                title='Error',
+                message=message,
+                detail=detail,
+                parent=self
+            )
+            return False
+
+    def _on_reset_line(self):
+        self.toolbar_own.reset_line_properties()
+
+    def _on_reset_graph(self):
+        self.toolbar_own.reset_graph_properties()
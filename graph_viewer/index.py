@@ -0,0 +1,213 @@
+import json
+import os
+import sqlite3
+from bisect import bisect_left, bisect_right
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from . import dia
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS directories (
+    root TEXT NOT NULL, path TEXT NOT NULL, mtime INTEGER NOT NULL, subdirectories TEXT NOT NULL,
+    PRIMARY KEY (root, path));
+CREATE TABLE IF NOT EXISTS files (
+    root TEXT NOT NULL, path TEXT NOT NULL, directory TEXT NOT NULL, task TEXT NOT NULL, transducer TEXT NOT NULL,
+    columns TEXT, size INTEGER NOT NULL, mtime INTEGER NOT NULL,
+    PRIMARY KEY (root, path));
+CREATE INDEX IF NOT EXISTS files_directory ON files (root, directory);
+'''
+
+
+def split_name(relative, root_name):
+    """
+    Getting task and transducer from the path of the file relative to the root directory
+    Name of the file is task#transducer.dia, task of nested files is prefixed with their directory.
+    Files without # are transducers of the task named after their directory.
+    Compressed files task#transducer.dia.gz, .dia.xz and .dia.zst are named the same way.
+    :return: task and transducer
+    """
+    path = PurePosixPath(relative)
+    directory = path.parent.as_posix()
+    stem = dia.strip_suffix(path.name)
+    if '#' in stem:
+        task, transducer = stem.split('#', 1)
+        return (task if directory == '.' else f'{directory}/{task}'), transducer
+    return (root_name if directory == '.' else directory), stem
+
+
+class TaskIndex:
+    """
+    Persistent index of the .dia files of result directories
+    Directories are scanned recursively with os.scandir, every level of the tree is scanned by several threads,
+    so network mounts are not waited for one directory at a time.
+    Files of every directory are saved in SQLite with their column headers. On the next scan only directories
+    with changed modification time are listed again, files of the other ones are taken from the index.
+    """
+
+    def __init__(self, database=None, workers=8):
+        """
+        :param database: path of the SQLite file, ':memory:' for the index which is not saved
+        """
+        self.database = str(database or Path.home() / '.graph_viewer' / 'index.sqlite')
+        if self.database != ':memory:':
+            Path(self.database).parent.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+
+    def scan(self, root, progress=None):
+        """
+        Updating the index of the directory tree
+        :param progress: callable which takes scanned directories, found directories and files, it is called
+        after every directory
+        :return: list of dicts with path relative to the root, task, transducer and columns of every file
+        """
+        root = os.path.abspath(root)
+        root_name = os.path.basename(root)
+        with closing(self._connect()) as db, db:
+            known = {path: (mtime, json.loads(subdirectories), dict()) for path, mtime, subdirectories in db.execute(
+                'SELECT path, mtime, subdirectories FROM directories WHERE root = ?', (root,))}
+            for path, directory, size, mtime, columns in db.execute(
+                    'SELECT path, directory, size, mtime, columns FROM files WHERE root = ?', (root,)):
+                known.setdefault(directory, (None, [], dict()))[2][path] = (size, mtime, columns)
+            frontier = ['.']
+            seen = set()
+            found = 1
+            files_found = 0
+            executor = ThreadPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+            try:
+                while frontier:
+                    jobs = [(root, directory, known.get(directory), root_name) for directory in frontier]
+                    results = executor.map(self._scan_directory, jobs) if executor else map(self._scan_directory, jobs)
+                    frontier = list()
+                    for directory, mtime, subdirectories, files in results:
+                        if mtime is not None:
+                            seen.add(directory)
+                            frontier.extend(subdirectories)
+                            found += len(subdirectories)
+                            if files is not None:
+                                self._save_directory(db, root, directory, mtime, subdirectories, files)
+                            files_found += len(files if files is not None else known[directory][2])
+                        if progress is not None:
+                            progress(len(seen), found, files_found)
+            finally:
+                if executor is not None:
+                    executor.shutdown(cancel_futures=True)
+            for directory in set(known) - seen:
+                db.execute('DELETE FROM directories WHERE root = ? AND path = ?', (root, directory))
+                db.execute('DELETE FROM files WHERE root = ? AND directory = ?', (root, directory))
+            rows = db.execute('SELECT path, task, transducer, columns FROM files WHERE root = ? ORDER BY path',
+                              (root,)).fetchall()
+        return [{'path': path, 'task': task, 'transducer': transducer,
+                 'columns': json.loads(columns) if columns is not None else None}
+                for path, task, transducer, columns in rows]
+
+    def clear(self):
+        with closing(self._connect()) as db, db:
+            db.execute('DELETE FROM directories')
+            db.execute('DELETE FROM files')
+
+    def _connect(self):
+        db = sqlite3.connect(self.database)
+        db.executescript(SCHEMA)
+        return db
+
+    def _scan_directory(self, job):
+        """
+        Listing of one directory, it runs in the thread of the pool
+        :param job: root, directory relative to the root, its mtime, subdirectories and files from the index
+        or None, name of the root
+        :return: directory, its mtime, subdirectories and files, files are None if the directory was not changed;
+        mtime is None if the directory cannot be read
+        """
+        root, directory, known, root_name = job
+        path = os.path.join(root, directory)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return directory, None, [], None
+        if known is not None and known[0] == mtime:
+            return directory, mtime, known[1], None
+        known_files = known[2] if known is not None else dict()
+        subdirectories, files = list(), list()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    relative = entry.name if directory == '.' else f'{directory}/{entry.name}'
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirectories.append(relative)
+                        elif dia.is_dia(entry.name) and entry.is_file():
+                            stat = entry.stat()
+                            size, file_mtime, columns = known_files.get(relative, (None, None, None))
+                            if (size, file_mtime) != (stat.st_size, stat.st_mtime_ns) or columns is None:
+                                columns = self._read_columns(entry.path)
+                            files.append((relative, *split_name(relative, root_name), columns,
+                                          stat.st_size, stat.st_mtime_ns))
+                    except OSError:
+                        continue
+        except OSError:
+            return directory, None, [], None
+        return directory, mtime, sorted(subdirectories), files
+
+    @staticmethod
+    def _read_columns(filename):
+        try:
+            return json.dumps(dia.read_columns(filename))
+        except (OSError, ValueError):
+            # file is empty or is being written, its columns are read when it is opened
+            return None
+
+    @staticmethod
+    def _save_directory(db, root, directory, mtime, subdirectories, files):
+        db.execute('DELETE FROM files WHERE root = ? AND directory = ?', (root, directory))
+        db.executemany('INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                       [(root, path, directory, task, transducer, columns, size, file_mtime)
+                        for path, task, transducer, columns, size, file_mtime in files])
+        db.execute('INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?)',
+                   (root, directory, mtime, json.dumps(subdirectories)))
+
+
+class ChannelSearch:
+    """
+    Search of the columns of all the indexed files
+    Names are kept sorted in lower case, so prefix matches are found by binary search
+    and substring matches by str.find over all the names joined by new lines.
+    Both take milliseconds for hundreds of thousands of columns.
+    """
+
+    def __init__(self, records):
+        """
+        :param records: files as returned by TaskIndex.scan, files with unknown columns are skipped
+        """
+        self._entries = sorted((column.lower(), column, record['task'], record['transducer'], record['path'])
+                               for record in records for column in record['columns'] or [])
+        self._keys = [entry[0] for entry in self._entries]
+        self._text = '\n'.join(self._keys)
+        # position of every name in the text
+        self._offsets = list()
+        position = 0
+        for key in self._keys:
+            self._offsets.append(position)
+            position += len(key) + 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def search(self, query, limit=200):
+        """
+        Finding columns by prefix or substring, case insensitive
+        :return: list of dicts with column, task, transducer and path of the file, prefix matches go first
+        """
+        query = query.strip().lower()
+        if not query:
+            return list()
+        start = bisect_left(self._keys, query)
+        stop = bisect_left(self._keys, query + chr(0x10ffff), lo=start)
+        hits = list(range(start, min(stop, start + limit)))
+        position = self._text.find(query)
+        while len(hits) < limit and position >= 0:
+            i = bisect_right(self._offsets, position) - 1
+            if not start <= i < stop:
+                hits.append(i)
+            position = self._text.find(query, self._offsets[i + 1]) if i + 1 < len(self._offsets) else -1
+        return [dict(zip(('column', 'task', 'transducer', 'path'), self._entries[i][1:])) for i in hits]
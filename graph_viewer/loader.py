@@ -0,0 +1,95 @@
+import importlib
+import queue
+import threading
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+class Loader:
+    """
+    Runs loading of data in the background thread
+    Loading function gets progress callback, progress, result and error of the job are put into the queue,
+    which is polled by the Tk thread with after().
+    Starting of a new job supersedes the previous one: it is cancelled and its messages are dropped.
+    """
+
+    def __init__(self):
+        self._messages = queue.Queue()
+        self._job = 0
+        self._cancel_event = threading.Event()
+        self.busy = False
+
+    def start(self, function, *args, **kwargs):
+        """
+        Starting function(*args, progress=callback, **kwargs) in the background thread
+        :return: None
+        """
+        self.cancel()
+        self._job += 1
+        self._cancel_event = threading.Event()
+        self.busy = True
+        job = self._job
+        cancel_event = self._cancel_event
+
+        def progress(parsed_bytes, total_bytes, rows):
+            if cancel_event.is_set():
+                raise LoadCancelled
+            self._messages.put((job, 'progress', (parsed_bytes, total_bytes, rows)))
+
+        def run():
+            try:
+                result = function(*args, progress=progress, **kwargs)
+            except LoadCancelled:
+                self._messages.put((job, 'cancelled', None))
+            except Exception as error:
+                self._messages.put((job, 'error', error))
+            else:
+                if cancel_event.is_set():
+                    self._messages.put((job, 'cancelled', None))
+                else:
+                    self._messages.put((job, 'done', result))
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def poll(self):
+        """
+        Taking messages of the current job, it must be called from the Tk thread
+        :return: list of (kind, value), kind is 'progress', 'done', 'cancelled' or 'error'
+        """
+        messages = list()
+        while True:
+            try:
+                job, kind, value = self._messages.get_nowait()
+            except queue.Empty:
+                break
+            if job != self._job:
+                continue
+            messages.append((kind, value))
+            if kind != 'progress':
+                self.busy = False
+        return messages
+
+
+def import_in_background(*names, package=None):
+    """
+    Importing modules in the daemon thread, so they are ready when they are needed
+    Import of the same module in the Tk thread waits until it is finished here. If import fails,
+    the error is raised again where the module is imported.
+    :return: the thread
+    """
+
+    def run():
+        for name in names:
+            try:
+                importlib.import_module(name, package)
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
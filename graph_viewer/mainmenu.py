@@ -17,10 +17,21 @@ class MainMenu(tk.Menu):
              'Arial',
              'Calibri']
 
+    budgets = {'No limit': None, '1 GB': 2 ** 30, '2 GB': 2 * 2 ** 30, '4 GB': 4 * 2 ** 30, '8 GB': 8 * 2 ** 30}
+
+    # files which are preloaded at once, network drives are read faster by fewer processes
+    preload_workers = {'All cores': None, '4 files': 4, '2 files': 2, '1 file (network drive)': 1}
+
     def __init__(self, parent, **kwargs):
         super().__init__(parent, **kwargs)
         self.font_var = tk.StringVar()
+        self.budget_var = tk.StringVar(value='No limit')
+        self.compact_var = tk.BooleanVar(value=False)
+        self.auto_preload_var = tk.BooleanVar(value=False)
+        self.preload_workers_var = tk.StringVar(value='All cores')
         help_menu = tk.Menu(self, tearoff=False)
+        help_menu.add_command(label='Memory usage...', command=self._event('<<ShowMemoryUsage>>'))
+        help_menu.add_command(label='Performance...', command=self._event('<<ShowPerformance>>'))
         help_menu.add_command(label='About...', command=self.show_about)
         settings_menu = tk.Menu(self, tearoff=False)
         font_menu = tk.Menu(settings_menu, tearoff=False)
@@ -31,6 +42,19 @@ class MainMenu(tk.Menu):
             else:
                 font_menu.add_radiobutton(label=font, value=font, variable=self.font_var)
         self.font_var.trace_add('write', self._event('<<SelectGraphFont>>'))
+        budget_menu = tk.Menu(settings_menu, tearoff=False)
+        settings_menu.add_cascade(label='Memory budget', menu=budget_menu)
+        for budget in self.budgets:
+            budget_menu.add_radiobutton(label=budget, value=budget, variable=self.budget_var)
+        self.budget_var.trace_add('write', self._event('<<SelectMemoryBudget>>'))
+        settings_menu.add_checkbutton(label='Compact data (float32)', variable=self.compact_var)
+        self.compact_var.trace_add('write', self._event('<<SelectCompactData>>'))
+        settings_menu.add_checkbutton(label='Preload opened tasks', variable=self.auto_preload_var)
+        self.auto_preload_var.trace_add('write', self._event('<<SelectAutoPreload>>'))
+        preload_menu = tk.Menu(settings_menu, tearoff=False)
+        settings_menu.add_cascade(label='Preload at once', menu=preload_menu)
+        for workers in self.preload_workers:
+            preload_menu.add_radiobutton(label=workers, value=workers, variable=self.preload_workers_var)
         file_menu = tk.Menu(self, tearoff=False)
         file_menu.add_command(
             label='Select directory...',
@@ -45,6 +69,18 @@ class MainMenu(tk.Menu):
         self.add_cascade(label='Settings', menu=settings_menu)
         self.add_cascade(label='Help', menu=help_menu)
 
+    def get_budget(self):
+        """
+        :return: memory budget in bytes or None
+        """
+        return self.budgets.get(self.budget_var.get())
+
+    def get_preload_workers(self):
+        """
+        :return: number of files which are preloaded at once or None for number of cores
+        """
+        return self.preload_workers.get(self.preload_workers_var.get())
+
     def show_about(self):
         about_message = 'Graph Viewer'
         about_detail = (
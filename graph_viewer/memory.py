@@ -0,0 +1,108 @@
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+
+# Precision of compact float32 columns, relative to the value
+COMPACT_TOLERANCE = 1e-6
+
+
+def array_bytes(values):
+    """
+    Memory mapped columns of the cache are counted by their size as parsed ones, their pages are read
+    into memory when the columns are shown or plotted and they are kept until the file is released
+    :return: bytes of the array
+    """
+    return values.nbytes
+
+
+def frame_bytes(frames):
+    """
+    Counting memory of the columns of the frames, columns which share the same buffer are counted once
+    :param frames: iterable of DataFrames or dicts with Series
+    :return: number of bytes
+    """
+    buffers = dict()
+    for frame in frames:
+        for name in frame.keys():
+            values = np.asarray(frame[name])
+            buffers[values.__array_interface__['data'][0]] = array_bytes(values)
+    return sum(buffers.values())
+
+
+def compact(data, tolerance=COMPACT_TOLERANCE, keep=('Time',)):
+    """
+    Storing float64 columns as float32 where relative error of every value is within the tolerance
+    :param keep: columns which are never downcasted
+    :return: DataFrame with downcasted columns, other columns are the same
+    """
+    columns = dict()
+    for name in data.columns:
+        values = data[name].to_numpy()
+        if name not in keep and values.dtype == np.float64 and len(values):
+            with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+                small = values.astype(np.float32)
+                error = np.abs(small - values) / np.abs(values)
+            # zeros are exact, infinities and nans stay the same
+            if np.all((error <= tolerance) | (values == 0) | ~np.isfinite(values)):
+                values = small
+        columns[name] = values
+    return pd.DataFrame(columns, columns=data.columns, index=data.index, copy=False)
+
+
+class MemoryAccountant:
+    """
+    Accounting of memory held by parsed files and graph windows
+    Owners report their usage by memory_usage(), which returns dict with bytes of every item.
+    Files are owned by GraphData, it releases least recently used files when the budget is exceeded.
+    Windows only reference columns of the files, so memory of the released file is freed when its windows are closed.
+    """
+
+    def __init__(self, budget=None):
+        """
+        :param budget: bytes which parsed files can take, None for no limit
+        """
+        self.budget = budget
+        self._owners = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def track(self, owner, label):
+        """
+        Adding the owner of memory, it is forgotten when it is deleted
+        :return: None
+        """
+        with self._lock:
+            self._owners[label] = owner
+
+    def report(self):
+        """
+        :return: dict with bytes of every item of every owner
+        """
+        with self._lock:
+            owners = list(self._owners.items())
+        return {label: owner.memory_usage() for label, owner in owners}
+
+    def files_bytes(self):
+        """
+        :return: bytes of all the files, windows are not counted
+        """
+        with self._lock:
+            owners = list(self._owners.values())
+        return sum(sum(owner.memory_usage().values()) for owner in owners if hasattr(owner, 'release'))
+
+    def check(self):
+        """
+        Releasing least recently used files while the budget is exceeded
+        :return: number of released bytes
+        """
+        if self.budget is None:
+            return 0
+        excess = self.files_bytes() - self.budget
+        released = 0
+        with self._lock:
+            owners = [owner for owner in self._owners.values() if hasattr(owner, 'release')]
+        for owner in owners:
+            if released >= excess:
+                break
+            released += owner.release(excess - released)
+        return released
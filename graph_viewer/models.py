@@ -1,42 +1,747 @@
 import os
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from fnmatch import fnmatch
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from . import dia
+from .cache import ColumnCache
+from .index import TaskIndex, ChannelSearch
+from .pyramid import Pyramid
+from .stats import ColumnStats, numeric_columns
+from .decimate import is_monotonic, visible_slice
+from .expressions import Expression
+from .profiling import timed
+from .memory import MemoryAccountant, COMPACT_TOLERANCE, compact, frame_bytes
 
 
 class GraphData:
-    def __init__(self, path):
+    def __init__(self, path, cache=None, index=None, accountant=None, compact=False, tolerance=COMPACT_TOLERANCE,
+                 channels=None):
+        """
+        :param accountant: MemoryAccountant, which releases parsed files when its budget is exceeded
+        :param compact: if True, parsed columns are stored as float32 where the relative error is within tolerance
+        :param channels: dict with expression of every derived channel
+        """
         self.path = Path(path)
+        self.cache = cache
+        self.accountant = accountant
+        self.compact = compact
+        self.tolerance = tolerance
+        # processes which parse one big file, by default number of cores
+        self.workers = None
+        # time of the last use of every parsed file, least recently used files are released first
+        self._used = dict()
+        # without the persistent index the directory is scanned from scratch
+        self.index = index or TaskIndex(':memory:')
+        # sparse indexes of the rows of the files, which are read by time ranges
+        self._row_indexes = dict()
+        # file of every (task, transducer) and columns of all the files found by the last scan
+        self._task_files = dict()
+        self._channels = ChannelSearch([])
+        # state of every file with loaded columns: parsed or memory mapped columns, all the columns of the file,
+        # offset, fingerprint and signature of the complete lines, end of the parsed part and number of rows
+        # after the offset, summaries and statistics of the columns
+        self._files = dict()
+        # lock of every file, it is held while the file is parsed, so the states can be read meanwhile
+        self._file_locks = dict()
+        # expressions of the derived channels and their values for every file with number of rows they were taken of
+        self._derived = dict()
+        self._derived_values = dict()
+        # files can be renewed from the thread of the file watcher
+        self._lock = threading.RLock()
         dir_readable = os.access(self.path, os.R_OK)
         if not dir_readable:
             msg = f'Permission denied accessing the directory {self.path}'
             raise PermissionError(msg)
+        for name, text in (channels or {}).items():
+            self.define_channel(name, text)
 
-    def get_graph_data(self, filename):
-        filename = os.path.join(self.path, filename)
+    def define_channel(self, name, text):
+        """
+        Defining derived channel, it is shown as a column of every file which has all the columns of the expression
+        Expression can use other derived channels
+        :param text: expression, see graph_viewer.expressions
+        :raise ValueError: if the expression is invalid or the channels depend on each other in a cycle
+        """
+        name = name.strip()
+        if not name or len(name.split()) != 1:
+            raise ValueError(f'Name of the channel {name!r} must be one word')
+        expression = Expression(text)
+        used = list(expression.columns)
+        while used:
+            column = used.pop()
+            if column == name:
+                raise ValueError(f'Channel {name} depends on itself')
+            if column in self._derived:
+                used.extend(self._derived[column].columns)
+        with self._lock:
+            self._derived[name] = expression
+            # values of the channels which use this one are stale too
+            self._derived_values.clear()
+
+    def remove_channel(self, name):
+        with self._lock:
+            self._derived.pop(name, None)
+            self._derived_values.clear()
+
+    def get_channels(self):
+        """
+        :return: dict with expression of every derived channel
+        """
+        return {name: expression.text for name, expression in self._derived.items()}
+
+    @timed('GraphData.get_graph_data')
+    def get_graph_data(self, filename, progress=None, columns=None):
+        """
+        Getting data of the file
+        Columns are parsed only once, if the file was appended since then, only new rows are parsed
+        :param progress: callable which takes parsed bytes, total bytes and parsed rows,
+        it can raise an exception to cancel loading
+        :param columns: names of the columns and derived channels, by default all the columns of the file
+        :return: DataFrame with all the complete rows of the file
+        """
+        path = os.path.join(self.path, filename)
         file_exist = os.access(self.path, os.R_OK)
         if not file_exist:
-            msg = f'Permission denied accessing the file {filename}'
+            msg = f'Permission denied accessing the file {path}'
             raise PermissionError(msg)
-        data = pd.read_csv(filename, sep='\s+', skiprows=1, encoding='utf-8')
-        return data
+        return self.get_columns(filename, dia.read_columns(path) if columns is None else columns, progress)
 
-    def get_task_list(self):
-        tasks = dict()
-        list_of_files = os.listdir(self.path)
-        pattern = '*.dia'
-        for entry in list_of_files:
-            if fnmatch(entry, pattern):
-                index_start = entry.index('#')
-                index_end = entry.index('.dia')
-                task_to_add = entry[:index_start]
-                if task_to_add not in tasks:
-                    tasks[task_to_add] = [entry[index_start + 1:index_end]]
+    def refresh(self, filename, progress=None):
+        """
+        Parsing rows appended to the file since the last reading, only the loaded columns are parsed
+        If the file was rewritten, the loaded columns are parsed again from the start
+        :return: DataFrame with new rows of the loaded columns
+        """
+        path = os.path.join(self.path, filename)
+        with self._lock:
+            state = self._files.get(path)
+        rows = 0 if state is None else len(state['data']) - state['pending']
+        with self._file_lock(path):
+            state = self._update(path, progress)
+            self._publish(path, state)
+        data = state['data']
+        return data.iloc[rows:] if len(data) >= rows else data
+
+    def get_header(self, filename):
+        """
+        :return: names of all the columns of the file and the derived channels which can be computed from them,
+        only the header is read
+        """
+        columns = dia.read_columns(os.path.join(self.path, filename))
+        header = set(columns)
+        for name in self._derived:
+            if name not in header:
+                plain, _ = self._resolve(None, [name], header)
+                if all(column in header for column in plain):
+                    columns.append(name)
+        return columns
+
+    def _resolve(self, path, columns, header=None):
+        """
+        Splitting columns into columns of the file and derived channels, columns of the file take precedence
+        :param header: names of the columns of the file, by default the header of the file is read
+        :return: columns of the file which are needed, including the ones used by the derived channels,
+        and derived channels in order of evaluation
+        """
+        if not any(name in self._derived for name in columns):
+            return columns, []
+        header = set(dia.read_columns(path)) if header is None else header
+        plain, derived = list(), list()
+
+        def visit(name):
+            if name in header or name not in self._derived:
+                if name not in plain:
+                    plain.append(name)
+            elif name not in derived:
+                for column in self._derived[name].columns:
+                    visit(column)
+                derived.append(name)
+
+        for name in columns:
+            visit(name)
+        return plain, derived
+
+    def _derive(self, path, data, plain, derived, columns, compute=True):
+        """
+        Adding derived channels to the columns of the file, values are kept until the file is appended
+        :param compute: if False, only the kept values are used
+        :return: DataFrame with the columns or None if values of some channels are not kept
+        """
+        if not derived:
+            return data[columns]
+        values = {name: data[name].to_numpy() for name in plain}
+        rows = len(data)
+        with self._lock:
+            kept = self._derived_values.setdefault(path, dict())
+        for name in derived:
+            saved = kept.get(name)
+            if saved is None or saved[0] != rows:
+                if not compute:
+                    return None
+                saved = (rows, self._derived[name].evaluate(values))
+                with self._lock:
+                    kept[name] = saved
+            values[name] = saved[1]
+        return pd.DataFrame({name: values[name] for name in columns}, copy=False)
+
+    def get_preview(self, filename, count=20, progress=None):
+        """
+        Getting names of all the columns and data of the first ones, which are shown when the file is selected
+        :return: list of names and DataFrame with the first count columns
+        """
+        columns = self.get_header(filename)
+        return columns, self.get_columns(filename, columns[:count], progress)
+
+    @timed('GraphData.get_columns')
+    def get_columns(self, filename, columns, progress=None):
+        """
+        Getting only some columns of the file
+        Columns loaded before or kept in the cache are taken without parsing, only missing columns are parsed
+        and only the loaded columns of the appended rows. Memory and time scale with the number of used columns.
+        :param columns: names of the columns and derived channels
+        :return: DataFrame with the columns in the given order
+        """
+        columns = list(dict.fromkeys(columns))
+        path = os.path.join(self.path, filename)
+        plain, derived = self._resolve(path, columns)
+        return self._derive(path, self._get_file_columns(filename, plain, progress), plain, derived, columns)
+
+    def _get_file_columns(self, filename, columns, progress=None):
+        return self._load(os.path.join(self.path, filename), columns, progress)['data'][columns]
+
+    def peek_columns(self, filename, columns):
+        """
+        Getting columns of the file only if they need no parsing, it is fast enough for the Tk thread
+        Derived channels are returned only if they are already computed
+        :return: DataFrame with the columns or None
+        """
+        columns = list(dict.fromkeys(columns))
+        path = os.path.join(self.path, filename)
+        with self._lock:
+            state = self._files.get(path)
+        if state is None:
+            return None
+        plain, derived = self._resolve(path, columns, set(state['header']))
+        data = self._peek_file_columns(filename, plain)
+        return None if data is None else self._derive(path, data, plain, derived, columns, compute=False)
+
+    def _peek_file_columns(self, filename, columns):
+        path = os.path.join(self.path, filename)
+        with self._lock:
+            state = self._files.get(path)
+            if state is not None and all(name in state['data'] for name in columns):
+                self._used[path] = time.monotonic()
+                return state['data'][columns]
+        # the file and the cache are not touched, cached columns are mapped once when the file is loaded
+        return None
+
+    def get_summary(self, filename):
+        """
+        Getting summary statistics of the loaded columns, they are kept with the columns, so nothing is read
+        :return: dict with count, min, max, mean, last value and Time of min and max of every column,
+        it is empty if no columns of the file are loaded
+        """
+        path = os.path.join(self.path, filename)
+        with self._lock:
+            state = self._files.get(path)
+        if state is None or state['stats'] is None:
+            return dict()
+        stats = state['stats']
+        if state['pending']:
+            # the pending row is added to the copy, it is reduced again when the line is changed
+            data = state['data']
+            stats = ColumnStats(stats.columns, rows=stats.rows, fields=stats.fields)
+            stats.extend(data, data['Time'].to_numpy() if 'Time' in data else None)
+        return stats.summary()
+
+    def get_range(self, filename, columns, t_start, t_end, progress=None):
+        """
+        Getting rows of the file with Time between t_start and t_end and one more row on every side
+        Loaded columns are cut by binary search of Time. Otherwise the rows are found by the sparse index
+        of the rows, which is saved in the cache, and only bytes of the range are parsed.
+        If Time is not monotonic, the columns are loaded as a whole and the rows are chosen by mask.
+        :param columns: names of the columns, Time is always added
+        :return: DataFrame with Time and the columns
+        """
+        columns = list(dict.fromkeys(['Time'] + list(columns)))
+        data = self.peek_columns(filename, columns)
+        if data is None:
+            path = os.path.join(self.path, filename)
+            # derived channels are computed over all the rows, so moving averages and integrals are the same
+            index = self._row_index(path) if not self._resolve(path, columns)[1] else None
+            if index is not None and is_monotonic(index['times']):
+                offsets, times = index['offsets'], index['times']
+                first = max(int(np.searchsorted(times, t_start, side='left')) - 1, 0)
+                last = int(np.searchsorted(times, t_end, side='right')) + 1
+                byte_range = (int(offsets[first]), int(offsets[last]) if last < len(offsets) else index['offset'])
+                data = dia.read_range(path, byte_range, dia.read_columns(path), progress=progress, usecols=columns)
+                data = self._compact(data[columns])
+            else:
+                data = self.get_columns(filename, columns, progress)
+        time = data['Time'].to_numpy()
+        if is_monotonic(time):
+            return data.iloc[visible_slice(time, (t_start, t_end))]
+        return data[(time >= t_start) & (time <= t_end)]
+
+    def _row_index(self, path):
+        """
+        Getting sparse index of the rows of the file, it is extended when the file is appended
+        :return: dict with offsets and Time of every ROW_INDEX_STEP-th row, offset of the end of the indexed rows,
+        its fingerprint and signature of the file or None if the file has no Time or it is compressed
+        """
+        if dia.is_compressed(path):
+            return None
+        current = dia.signature(path)
+        with self._lock:
+            index = self._row_indexes.get(path)
+        if index is None and self.cache is not None:
+            saved = self.cache.get_arrays(path, 'rows')
+            if saved is not None:
+                params, arrays = saved
+                index = dict(params, offsets=np.array(arrays['offsets']), times=np.array(arrays['times']))
+        if index is not None and index['signature'] == current:
+            return index
+        columns = dia.read_columns(path)
+        if 'Time' not in columns:
+            return None
+        stop = dia.complete_size(path)
+        if index is not None and self._is_appended(path, index, current) and len(index['offsets']):
+            # only appended rows are indexed, the last indexed row is the first one of the new part
+            offsets, times = dia.index_rows(path, int(index['offsets'][-1]), stop, columns.index('Time'))
+            offsets = np.concatenate([index['offsets'][:-1], offsets])
+            times = np.concatenate([index['times'][:-1], times])
+        else:
+            offsets, times = dia.index_rows(path, dia.body_offset(path), stop, columns.index('Time'))
+        index = {'offsets': offsets, 'times': times, 'offset': stop, 'fingerprint': dia.fingerprint(path, stop),
+                 'signature': current}
+        with self._lock:
+            self._row_indexes[path] = index
+        if self.cache is not None:
+            self.cache.put_arrays(path, 'rows', {'offsets': offsets, 'times': times}, create=True, offset=stop,
+                                  fingerprint=index['fingerprint'], signature=current)
+        return index
+
+    def load_columns(self, requests, progress=None, workers=None):
+        """
+        Getting columns of several files in parallel
+        :param requests: dict with list of columns of every file
+        :param progress: callable which takes loaded bytes, total bytes and loaded rows, it is called for every file
+        :return: dict with DataFrame of every file
+        """
+        sizes = {filename: os.path.getsize(os.path.join(self.path, filename)) for filename in requests}
+        total = sum(sizes.values())
+        workers = workers or min(len(requests), os.cpu_count() or 1) or 1
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {executor.submit(self.get_columns, filename, columns): filename
+                       for filename, columns in requests.items()}
+            frames = dict()
+            loaded = rows = 0
+            for future in as_completed(futures):
+                filename = futures[future]
+                frames[filename] = future.result()
+                loaded += sizes[filename]
+                rows += len(frames[filename])
+                if progress is not None:
+                    progress(loaded, total, rows)
+            return frames
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def preload(self, filenames, progress=None, workers=None):
+        """
+        Parsing files into the cache in the process pool, later they are opened from the cache without parsing
+        Files which have all the columns in the valid cache entry are skipped. Every process keeps parsed data
+        of one file until it is written into the cache, so number of processes is limited by the memory budget.
+        Files which are already used are restored from their new cache entries.
+        :param filenames: names of the files relative to the directory
+        :param progress: callable which takes preloaded bytes, total bytes and number of preloaded files
+        :param workers: number of files which are parsed at once, fewer files are read faster from network drives
+        :return: dict with error message of every file which was not preloaded
+        """
+        if self.cache is None:
+            return dict()
+        paths = [os.path.join(self.path, filename) for filename in filenames]
+        paths = [path for path in paths if not self._is_cached(path)]
+        if not paths:
+            return dict()
+        sizes = {path: os.path.getsize(path) for path in paths}
+        workers = workers or os.cpu_count() or 1
+        if self.accountant is not None and self.accountant.budget is not None:
+            free = max(self.accountant.budget - self.accountant.files_bytes(), 0)
+            # parsed data takes about as much memory as the text of the file
+            workers = min(workers, max(free // max(max(sizes.values()), 1), 1))
+        jobs = [(str(self.path), path, str(self.cache.directory), self.compact, self.tolerance) for path in paths]
+        total = sum(sizes.values())
+        loaded = files = 0
+        errors = dict()
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(jobs)))
+        try:
+            futures = {executor.submit(_preload_file, job): job[1] for job in jobs}
+            for future in as_completed(futures):
+                path = futures[future]
+                error = future.result()
+                if error is not None:
+                    errors[os.path.relpath(path, self.path)] = error
                 else:
-                    tasks[task_to_add].append(entry[index_start + 1:index_end])
+                    self._reload(path)
+                loaded += sizes[path]
+                files += 1
+                if progress is not None:
+                    progress(loaded, total, files)
+            return errors
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _is_cached(self, path):
+        """
+        :return: True if all the columns of the file are in the valid cache entry
+        """
+        meta = self.cache.read_meta(path, validate=False) if self.cache is not None else None
+        return (meta is not None and 'offset' in meta and meta['signature'] == dia.signature(path)
+                and all(name in meta.get('columns', []) for name in dia.read_columns(path)))
+
+    def _reload(self, path):
+        """
+        Replacing the state of the file in use by the state restored from the cache entry, which another process
+        has written, so columns of the entry are not parsed again. The state is kept if the entry lacks its columns.
+        """
+        with self._file_lock(path):
+            with self._lock:
+                state = self._files.get(path)
+            if state is None:
+                return
+            restored = self._restore(path)
+            if restored is None or not all(name in restored['data'] for name in state['data'].columns):
+                return
+            with self._lock:
+                self._derived_values.pop(path, None)
+            self._publish(path, restored)
+
+    def memory_usage(self):
+        """
+        :return: dict with bytes of parsed and memory mapped columns of every file
+        """
+        with self._lock:
+            usage = dict()
+            for path, state in self._files.items():
+                usage[os.path.relpath(path, self.path)] = frame_bytes([state['data']])
+            for path, kept in self._derived_values.items():
+                name = os.path.relpath(path, self.path)
+                usage[name] = usage.get(name, 0) + sum(values.nbytes for _, values in kept.values())
+            return usage
+
+    def release(self, size):
+        """
+        Forgetting parsed data of least recently used files, the last used file is kept
+        :param size: bytes to release
+        :return: number of released bytes
+        """
+        with self._lock:
+            paths = sorted(self._files, key=lambda path: self._used.get(path, 0))
+            released = 0
+            for path in paths[:-1]:
+                if released >= size:
+                    break
+                state = self._files.pop(path)
+                released += frame_bytes([state['data']])
+                kept = self._derived_values.pop(path, dict())
+                released += sum(values.nbytes for _, values in kept.values())
+                self._used.pop(path, None)
+            return released
+
+    def _compact(self, data):
+        return compact(data, self.tolerance) if self.compact else data
+
+    def get_pyramid(self, filename):
+        """
+        :return: summaries of the loaded columns of the file, they are restored from the cache with the columns,
+        or None if no columns are loaded
+        """
+        filename = os.path.join(self.path, filename)
+        with self._lock:
+            state = self._files.get(filename)
+            return None if state is None else state['pyramid']
+
+    def _file_lock(self, path):
+        """
+        :return: lock of the file, the file is parsed only by one thread at a time
+        """
+        with self._lock:
+            return self._file_locks.setdefault(path, threading.Lock())
+
+    def _publish(self, path, state):
+        """
+        Replacing the state of the file, states are never changed after that, so readers need no lock of the file
+        """
+        with self._lock:
+            self._files[path] = state
+            self._used[path] = time.monotonic()
+
+    def _load(self, path, columns, progress=None):
+        """
+        Bringing the state of the file up to date and parsing the columns which are not loaded yet
+        Only the lock of the file is held while it is parsed, so the states of the files can be read meanwhile
+        :param columns: names of the columns of the file
+        :return: state of the file
+        """
+        with self._file_lock(path):
+            state = self._update(path, progress)
+            missing = [name for name in columns if name not in state['data']]
+            if missing:
+                state = self._add_columns(path, state, missing, progress)
+            self._publish(path, state)
+        if self.accountant is not None:
+            self.accountant.check()
+        return state
+
+    def _update(self, path, progress=None):
+        """
+        Taking the state of the file, when the file is used first the state is restored from the cache
+        Rows appended since then are parsed only for the loaded columns. If the file was rewritten,
+        the loaded columns are parsed again.
+        :return: state of the file
+        """
+        current = dia.signature(path)
+        with self._lock:
+            state = self._files.get(path)
+        if state is None:
+            state = self._restore(path) or self._new_state(path, current)
+        if state['signature'] == current:
+            return state
+        if self._is_appended(path, state, current):
+            return self._append(path, state, current, progress)
+        columns = state['data'].columns.tolist()
+        state = self._new_state(path, current)
+        columns = [name for name in columns if name in state['header']]
+        return self._add_columns(path, state, columns, progress) if columns else state
+
+    def _new_state(self, path, current):
+        """
+        :param current: signature of the file
+        :return: state of the file without columns, they are parsed up to the current end of the file
+        """
+        with self._lock:
+            self._derived_values.pop(path, None)
+        header = dia.read_columns(path)
+        offset = dia.complete_size(path)
+        # the last line without the line break is parsed, but the next reading starts before it
+        stop = offset + dia.pending_size(path, offset, header)
+        return {'data': pd.DataFrame(), 'header': header, 'offset': offset, 'stop': stop, 'pending': int(stop > offset),
+                'fingerprint': dia.fingerprint(path, offset), 'signature': current, 'pyramid': None, 'stats': None}
+
+    def _restore(self, path):
+        """
+        Mapping columns of the cache entry of the file, it is done once, then the state is kept in memory
+        :return: state of the file or None if the file is not cached
+        """
+        meta = self.cache.read_meta(path, validate=False) if self.cache is not None else None
+        if meta is None or 'offset' not in meta or 'columns' not in meta:
+            return None
+        data = self.cache.get(path, validate=False)
+        if data is None:
+            return None
+        state = {'data': data, 'header': dia.read_columns(path), 'offset': meta['offset'],
+                 'stop': meta.get('stop', meta['offset']), 'pending': meta.get('pending', 0),
+                 'fingerprint': meta['fingerprint'], 'signature': meta['signature'], 'pyramid': None, 'stats': None}
+        saved = self.cache.get_arrays(path, 'pyramid')
+        if saved is not None and all(name in data for name in saved[0].get('columns', [None])):
+            params, arrays = saved
+            state['pyramid'] = Pyramid.from_arrays(params['columns'], arrays, params['base'], params['factor'])
+        saved = self.cache.get_arrays(path, 'stats')
+        if saved is not None and all(name in data for name in saved[0]['columns']):
+            params, arrays = saved
+            state['stats'] = ColumnStats.from_arrays(params['columns'], arrays, params['rows'])
+        self._extend_pyramid(path, state)
+        self._extend_stats(path, state)
+        return state
+
+    def _append(self, path, state, current, progress=None):
+        """
+        Parsing only the loaded columns of the rows appended after the offset of the state
+        Pending last line of the state is parsed again and its row is replaced.
+        :param current: signature of the file
+        :return: new state of the file
+        """
+        data = state['data']
+        if data.columns.empty:
+            return self._new_state(path, current)
+        columns = data.columns.tolist()
+        # the last line without the line break is taken again, as in _new_state
+        offset = dia.complete_size(path)
+        stop = offset + dia.pending_size(path, offset, state['header'])
+        tail = dia.read_range(path, (state['offset'], stop), state['header'], progress=progress, usecols=columns)
+        state = dict(state, signature=current)
+        if tail.empty and not state['pending']:
+            return state
+        tail = self._compact(tail[columns])
+        with self._lock:
+            self._derived_values.pop(path, None)
+        replace = state['pending']
+        state.update(offset=offset, stop=stop, pending=int(stop > offset), fingerprint=dia.fingerprint(path, offset))
+        appended = self.cache is not None and self.cache.append(
+            path, tail, signature=current, replace=replace, **self._entry_params(state))
+        mapped = self.cache.get(path, validate=False) if appended else None
+        if mapped is not None and all(name in mapped for name in columns):
+            state['data'] = mapped[columns]
+        else:
+            state['data'] = pd.concat([data.iloc[:len(data) - replace], tail], ignore_index=True)
+            if self.cache is not None and not appended:
+                self.cache.put(path, state['data'], signature=current, **self._entry_params(state))
+        self._extend_pyramid(path, state)
+        self._extend_stats(path, state)
+        return state
+
+    def _add_columns(self, path, state, columns, progress=None):
+        """
+        Parsing the columns up to the end of the parsed part of the state, so they have the same rows
+        as the loaded columns. Parsed columns are added to the cache entry of the file.
+        :return: new state of the file
+        """
+        parsed = self._compact(dia.read_dia(path, workers=self.workers, stop=state['stop'], progress=progress,
+                                            usecols=columns))
+        data = state['data']
+        # columns of the other rows, if the archive was replaced meanwhile, are dropped
+        loaded = {name: data[name] for name in data.columns} if len(data) == len(parsed) else dict()
+        loaded.update({name: parsed[name] for name in columns})
+        state = dict(state, data=pd.DataFrame(loaded, copy=False))
+        if self.cache is not None:
+            self.cache.put_columns(path, state['data'], signature=state['signature'], **self._entry_params(state))
+        self._extend_pyramid(path, state)
+        self._extend_stats(path, state)
+        return state
+
+    @staticmethod
+    def _entry_params(state):
+        """
+        :return: values of the state which are kept in meta of the cache entry
+        """
+        return {name: state[name] for name in ('offset', 'stop', 'pending', 'fingerprint')}
+
+    @staticmethod
+    def _complete_rows(state):
+        """
+        :return: data of the state without the row of the pending last line, it can be changed yet
+        """
+        data = state['data']
+        return data.iloc[:len(data) - state['pending']]
+
+    def _extend_pyramid(self, filename, state):
+        """
+        Summarizing new rows and new columns of the file, summaries are saved in the cache next to the columns
+        Columns added to the state are summarized as a whole and joined to the summaries of the loaded ones.
+        """
+        data = self._complete_rows(state)
+        pyramid = state['pyramid']
+        if pyramid is None or pyramid.rows > len(data):
+            pyramid = state['pyramid'] = Pyramid.build(data)
+            new = None
+        else:
+            new = pyramid.extend(data)
+            added = [name for name in numeric_columns(data) if name not in pyramid]
+            if added:
+                pyramid = state['pyramid'] = pyramid.merge(
+                    Pyramid.build(data[added], base=pyramid.base, factor=pyramid.factor))
+                new = None
+            elif not new:
+                return
+        if self.cache is None:
+            return
+        if new is None or not self.cache.append_arrays(filename, 'pyramid', new):
+            self.cache.put_arrays(filename, 'pyramid', pyramid.to_arrays(), columns=pyramid.columns,
+                                  base=pyramid.base, factor=pyramid.factor)
+
+    def _extend_stats(self, filename, state):
+        """
+        Adding appended rows and new columns to the summary statistics, they are saved in the cache next to the columns
+        Only the rows appended since the last call are reduced, columns added to the state are reduced as a whole.
+        Pending last line is not counted, get_summary adds it.
+        """
+        data = self._complete_rows(state)
+        times = data['Time'].to_numpy() if 'Time' in data else None
+        stats = state['stats']
+        if stats is None or stats.rows > len(data):
+            stats = state['stats'] = ColumnStats.build(data, times)
+        else:
+            extended = stats.extend(data, times)
+            added = [name for name in numeric_columns(data) if name not in stats]
+            if added:
+                stats = state['stats'] = stats.merge(ColumnStats.build(data[added], times))
+            elif not extended:
+                return
+        if self.cache is not None:
+            self.cache.put_arrays(filename, 'stats', stats.to_arrays(), columns=stats.columns, rows=stats.rows)
+
+    @staticmethod
+    def _is_appended(filename, state, current):
+        """
+        Checking that the file was only appended since the state was saved
+        :return: True if the parsed part of the file is still the same
+        """
+        if current == state['signature']:
+            return True
+        if dia.is_compressed(filename):
+            # compressed file can not be read from the offset, it is parsed again
+            return False
+        return current['size'] >= state['offset'] and dia.fingerprint(filename, state['offset']) == state['fingerprint']
+
+    @timed('GraphData.get_task_list')
+    def get_task_list(self, progress=None):
+        """
+        Scanning the directory with all the nested directories, unchanged directories are taken from the index
+        :param progress: callable which takes scanned directories, found directories and files
+        :return: dict with list of transducers of every task
+        """
+        tasks = dict()
+        task_files = dict()
+        records = self.index.scan(self.path, progress=progress)
+        for record in records:
+            tasks.setdefault(record['task'], []).append(record['transducer'])
+            task_files[(record['task'], record['transducer'])] = record['path']
+        self._task_files = task_files
+        self._channels = ChannelSearch(records)
         return tasks
 
+    def search_channels(self, query, limit=200):
+        """
+        Finding columns of all the files of the directory by prefix or substring, only the headers are indexed
+        :return: list of dicts with column, task, transducer and path of the file
+        """
+        return self._channels.search(query, limit=limit)
+
+    def get_filename(self, task, transducer):
+        """
+        :return: path of the file of the transducer relative to the directory
+        """
+        return self._task_files.get((task, transducer), f'{task}#{transducer}.dia')
+
+    def get_files(self):
+        """
+        :return: dict with path of the file of every (task, transducer) found by the last scan
+        """
+        return dict(self._task_files)
+
+
+def _preload_file(job):
+    """
+    Parsing the file into the cache in the worker process
+    :param job: directory, path of the file, directory of the cache, compact mode and its tolerance
+    :return: error message or None
+    """
+    directory, path, cache_directory, compact, tolerance = job
+    graph_data = GraphData(directory, cache=ColumnCache(cache_directory), compact=compact, tolerance=tolerance)
+    # the process is one of the pool, it doesn't start processes of its own
+    graph_data.workers = 1
+    try:
+        graph_data._load(path, dia.read_columns(path))
+    except (OSError, ValueError, EOFError) as error:
+        return f'{type(error).__name__}: {error}'
+    return None
+
 
 class SettingModel:
     """
@@ -48,9 +753,7 @@ class SettingModel:
     }
 
     def __init__(self):
-        filename = 'abq_settings.json'
-        self.filepath = Path("E:/RX Change/ABQ_Data_Entry") / filename
-        print(self.filepath)
+        self.filepath = Path.home() / '.graph_viewer' / 'settings.json'
         self.load()
 
     def load(self):
@@ -64,6 +767,7 @@ class SettingModel:
                 self.fields[key]['value'] = raw_value
 
     def save(self):
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
         with open(self.filepath, 'w') as fh:
             json.dump(self.fields, fh)
 
@@ -0,0 +1,128 @@
+"""
+Timing of the hot paths of the viewer
+Functions are wrapped by timed(name). While the tracer is off it costs one attribute check,
+when it is on every call is kept as a span with its start, duration and thread.
+Spans are shown in Help > Performance and exported in Chrome trace format, which is opened by
+chrome://tracing or https://ui.perfetto.dev.
+Capture mode additionally runs cProfile in the Tk thread and tracemalloc in the whole process.
+"""
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+
+class Tracer:
+    """
+    Recorder of the spans, only the latest spans are kept
+    """
+
+    def __init__(self, size=100000):
+        self.enabled = False
+        self._spans = deque(maxlen=size)
+        self._profile = None
+
+    def record(self, name, start, duration):
+        """
+        :param start: time.perf_counter_ns() at the start of the span
+        :param duration: duration in nanoseconds
+        """
+        self._spans.append((name, start, duration, threading.get_ident()))
+
+    def clear(self):
+        self._spans.clear()
+
+    def spans(self):
+        """
+        :return: list of (name, start, duration, thread), times are in nanoseconds
+        """
+        return list(self._spans)
+
+    def summary(self):
+        """
+        :return: list of dicts with name, count, total, mean and max duration in seconds, the slowest first
+        """
+        stats = dict()
+        for name, _, duration, _ in self.spans():
+            count, total, longest = stats.get(name, (0, 0, 0))
+            stats[name] = (count + 1, total + duration, max(longest, duration))
+        rows = [{'name': name, 'count': count, 'total': total / 1e9, 'mean': total / count / 1e9, 'max': longest / 1e9}
+                for name, (count, total, longest) in stats.items()]
+        return sorted(rows, key=lambda row: row['total'], reverse=True)
+
+    def chrome_trace(self):
+        """
+        :return: dict in Chrome trace event format with complete events, times are in microseconds
+        """
+        pid = os.getpid()
+        events = [{'name': name, 'ph': 'X', 'ts': start / 1e3, 'dur': duration / 1e3, 'pid': pid, 'tid': thread}
+                  for name, start, duration, thread in self.spans()]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export(self, filename):
+        with open(filename, 'w') as fh:
+            json.dump(self.chrome_trace(), fh)
+
+    @property
+    def capturing(self):
+        return self._profile is not None
+
+    def start_capture(self):
+        """
+        Starting cProfile in the current thread and tracemalloc, they slow the viewer down noticeably
+        :return: None
+        """
+        if self._profile is not None:
+            return
+        tracemalloc.start()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop_capture(self, limit=30):
+        """
+        :param limit: number of functions and lines of the code which are reported
+        :return: text report with the functions of the longest cumulative time and the biggest allocations
+        """
+        if self._profile is None:
+            return ''
+        self._profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        text = io.StringIO()
+        pstats.Stats(self._profile, stream=text).sort_stats('cumulative').print_stats(limit)
+        self._profile = None
+        text.write(f'Memory: {current / 2 ** 20:.1f} MB allocated, peak {peak / 2 ** 20:.1f} MB\n')
+        for statistic in snapshot.statistics('lineno')[:limit]:
+            text.write(f'{statistic}\n')
+        return text.getvalue()
+
+
+TRACER = Tracer()
+
+
+def timed(name):
+    """
+    Decorator which records every call of the function as the span
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                TRACER.record(name, start, time.perf_counter_ns() - start)
+
+        return wrapper
+
+    return decorator
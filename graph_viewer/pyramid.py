@@ -0,0 +1,242 @@
+import numpy as np
+from .stats import numeric_columns
+
+FIELDS = ('min', 'max', 'sum', 'argmin', 'argmax')
+
+
+class Pyramid:
+    """
+    Multi-resolution summaries of the columns of the file
+    Level 0 has min, max, sum and indexes of min and max of every bucket of `base` rows,
+    every next level joins `factor` buckets of the previous one. Only complete buckets are summarized,
+    so the pyramid is extended when rows are appended to the file.
+    Every field of a level is 2d array (buckets, columns), it is stored in the cache as is.
+    Any range of rows is summarized by O(levels * factor) entries and less than 2 * base raw rows.
+    """
+
+    def __init__(self, columns, base=256, factor=4, levels=None):
+        self.columns = list(columns)
+        self.base = base
+        self.factor = factor
+        # levels are replaced as a whole, so readers from other threads see consistent levels
+        self.levels = levels or list()
+        self._index = {name: i for i, name in enumerate(self.columns)}
+
+    @classmethod
+    def build(cls, data, base=256, factor=4):
+        """
+        :param data: DataFrame, only its numeric columns are summarized
+        :return: Pyramid
+        """
+        pyramid = cls(numeric_columns(data), base=base, factor=factor)
+        pyramid.extend(data)
+        return pyramid
+
+    @classmethod
+    def from_arrays(cls, columns, arrays, base, factor):
+        """
+        Restoring the pyramid from the arrays saved by to_arrays
+        :return: Pyramid
+        """
+        levels = list()
+        while all(f'{len(levels)}_{field}' in arrays for field in FIELDS):
+            levels.append({field: arrays[f'{len(levels)}_{field}'] for field in FIELDS})
+        return cls(columns, base=base, factor=factor, levels=levels)
+
+    def to_arrays(self, levels=None):
+        """
+        :param levels: levels to convert, by default levels of the pyramid
+        :return: dict with arrays of all the fields of all the levels
+        """
+        levels = self.levels if levels is None else levels
+        return {f'{k}_{field}': level[field] for k, level in enumerate(levels) for field in FIELDS}
+
+    def __contains__(self, column):
+        return column in self._index
+
+    def merge(self, other):
+        """
+        Joining summaries of other columns of the same rows, columns of other replace the same ones
+        :param other: pyramid with the same base and factor
+        :return: Pyramid
+        """
+        keep = np.array([name not in other for name in self.columns], dtype=bool)
+        columns = [name for name in self.columns if name not in other] + other.columns
+        levels = [{field: np.concatenate([np.asarray(level[field])[:, keep], other_level[field]], axis=1)
+                   for field in FIELDS} for level, other_level in zip(self.levels, other.levels)]
+        return Pyramid(columns, base=self.base, factor=self.factor, levels=levels)
+
+    def size(self, level):
+        """
+        :return: number of rows in one bucket of the level
+        """
+        return self.base * self.factor ** level
+
+    @property
+    def rows(self):
+        """
+        :return: number of rows covered by the pyramid
+        """
+        return len(self.levels[0]['min']) * self.base if self.levels else 0
+
+    def extend(self, data):
+        """
+        Adding summaries of new complete buckets of the data
+        :param data: DataFrame with all the rows of the file
+        :return: dict with new entries of every field of every level, as in to_arrays
+        """
+        levels = [dict(level) for level in self.levels]
+        new = list()
+        start = self.rows
+        stop = len(data) // self.base * self.base
+        if stop <= start:
+            return dict()
+        level = self._summarize_rows(data, start, stop)
+        new.append(level)
+        if levels:
+            levels[0] = {field: np.concatenate([levels[0][field], level[field]]) for field in FIELDS}
+        else:
+            levels.append(level)
+        k = 1
+        while True:
+            below = levels[k - 1]
+            count = len(levels[k]['min']) if k < len(levels) else 0
+            below_count = len(below['min']) // self.factor
+            if below_count <= count:
+                break
+            level = self._join(below, count * self.factor, below_count * self.factor)
+            new.append(level)
+            if k < len(levels):
+                levels[k] = {field: np.concatenate([levels[k][field], level[field]]) for field in FIELDS}
+            else:
+                levels.append(level)
+            k += 1
+        self.levels = levels
+        return self.to_arrays(new)
+
+    def minmax_indices(self, column, values, start, stop, buckets):
+        """
+        Indexes of rows with min and max values for decimation of the line
+        :param values: array with all the values of the column, it is read only at the borders of the range
+        :param buckets: required number of buckets, usually width of the axes in pixels
+        :return: sorted array of indexes or None if the range is too short for the pyramid
+        """
+        levels = self.levels
+        j = self._index[column]
+        level = None
+        for k in range(len(levels)):
+            if self.size(k) * buckets <= stop - start:
+                level = k
+        if level is None:
+            return None
+        size = self.size(level)
+        first = -(-start // size)
+        last = min(stop // size, len(levels[level]['min']))
+        if last <= first:
+            return None
+        low = levels[level]['argmin'][first:last, j]
+        high = levels[level]['argmax'][first:last, j]
+        middle = np.empty(2 * (last - first), dtype=np.int64)
+        middle[0::2] = np.minimum(low, high)
+        middle[1::2] = np.maximum(low, high)
+        parts = [np.array([start], dtype=np.int64), self._border(column, values, start, first * size), middle,
+                 self._border(column, values, last * size, stop), np.array([stop - 1], dtype=np.int64)]
+        return np.concatenate(parts)
+
+    def summary(self, column, values, start, stop):
+        """
+        Summary of the column in the range of rows, minmax_indices takes extremes of the borders of the range by it
+        :param values: array with all the values of the column, only the rows not covered by the pyramid are read
+        :return: dict with min, max, mean and indexes of min and max
+        """
+        levels = self.levels
+        j = self._index[column]
+        runs = list()
+        self._cover(levels, start, stop, len(levels) - 1, runs)
+        mins, maxs = list(), list()
+        total = 0.0
+        for level, first, last in runs:
+            if level is None:
+                part = np.asarray(values[first:last])
+                low, high = int(np.argmin(part)), int(np.argmax(part))
+                mins.append((part[low], first + low))
+                maxs.append((part[high], first + high))
+                total += float(part.sum())
+            else:
+                entries = levels[level]
+                low = first + int(np.argmin(entries['min'][first:last, j]))
+                high = first + int(np.argmax(entries['max'][first:last, j]))
+                mins.append((entries['min'][low, j], int(entries['argmin'][low, j])))
+                maxs.append((entries['max'][high, j], int(entries['argmax'][high, j])))
+                total += float(entries['sum'][first:last, j].sum())
+        if not mins:
+            return {'min': np.nan, 'max': np.nan, 'mean': np.nan, 'argmin': start, 'argmax': start}
+        minimum = min(mins, key=lambda item: item[0])
+        maximum = max(maxs, key=lambda item: item[0])
+        return {'min': float(minimum[0]), 'max': float(maximum[0]), 'mean': total / (stop - start),
+                'argmin': minimum[1], 'argmax': maximum[1]}
+
+    def _border(self, column, values, start, stop):
+        """
+        :return: sorted indexes of min and max in the range, which is not covered by entries of the chosen level
+        """
+        if stop <= start:
+            return np.empty(0, dtype=np.int64)
+        summary = self.summary(column, values, start, stop)
+        return np.array(sorted({summary['argmin'], summary['argmax']}), dtype=np.int64)
+
+    def _cover(self, levels, start, stop, level, runs):
+        """
+        Splitting the range of rows into runs of entries of the coarsest possible levels
+        Run is (level, first entry, last entry) or (None, first row, last row) for raw rows
+        """
+        if stop <= start:
+            return
+        if level < 0:
+            runs.append((None, start, stop))
+            return
+        size = self.size(level)
+        first = -(-start // size)
+        last = min(stop // size, len(levels[level]['min']))
+        if last <= first:
+            self._cover(levels, start, stop, level - 1, runs)
+            return
+        self._cover(levels, start, first * size, level - 1, runs)
+        runs.append((level, first, last))
+        self._cover(levels, last * size, stop, level - 1, runs)
+
+    def _summarize_rows(self, data, start, stop):
+        """
+        :return: level 0 entries for the rows between start and stop, both are multiples of base
+        """
+        count = (stop - start) // self.base
+        level = {'min': np.empty((count, len(self.columns))), 'max': np.empty((count, len(self.columns))),
+                 'sum': np.empty((count, len(self.columns))),
+                 'argmin': np.empty((count, len(self.columns)), dtype=np.int64),
+                 'argmax': np.empty((count, len(self.columns)), dtype=np.int64)}
+        rows = np.arange(count)
+        offsets = start + rows * self.base
+        for j, name in enumerate(self.columns):
+            blocks = np.asarray(data[name].to_numpy()[start:stop], dtype=np.float64).reshape(count, self.base)
+            low = blocks.argmin(axis=1)
+            high = blocks.argmax(axis=1)
+            level['min'][:, j] = blocks[rows, low]
+            level['max'][:, j] = blocks[rows, high]
+            level['sum'][:, j] = blocks.sum(axis=1)
+            level['argmin'][:, j] = offsets + low
+            level['argmax'][:, j] = offsets + high
+        return level
+
+    def _join(self, below, start, stop):
+        """
+        :return: entries of the next level made of the entries of the level below between start and stop
+        """
+        shape = ((stop - start) // self.factor, self.factor, len(self.columns))
+        parts = {field: np.asarray(below[field][start:stop]).reshape(shape) for field in FIELDS}
+        low = parts['min'].argmin(axis=1)[:, np.newaxis, :]
+        high = parts['max'].argmax(axis=1)[:, np.newaxis, :]
+        return {'min': np.take_along_axis(parts['min'], low, axis=1)[:, 0, :],
+                'max': np.take_along_axis(parts['max'], high, axis=1)[:, 0, :],
+                'sum': parts['sum'].sum(axis=1),
+                'argmin': np.take_along_axis(parts['argmin'], low, axis=1)[:, 0, :],
+                'argmax': np.take_along_axis(parts['argmax'], high, axis=1)[:, 0, :]}
@@ -0,0 +1,133 @@
+"""
+Summary statistics of the columns of the file
+They are computed when columns are loaded and extended by appended rows, so the table is never scanned for them.
+"""
+import numpy as np
+
+FIELDS = ('count', 'min', 'max', 'sum', 'time_min', 'time_max', 'last')
+
+
+def numeric_columns(data):
+    """
+    :return: names of the numeric columns of the DataFrame, columns of text have extension dtypes of pandas
+    """
+    return [name for name, dtype in data.dtypes.items()
+            if isinstance(dtype, np.dtype) and np.issubdtype(dtype, np.number)]
+
+
+class ColumnStats:
+    """
+    Count of values, min, max, sum, Time of min and max and the last value of every numeric column
+    Every column is reduced by NumPy as a whole, only rows appended since the last call are read.
+    Every field is 1d array by columns, it is stored in the cache as is. NaN values are skipped.
+    """
+
+    def __init__(self, columns, rows=0, fields=None):
+        self.columns = list(columns)
+        # number of rows which are summarized
+        self.rows = rows
+        if fields is None:
+            fields = {field: np.full(len(self.columns), np.nan) for field in FIELDS}
+            fields['count'] = np.zeros(len(self.columns), dtype=np.int64)
+            fields['sum'] = np.zeros(len(self.columns))
+        # fields are replaced as a whole, so readers from other threads see consistent statistics
+        self.fields = fields
+
+    @classmethod
+    def build(cls, data, time=None):
+        """
+        :param data: DataFrame, only its numeric columns are summarized
+        :param time: array with Time of every row or None
+        :return: ColumnStats
+        """
+        stats = cls(numeric_columns(data))
+        stats.extend(data, time)
+        return stats
+
+    @classmethod
+    def from_arrays(cls, columns, arrays, rows):
+        """
+        Restoring the statistics from the arrays saved by to_arrays
+        :return: ColumnStats
+        """
+        return cls(columns, rows=rows, fields={field: np.array(arrays[field]) for field in FIELDS})
+
+    def to_arrays(self):
+        return dict(self.fields)
+
+    def __contains__(self, column):
+        return column in self.columns
+
+    def extend(self, data, time=None):
+        """
+        Adding the rows which are appended to the data since the last call
+        :param data: DataFrame with all the rows of the file
+        :param time: array with Time of all the rows or None
+        :return: True if there were new rows
+        """
+        start = self.rows
+        if len(data) <= start:
+            return False
+        fields = {field: values.copy() for field, values in self.fields.items()}
+        tail = None if time is None else np.asarray(time)[start:]
+        for j, name in enumerate(self.columns):
+            count, low, high, total, time_low, time_high, last = self._reduce(data[name].to_numpy()[start:], tail)
+            fields['last'][j] = last
+            if not count:
+                continue
+            if not fields['count'][j] or low < fields['min'][j]:
+                fields['min'][j], fields['time_min'][j] = low, time_low
+            if not fields['count'][j] or high > fields['max'][j]:
+                fields['max'][j], fields['time_max'][j] = high, time_high
+            fields['count'][j] += count
+            fields['sum'][j] += total
+        self.fields = fields
+        self.rows = len(data)
+        return True
+
+    def merge(self, other):
+        """
+        Joining statistics of other columns of the same rows, columns of other replace the same ones
+        :return: ColumnStats
+        """
+        columns = [name for name in self.columns if name not in other] + other.columns
+        fields = {field: np.concatenate([self.fields[field][[name not in other for name in self.columns]],
+                                         other.fields[field]]) for field in FIELDS}
+        return ColumnStats(columns, rows=other.rows, fields=fields)
+
+    def summary(self):
+        """
+        :return: dict with count, min, max, mean, last value and Time of min and max of every column,
+        values are NaN if the column has no values
+        """
+        fields = self.fields
+        result = dict()
+        for j, name in enumerate(self.columns):
+            count = int(fields['count'][j])
+            result[name] = {'count': count, 'min': float(fields['min'][j]), 'max': float(fields['max'][j]),
+                            'mean': float(fields['sum'][j]) / count if count else np.nan,
+                            'last': float(fields['last'][j]), 'time_min': float(fields['time_min'][j]),
+                            'time_max': float(fields['time_max'][j])}
+        return result
+
+    @staticmethod
+    def _reduce(values, time):
+        """
+        :return: count of values, min, max, sum, Time of min and max and the last value of the part of the column
+        """
+        if not len(values):
+            return 0, np.nan, np.nan, 0.0, np.nan, np.nan, np.nan
+        count = len(values)
+        low, high = int(np.argmin(values)), int(np.argmax(values))
+        if np.isnan(values[low]):
+            # argmin and argmax stop at the first NaN, so NaN values are skipped only when there are some
+            count = int(count - np.isnan(values).sum())
+            if not count:
+                return 0, np.nan, np.nan, 0.0, np.nan, np.nan, float(values[-1])
+            low, high = int(np.nanargmin(values)), int(np.nanargmax(values))
+            total = float(np.nansum(values, dtype=np.float64))
+        else:
+            total = float(values.sum(dtype=np.float64))
+        time_low = np.nan if time is None else float(time[low])
+        time_high = np.nan if time is None else float(time[high])
+        return count, float(values[low]), float(values[high]), total, time_low, time_high, float(values[-1])
@@ -0,0 +1,27 @@
+"""
+Default properties of the lines and axes, they are shared by the graph window and batch rendering
+Matplotlib is imported only for the colormap, so the graph panel can be made without it.
+"""
+
+DEFAULT_COLORS = ['blue', 'orange', 'green', 'cyan', 'magenta', 'yellow', 'black', 'grey', 'white',
+                  'indigo', 'navy', 'slateblue', 'brown', 'peru', 'gold', 'springgreen', 'teal',
+                  'chocolate', 'wheat', 'steelblue', 'hotpink', 'orchid', 'lawngreen', 'olive']
+LINE_TYPES = ['solid', 'dashed', 'dashdot', 'dotted', 'none']
+AXIS_SCALES = ['linear', 'log', 'symlog', 'logit']
+DEFAULT_WIDTH = 1.5
+DEFAULT_LINE_TYPE = 'solid'
+# colors of the lines are taken from the colormap when there are more lines than default colors
+PALETTE_COLORMAP = 'turbo'
+
+
+def palette(count):
+    """
+    :return: list of colors of count lines, default colors if there are enough of them,
+    otherwise evenly spaced colors of the colormap
+    """
+    if count <= len(DEFAULT_COLORS):
+        return DEFAULT_COLORS[:count]
+    from matplotlib import colormaps
+    from matplotlib.colors import to_hex
+    colormap = colormaps[PALETTE_COLORMAP]
+    return [to_hex(colormap(i / (count - 1))) for i in range(count)]
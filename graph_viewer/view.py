@@ -1,13 +1,12 @@
 import tkinter as tk
 from tkinter import ttk
-from tkinter import messagebox
+from tkinter import messagebox, simpledialog, filedialog
 from . import widgets as w
-import matplotlib
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import (FigureCanvasTkAgg, NavigationToolbar2Tk)
-import pandas as pd
+from functools import partial
+from .profiling import timed, TRACER
 
-matplotlib.use('TkAgg')
+# statistics of the columns in the summary beside the table
+SUMMARY_COLUMNS = ('min', 'max', 'mean', 'last', 'time_min', 'time_max')
 
 
 class ChooseGraphics(w.TopLevelWindow):
@@ -16,7 +15,10 @@ class ChooseGraphics(w.TopLevelWindow):
     Consist of tree with list of transducers and button 'ok'
     """
 
-    def __init__(self, parent, list_of_transducers, selectmode='extended'):
+    def __init__(self, parent, list_of_transducers, selectmode='extended', selected=None):
+        """
+        :param selected: transducers which are selected when the window is shown
+        """
         super().__init__(parent, title='Choose Graphs to Display')
         self._result = list()
         self.geometry('400x400')
@@ -29,7 +31,10 @@ class ChooseGraphics(w.TopLevelWindow):
         self.tree.pack(fill=tk.BOTH, expand=1)
 
         for i in range(1, len(list_of_transducers)):
-            self.tree.insert('', 'end', text=list_of_transducers[i])
+            iid = self.tree.insert('', 'end', text=list_of_transducers[i])
+            if selected and list_of_transducers[i] in selected:
+                self.tree.selection_add(iid)
+                self.tree.see(iid)
 
         ttk.Button(self, text='Ok', command=self._on_ok).pack(side=tk.BOTTOM, fill=tk.X, expand=0)
 
@@ -53,373 +58,6 @@ class ChooseGraphics(w.TopLevelWindow):
         self.destroy()
 
 
-class ToolBar(ttk.Frame):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._vars_graph = {'Graph title': tk.StringVar(), 'X min': tk.DoubleVar(), 'X max': tk.DoubleVar(),
-                            'Y min': tk.DoubleVar(), 'Y max': tk.DoubleVar(), 'Legend': tk.BooleanVar(),
-                            'X axis': tk.StringVar(), 'Y axis': tk.StringVar()}
-        self._vars_line = {'Choose line': tk.StringVar(), 'Line label': tk.StringVar(), 'Color': tk.StringVar(),
-                           'Width': tk.DoubleVar(), 'Line type': tk.StringVar(), 'X scale': tk.StringVar(),
-                           'Y scale': tk.StringVar()}
-        self._default_colors = ['blue', 'orange', 'green', 'cyan', 'magenta', 'yellow', 'black', 'grey', 'white',
-                                'indigo', 'navy', 'slateblue', 'brown', 'peru', 'gold', 'springgreen', 'teal',
-                                'chocolate', 'wheat', 'steelblue', 'hotpink', 'orchid', 'lawngreen', 'olive']
-        self._default_line_types = ['solid', 'dashed', 'dashdot', 'dotted', 'none']
-        self._default_axis_scales = ['linear', 'log', 'symlog', 'logit']
-        self._default_font_names = ['DejaVu Sans', 'Times New Roman', 'Helvetica', 'Times', 'Utopia',
-                                    'ITC Avant Garde Gothic', 'Courier', 'Symbol', 'Computer Modern']
-        self._line_types = list()
-        self._colors = list()
-        self._width = list()
-        self._line_label = list()
-        self._x_log = 'linear'
-        self._y_log = 'linear'
-
-        line_frame = ttk.LabelFrame(self, text='Line properties')
-        line_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=1)
-        self.line_label_combobox = w.LabelInput(line_frame, 'Choose line', self._vars_line['Choose line'],
-                                                input_class=w.ValidatedCombobox,
-                                                input_args={'values': self._line_types},
-                                                pad_args={'padx': 2, 'pady': 2})
-        self.line_label_combobox.grid(row=0, column=0)
-        self.line_label_entry = w.LabelInput(line_frame, 'Line label', self._vars_line['Line label'],
-                                             input_class=w.RequiredEntry, pad_args={'padx': 2, 'pady': 2},
-                                             disable_var=self._vars_line['Choose line'])
-        self.line_label_entry.grid(row=1, column=0)
-        self.color_combobox = w.LabelInput(line_frame, 'Color', self._vars_line['Color'],
-                                           input_class=w.ValidatedCombobox, input_args={'values': self._default_colors},
-                                           disable_var=self._vars_line['Choose line'], pad_args={'padx': 2, 'pady': 2})
-        self.color_combobox.grid(row=2, column=0)
-        self.width_entry = w.LabelInput(line_frame, 'Width', self._vars_line['Width'], input_class=w.RequiredEntry,
-                                        disable_var=self._vars_line['Choose line'], pad_args={'padx': 2, 'pady': 2})
-        self.width_entry.grid(row=3, column=0)
-        self.line_type_combobox = w.LabelInput(line_frame, 'Line type', self._vars_line['Line type'],
-                                               input_class=w.ValidatedCombobox,
-                                               input_args={'values': self._default_line_types},
-                                               disable_var=self._vars_line['Choose line'],
-                                               pad_args={'padx': 2, 'pady': 2})
-        self.line_type_combobox.grid(row=4, column=0)
-        self.x_scale_combobox = w.LabelInput(line_frame, 'X-axis scale', self._vars_line['X scale'],
-                                             input_class=w.ValidatedCombobox,
-                                             input_args={'values': self._default_axis_scales},
-                                             disable_var=self._vars_line['Choose line'],
-                                             pad_args={'padx': 2, 'pady': 2})
-        self.x_scale_combobox.grid(row=5, column=0)
-        self.y_scale_combobox = w.LabelInput(line_frame, 'Y-axis scale', self._vars_line['Y scale'],
-                                             input_class=w.ValidatedCombobox,
-                                             input_args={'values': self._default_axis_scales},
-                                             disable_var=self._vars_line['Choose line'],
-                                             pad_args={'padx': 2, 'pady': 2})
-        self.y_scale_combobox.grid(row=6, column=0)
-
-        line_buttons = tk.Frame(line_frame)
-        line_buttons.grid(row=7, column=0)
-        self.ok_line_button = ttk.Button(line_buttons, text='Ok', command=self.master._on_replot_line)
-        self.ok_line_button.pack(side=tk.LEFT)
-        self.reset_line_button = ttk.Button(line_buttons, text='Reset', command=self.master._on_reset_line)
-        self.reset_line_button.pack(side=tk.RIGHT)
-        self._vars_line['Choose line'].trace_add('write', self._on_select_line)
-
-        graph_frame = ttk.LabelFrame(self, text='Graph Properties')
-        graph_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=1)
-        w.LabelInput(graph_frame, 'Graph title', self._vars_graph['Graph title'], input_class=ttk.Entry,
-                     pad_args={'padx': 2, 'pady': 2}).grid(row=0, column=0)
-        w.LabelInput(graph_frame, 'Name of x axis', self._vars_graph['X axis'], input_class=ttk.Entry,
-                     pad_args={'padx': 2, 'pady': 2}).grid(row=1, column=0)
-        w.LabelInput(graph_frame, 'Name of y axis', self._vars_graph['Y axis'], input_class=ttk.Entry,
-                     pad_args={'padx': 2, 'pady': 2}).grid(row=2, column=0)
-        w.LabelInput(graph_frame, 'Min x', self._vars_graph['X min'], input_class=w.RequiredEntry,
-                     pad_args={'padx': 2, 'pady': 2}).grid(row=3, column=0)
-        w.LabelInput(graph_frame, 'Max x', self._vars_graph['X max'], input_class=w.RequiredEntry,
-                     pad_args={'padx': 2, 'pady': 2}).grid(row=4, column=0)
-        w.LabelInput(graph_frame, 'Min y', self._vars_graph['Y min'], input_class=w.RequiredEntry,
-                     pad_args={'padx': 2, 'pady': 2}).grid(row=5, column=0)
-        w.LabelInput(graph_frame, 'Max y', self._vars_graph['Y max'], input_class=w.RequiredEntry,
-                     pad_args={'padx': 2, 'pady': 2}).grid(row=6, column=0)
-        self.legend_checkbutton = w.LabelInput(graph_frame, 'Legend', self._vars_graph['Legend'],
-                                               input_class=ttk.Checkbutton, pad_args={'padx': 2, 'pady': 2})
-        self.legend_checkbutton.grid(row=7, column=0)
-        self._vars_graph['Legend'].trace_add('write', self.master._on_click_legend)
-
-        graph_buttons = tk.Frame(graph_frame)
-        graph_buttons.grid(row=8, column=0)
-        self.ok_graph_button = ttk.Button(graph_buttons, text='Ok', command=self.master._on_replot_graph)
-        self.ok_graph_button.pack(side=tk.LEFT)
-        self.reset_graph_button = ttk.Button(graph_buttons, text='Reset', command=self.master._on_reset_graph)
-        self.reset_graph_button.pack(side=tk.RIGHT)
-
-    def set(self, line_label, width=1.5, line_type='solid'):
-        """
-        Setting line properties
-        :return: None
-        """
-        self._line_types.append(line_type)
-        self._line_label.append(line_label)
-        self._colors.append(self._default_colors[self._line_label.index(line_label)])
-        self._width.append(width)
-        self.line_label_combobox.input.configure(values=self._line_label)
-
-    def get(self):
-        """
-        Get line properties
-        Not a good decision to make dict like this, but as for now it is the best option
-        :return: data dict with properties of line type, line label, color, width
-        TODO: remake filling of the dictionary
-        """
-        data = dict()
-        data['Choose line'] = self._line_label
-        data['Line label'] = self._line_label
-        data['Color'] = self._colors
-        data['Width'] = self._width
-        data['Line type'] = self._line_types
-        data['X scale'] = self._x_log
-        data['Y scale'] = self._y_log
-        return data
-
-    def get_new_line_properties(self):
-        """
-        Asking all the label inputs about its values
-        :return: data dict with all the values of line properties field
-        """
-        data = dict()
-        for key, variable in self._vars_line.items():
-            try:
-                data[key] = variable.get()
-            except tk.TclError:
-                message = f'Error in field: {key}. Data was not saved'
-                raise ValueError(message)
-        return data
-
-    def get_line_index(self):
-        """
-        Getting an index of the line which is chosen in combobox
-        :return: index of the line
-        """
-        try:
-            index = self._line_label.index(self._vars_line.get('Choose line').get())
-        except ValueError:
-            return None
-        return index
-
-    def set_new_line_properties(self):
-        """
-        Setting new line properties
-        :return: None
-        """
-        line_properties = self.get_new_line_properties()
-        index = self._line_label.index(line_properties['Choose line'])
-        if line_properties['Line label']:
-            self._line_label[index] = line_properties['Line label']
-            self._vars_line.get('Choose line').set(line_properties.get('Line label'))
-        self._colors[index] = line_properties['Color']
-        self._line_types[index] = line_properties['Line type']
-        self._width[index] = line_properties['Width']
-        self._x_log = line_properties['X scale']
-        self._y_log = line_properties['Y scale']
-        self.line_label_combobox.input.configure(values=self._line_label)
-
-    def reset_line_properties(self):
-        for key, var in self._vars_line.items():
-            if isinstance(var, tk.BooleanVar):
-                var.set(False)
-            else:
-                if key != 'Choose line':
-                    var.set('')
-
-    def get_new_graph_properties(self):
-        """
-        Asking all the label inputs about its values
-        :return: dict with all the values of graph properties field
-        """
-        data = dict()
-        for key, variable in self._vars_graph.items():
-            try:
-                data[key] = variable.get()
-            except tk.TclError:
-                message = f'Error in field: {key}. Data was not saved'
-                raise ValueError(message)
-        return data
-
-    def get_legend_value(self):
-        return self._vars_graph.get('Legend').get()
-
-    def get_font_name(self):
-        return self._vars_graph.get('Font').get()
-
-    def reset_graph_properties(self):
-        for var in self._vars_graph.values():
-            if isinstance(var, tk.BooleanVar):
-                var.set(False)
-            else:
-                var.set('')
-
-    def renew_widgets(self):
-        index = self.get_line_index()
-        if index is not None:
-            data = self.get()
-            keys = list(data.keys())
-            for var, i in zip(self._vars_line.values(), range(len(keys))):
-                if isinstance(var, tk.BooleanVar):
-                    var.set(False)
-                else:
-                    if keys[i] == 'X scale' or keys[i] == 'Y scale':
-                        var.set(data.get(keys[i]))
-                    else:
-                        var.set(data.get(keys[i])[index])
-
-    def get_errors_line(self):
-        errors = {}
-        for key, var in self._vars_line.items():
-            inp = var.label_widget.input
-            error = var.label_widget.error
-            if hasattr(inp, 'trigger_focusout_validation'):
-                inp.trigger_focusout_validation()
-            if error.get():
-                errors[key] = error.get()
-        return errors
-
-    def get_errors_graph(self):
-        errors = {}
-        for key, var in self._vars_graph.items():
-            inp = var.label_widget.input
-            error = var.label_widget.error
-            if hasattr(inp, 'trigger_focusout_validation'):
-                inp.trigger_focusout_validation()
-            if error.get():
-                errors[key] = error.get()
-        return errors
-
-    def _on_select_line(self, *_):
-        for key, var in self._vars_line.items():
-            var.label_widget.input.config(state=tk.NORMAL)
-        self.renew_widgets()
-
-
-class GraphicWindow(w.TopLevelWindow):
-    def __init__(self, parent, title, *args, **kwargs):
-        super().__init__(parent, title, *args, **kwargs)
-        self.figure = Figure(figsize=(7, 5), dpi=100)
-        self.canvas_tkagg = FigureCanvasTkAgg(self.figure, master=self)
-        canvas = self.canvas_tkagg.get_tk_widget()
-        canvas.pack(fill=tk.BOTH, expand=1)
-        self.toolbar = NavigationToolbar2Tk(self.canvas_tkagg, self)
-        self.toolbar_own = ToolBar(self)
-        self.toolbar_own.pack(fill=tk.BOTH, expand=1)
-        self.axes = self.figure.add_subplot(1, 1, 1)
-        self.axes.grid(True)
-        self._data = list()
-        self._plots = list()
-        self._headings = list()
-        ttk.Label(self, text='Status: ')
-        w.TopLevelWindow.center(self)
-
-    def set(self, data, label):
-        self._data.append(data)
-        heading = tuple(data.columns)
-        self._headings.append(heading)
-        self.toolbar_own.set(label)
-
-    def draw_plot(self):
-        line_properties = self.toolbar_own.get()
-        self.axes.set_xscale(line_properties.get('X scale'))
-        self.axes.set_yscale(line_properties.get('Y scale'))
-        for i in range(len(self._data)):
-            self._plots.append(self.axes.plot(self._data[i].get(self._headings[i][0]),
-                                              self._data[i].get(self._headings[i][1]),
-                                              color=line_properties.get('Color')[i],
-                                              ls=line_properties.get('Line type')[i],
-                                              label=line_properties.get('Choose line')[i],
-                                              lw=line_properties.get('Width')[i]))
-
-    def _on_click_legend(self, *_):
-        legend = self.toolbar_own.get_legend_value()
-        if legend:
-            self.axes.legend()
-        else:
-            try:
-                self.axes.get_legend().remove()
-            except AttributeError:
-                pass
-        self.canvas_tkagg.draw()
-
-    def _on_replot_line(self):
-        errors = self.toolbar_own.get_errors_line()
-        if not errors:
-            self._delete_lines()
-            self.toolbar_own.set_new_line_properties()
-            self.draw_plot()
-            try:
-                self.axes.get_legend().remove()
-                self.axes.legend()
-            except AttributeError:
-                pass
-            self.toolbar_own.renew_widgets()
-            self.canvas_tkagg.draw()
-        else:
-            message = 'Cannot replot line'
-            detail = (
-                'The following field have errors:'
-                '\n * {}'.format(
-                    '\n * '.join(errors.keys())
-                )
-            )
-            messagebox.showerror(
-                title='Error',
-                message=message,
-                detail=detail,
-                parent=self
-            )
-            return False
-
-    def _on_replot_graph(self):
-        errors = self.toolbar_own.get_errors_graph()
-        if not errors:
-            graph_properties = self.toolbar_own.get_new_graph_properties()
-            name_x = graph_properties['X axis']
-            name_y = graph_properties['Y axis']
-            name_x = r'$\mathregular{' + name_x + '}$'
-            name_y = r'$\mathregular{' + name_y + '}$'
-
-            self.axes.set(ylabel=name_y or '', xlabel=name_x or '')
-            if graph_properties['X max'] > graph_properties['X min']:
-                self.axes.set_xlim(left=graph_properties['X min'], right=graph_properties['X max'])
-            else:
-                self.axes.set_xlim(left=self.axes.get_xlim()[0], right=self.axes.get_xlim()[1])
-            if graph_properties['Y max'] > graph_properties['Y min']:
-                self.axes.set_ylim(bottom=graph_properties['Y min'], top=graph_properties['Y max'])
-            else:
-                self.axes.set_ylim(bottom=self.axes.get_ylim()[0], top=self.axes.get_ylim()[1])
-            self.axes.set_title(graph_properties['Graph title'])
-            self.canvas_tkagg.draw()
-        else:
-            message = 'Cannot replot graph'
-            detail = (
-                'The following field have errors:'
-                '\n * {}'.format(
-                    '\n * '.join(errors.keys())
-                )
-            )
-            messagebox.showerror(
-                title='Error',
-                message=message,
-                detail=detail,
-                parent=self
-            )
-            return False
-
-    def _delete_lines(self):
-        for i in range(len(self._plots)):
-            line = self._plots.pop(0).pop(0)
-            line.remove()
-
-    def _on_reset_line(self):
-        self.toolbar_own.reset_line_properties()
-
-    def _on_reset_graph(self):
-        self.toolbar_own.reset_graph_properties()
-
-
 class MainWindow(ttk.Frame):
     """
     Main window of the app
@@ -433,6 +71,27 @@ class MainWindow(ttk.Frame):
         self.left_frame.columnconfigure(0, weight=1)
         self.left_frame.pack(fill=tk.BOTH, side=tk.LEFT, expand=0)
 
+        # Search of channels in all the files of the directory, hits are shown above the tasks
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(self.left_frame, textvariable=self.search_var)
+        self.search_entry.pack(side=tk.TOP, fill=tk.X, expand=0, pady=(0, 5))
+        self.search_var.trace_add('write', self._on_search)
+        self.hits = ttk.Treeview(self.left_frame, columns=('task', 'transducer'), height=10, selectmode='extended')
+        self.hits.heading('#0', text='Channel')
+        self.hits.heading('task', text='Task')
+        self.hits.heading('transducer', text='Transducer')
+        for column in ('#0', 'task', 'transducer'):
+            self.hits.column(column, width=100)
+        self.hits.bind('<Double-1>', self._on_select_hit)
+        self._hits = dict()
+        self.search_limit = 200
+
+        # all the files of the task are parsed into the cache, so they are opened without parsing
+        self.preload_button = ttk.Button(self.left_frame, text='Preload task', command=self._on_preload)
+        self.preload_button.pack(side=tk.TOP, fill=tk.X, expand=0, pady=(0, 5))
+        self.preload_task = None
+        self.auto_preload = False
+
         self.tree = ttk.Treeview(self.left_frame, show='tree', columns='#1')
         self.tree.column('#1', width=150)
         ysb_tree = ttk.Scrollbar(self.left_frame, orient=tk.VERTICAL, command=self.tree.yview)
@@ -444,6 +103,7 @@ class MainWindow(ttk.Frame):
         self.tree.pack(fill=tk.BOTH, expand=1)
 
         self.tree.bind('<Double-1>', self._on_select)
+        self.tree.bind('<<TreeviewOpen>>', self._on_open_task)
         self.path = str()
 
         # Right frame is for table with data
@@ -451,27 +111,69 @@ class MainWindow(ttk.Frame):
         self.right_frame.columnconfigure(0, weight=1)
         self.right_frame.pack(fill=tk.BOTH, expand=1)
 
-        self.table = ttk.Treeview(self.right_frame, show='headings')
+        # summary statistics of the loaded columns are shown beside the table
+        self.summary_frame = ttk.LabelFrame(self.right_frame, text='Summary', padding='5')
+        self.summary_frame.pack(side=tk.RIGHT, fill=tk.Y, expand=0)
+        self.summary_tree = ttk.Treeview(self.summary_frame, columns=SUMMARY_COLUMNS, height=20)
+        self.summary_tree.heading('#0', text='Channel')
+        self.summary_tree.column('#0', width=100)
+        for column, text in zip(SUMMARY_COLUMNS, ('Min', 'Max', 'Mean', 'Last', 'Time of min', 'Time of max')):
+            self.summary_tree.heading(column, text=text)
+            self.summary_tree.column(column, width=75, anchor=tk.E)
+        ysb_summary = ttk.Scrollbar(self.summary_frame, orient=tk.VERTICAL, command=self.summary_tree.yview)
+        self.summary_tree.configure(yscrollcommand=ysb_summary.set)
+        ysb_summary.pack(side=tk.RIGHT, fill=tk.Y, expand=0)
+        self.summary_tree.pack(fill=tk.BOTH, expand=1)
+
+        self.table = w.VirtualTable(self.right_frame)
         self.table.pack(fill=tk.BOTH, expand=1)
-        ysb_table = ttk.Scrollbar(self.table, orient=tk.VERTICAL, command=self.table.yview)
-        self.table.configure(yscrollcommand=ysb_table.set)
-        ysb_table.pack(side=tk.RIGHT, fill=tk.Y, expand=0)
-        xsb_table = ttk.Scrollbar(self.table, orient=tk.HORIZONTAL, command=self.table.xview)
-        self.table.configure(xscrollcommand=xsb_table.set)
-        xsb_table.pack(side=tk.BOTTOM, fill=tk.X, expand=0)
-        self.calc_data = pd.DataFrame()
+        # data of the selected file, it is set by application
+        self.calc_data = None
         self.make_button = ttk.Button(self.right_frame, text='Make graph', command=self._choose_graphics)
         self.make_button.pack(fill=tk.Y, side=tk.LEFT, expand=0)
+        self.compare_button = ttk.Button(self.right_frame, text='Compare found channels', command=self._on_compare)
+        self.compare_button.pack(fill=tk.Y, side=tk.LEFT, expand=0)
+        self.channel_button = ttk.Button(self.right_frame, text='Derived channel...', command=self._on_define_channel)
+        self.channel_button.pack(fill=tk.Y, side=tk.LEFT, expand=0)
+        # name and expression of the derived channel which is defined by application
+        self.channel_definition = None
+        # found channels chosen for comparison, they are loaded by application
+        self.compare_lines = list()
         self._font = str()
         self.list_of_tasks_and_transducers = dict()
-
+        # path of the file of every (task, transducer) and callable searching channels, they are set by application
+        self.files = dict()
+        self.search = None
+        # columns which are selected in the window for choosing of graphs
+        self.preselect = list()
+        # path of the selected file and callables returning its current data and summaries, they are set by application
+        self.source_path = None
+        self.source = None
+        self.pyramid = None
+        # callable which takes path of the file, columns, x min and x max and returns rows of the range
+        self.get_range = None
+        # callable which takes path of the file and returns summary statistics of its loaded columns
+        self.get_summary = None
+        # names of all the columns of the selected file and callable which returns already loaded columns or None,
+        # other columns are loaded by application on request, only the first ones are loaded with the file
+        self.columns = list()
+        self.fetch = None
+        self.preview_columns = 20
+        self.requested_columns = None
+        self._on_columns_loaded = None
+        # accountant of memory which tracks graph windows, it is set by application
+        self.memory = None
+        self._windows = 0
+
+    @timed('MainWindow._choose_graphics')
     def _choose_graphics(self):
-        self.choose_graph = ChooseGraphics(self, self.calc_data.columns.tolist())
+        self.choose_graph = ChooseGraphics(self, self.columns or self._loaded_columns(), selected=self.preselect)
+        self.preselect = list()
         list_of_graphs = self.choose_graph.result
-        if not list_of_graphs or len(list_of_graphs) > 24:
+        if not list_of_graphs:
             message = 'Invalid number of transducers'
             detail = (
-                'You must choose at least 1 and no more than 24 transducers'
+                'You must choose at least 1 transducer'
             )
             messagebox.showerror(
                 title='Error',
@@ -482,44 +184,328 @@ class MainWindow(ttk.Frame):
             return False
         elif list_of_graphs[0] == 'closed':
             return
-        graph_draw = GraphicWindow(self, title=list_of_graphs[0])
-        for graph in list_of_graphs:
-            graph_data = pd.concat([self.calc_data.get('Time'), self.calc_data.get(graph)], axis=1)
-            graph_draw.set(graph_data, label=graph)
+        columns = ['Time'] + list_of_graphs
+        if self.fetch is not None and self.fetch(columns) is None:
+            self._request_columns(columns, partial(self._make_graph, list_of_graphs))
+            return
+        self._make_graph(list_of_graphs)
+
+    def _loaded_columns(self):
+        return self.calc_data.columns.tolist() if self.calc_data is not None else list()
+
+    def _make_graph(self, list_of_graphs):
+        from .graphics import GraphicWindow
+        data = self.fetch(['Time'] + list_of_graphs) if self.fetch is not None else self.calc_data
+        if data is None:
+            return
+        # followed file gives derived channels of the lines too
+        source = partial(self.source, columns=['Time'] + list_of_graphs) if self.source is not None else None
+        graph_draw = GraphicWindow(self, title=list_of_graphs[0], source_path=self.source_path, source=source)
+        window = partial(self.get_range, str(self.source_path), list_of_graphs) if self.get_range else None
+        graph_draw.set_source(data, x_column='Time', pyramid=self.pyramid, window=window)
+        graph_draw.set_lines(list_of_graphs)
+        if self.get_summary is not None:
+            graph_draw.prefill_limits([self.get_summary(str(self.source_path))])
         graph_draw.draw_plot()
+        self._track_window(graph_draw, list_of_graphs[0])
+
+    def _track_window(self, window, title):
+        self._windows += 1
+        if self.memory is not None:
+            self.memory.track(window, f'Graph {self._windows}: {title}')
+
+    def _request_columns(self, columns, on_loaded):
+        """
+        Asking application to load columns of the selected file in background
+        :param on_loaded: callable which is called when the columns are loaded
+        """
+        self.requested_columns = columns
+        self._on_columns_loaded = on_loaded
+        self.event_generate('<<MainWindowFetchColumns>>')
+
+    def columns_loaded(self):
+        on_loaded = self._on_columns_loaded
+        self.requested_columns = None
+        self._on_columns_loaded = None
+        self.show_summary()
+        if on_loaded is not None:
+            on_loaded()
+
+    def columns_failed(self):
+        self.requested_columns = None
+        self._on_columns_loaded = None
+
+    def _fetch_columns(self, columns):
+        """
+        Getting columns for the table, missing columns are requested and the table is refreshed when they are loaded
+        :return: DataFrame or None
+        """
+        if self.fetch is None:
+            if self.calc_data is None or not all(name in self.calc_data for name in columns):
+                return None
+            return self.calc_data[columns]
+        data = self.fetch(columns)
+        if data is None and self.requested_columns is None:
+            self._request_columns(columns, self.table.refresh)
+        return data
 
     def change_directory(self):
         self.tree.delete(*self.tree.get_children())
-        self.table.delete(*self.table.get_children())
-        self.table.configure(columns=[])
+        self.table.clear()
+        self.summary_tree.delete(*self.summary_tree.get_children())
+        self.columns_failed()
+        self.search_var.set('')
         for key in self.list_of_tasks_and_transducers.keys():
             item = self.tree.insert('', 'end', text=key)
             for values in self.list_of_tasks_and_transducers[key]:
                 self.tree.insert(item, 'end', text=values)
 
     def set_graph_font(self, font):
+        import matplotlib
         self._font = font
         matplotlib.rcParams['font.family'] = self._font
 
+    @timed('MainWindow._on_select')
     def _on_select(self, event):
         children_iid = self.tree.selection()[0]
         parent_iid = self.tree.parent(children_iid)
 
         if parent_iid:
-            self.table.delete(*self.table.get_children())
+            self.table.clear()
+            self.calc_data = None
+            self.columns_failed()
             parent_name = self.tree.item(parent_iid, option='text')
             children_name = self.tree.item(children_iid, option='text')
-            self.filename = parent_name + '#' + children_name + '.dia'
+            self.filename = self.files.get((parent_name, children_name), parent_name + '#' + children_name + '.dia')
+            self.preselect = list()
             self.event_generate('<<MainWindowSelectTransducer>>')
-            columns_calc_data = self.calc_data.columns.tolist()
-            columns = ['#1']
-            for i in range(len(columns_calc_data)):
-                columns.append(str('#' + str(i + 2)))
-            self.table.configure(columns=columns)
-            self.table.heading(columns[0], text='No.')
-            self.table.column(columns[0], stretch=False, width=40, anchor='center')
-            for i in range(len(columns_calc_data)):
-                self.table.heading(columns[i + 1], text=columns_calc_data[i])
-                self.table.column(columns[i + 1], stretch=False, width=90, anchor='center')
-            for row in self.calc_data.itertuples():
-                self.table.insert('', 'end', values=row)
+
+    def _on_preload(self):
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showerror(
+                title='Error',
+                message='No task to preload',
+                detail='Select the task or one of its transducers in the list of tasks',
+                parent=self
+            )
+            return False
+        item = self.tree.parent(selection[0]) or selection[0]
+        self.preload_task = self.tree.item(item, option='text')
+        self.event_generate('<<MainWindowPreloadTask>>')
+
+    def _on_open_task(self, _):
+        item = self.tree.focus()
+        if self.auto_preload and item and not self.tree.parent(item):
+            self.preload_task = self.tree.item(item, option='text')
+            self.event_generate('<<MainWindowPreloadTask>>')
+
+    def _on_search(self, *_):
+        self.hits.delete(*self.hits.get_children())
+        self._hits = dict()
+        query = self.search_var.get()
+        if not query.strip() or self.search is None:
+            self.hits.pack_forget()
+            return
+        for hit in self.search(query, limit=self.search_limit):
+            iid = self.hits.insert('', 'end', text=hit['column'], values=(hit['task'], hit['transducer']))
+            self._hits[iid] = hit
+        self.hits.pack(side=tk.TOP, fill=tk.X, expand=0, pady=(0, 5), after=self.search_entry)
+
+    def _on_select_hit(self, _):
+        """
+        Opening the file of the found channel, the channel is selected when the graph is made
+        """
+        selection = self.hits.selection()
+        if not selection:
+            return
+        hit = self._hits[selection[0]]
+        self.table.clear()
+        self.calc_data = None
+        self.columns_failed()
+        self.filename = hit['path']
+        self.preselect = [hit['column']]
+        self.event_generate('<<MainWindowSelectTransducer>>')
+
+    def _on_compare(self):
+        self.compare_lines = [self._hits[iid] for iid in self.hits.selection()]
+        if not self.compare_lines:
+            messagebox.showerror(
+                title='Error',
+                message='No channels to compare',
+                detail='Find channels with the search box and select them in the list of found channels',
+                parent=self
+            )
+            return False
+        self.event_generate('<<MainWindowCompare>>')
+
+    def _on_define_channel(self):
+        text = simpledialog.askstring(
+            'Derived channel',
+            'Name = expression of the columns, for example:\n'
+            'dT = T_out - T_in\nT_F = (T_1 - 273.15) * 1.8 + 32\nP_avg = mean(P_3, 100)\n'
+            'Functions: abs, sqrt, exp, log, log10, sin, cos, tan, min, max, mean, deriv, integral, col',
+            parent=self
+        )
+        if not text:
+            return
+        name, _, expression = text.partition('=')
+        self.channel_definition = (name.strip(), expression.strip())
+        self.event_generate('<<MainWindowDefineChannel>>')
+
+    def show_comparison(self, lines, frames):
+        """
+        Making graph of the channels of different files
+        :param lines: found channels with path of the file and column
+        :param frames: dict with DataFrame of Time and chosen columns of every file
+        :return: None
+        """
+        from .graphics import GraphicWindow
+        graph_draw = GraphicWindow(self, title='Comparison')
+        columns = dict()
+        for line in lines:
+            columns.setdefault(line['path'], []).append(line['column'])
+        sources = dict()
+        for path, data in frames.items():
+            window = partial(self.get_range, path, columns[path]) if self.get_range else None
+            sources[path] = graph_draw.set_source(data, x_column='Time', window=window)
+        graph_draw.set_lines([line['column'] for line in lines],
+                             labels=[f"{line['task']} {line['transducer']}: {line['column']}" for line in lines],
+                             sources=[sources[line['path']] for line in lines])
+        if self.get_summary is not None:
+            graph_draw.prefill_limits([self.get_summary(path) for path in frames])
+        graph_draw.draw_plot()
+        self._track_window(graph_draw, 'Comparison')
+
+    @timed('MainWindow.show_data')
+    def show_data(self):
+        """
+        Showing the selected transducer in the table, columns which are not loaded yet are requested
+        when they are scrolled into view
+        :return: None
+        """
+        rows = len(self.calc_data) if self.calc_data is not None else 0
+        self.table.set_source(self.columns or self._loaded_columns(), rows, self._fetch_columns)
+        self.show_summary()
+        if self.preselect:
+            self.after_idle(self._choose_graphics)
+
+    def show_summary(self):
+        """
+        Showing min, max, mean, last value and Time of min and max of the columns of the selected file,
+        only the columns which are loaded or cached are shown
+        :return: None
+        """
+        self.summary_tree.delete(*self.summary_tree.get_children())
+        if self.get_summary is None or self.source_path is None:
+            return
+        summary = self.get_summary(str(self.source_path))
+        for name in self.columns or list(summary):
+            if name in summary:
+                stats = summary[name]
+                self.summary_tree.insert('', 'end', text=name, values=[
+                    f'{stats[key]:.6g}' for key in ('min', 'max', 'mean', 'last', 'time_min', 'time_max')])
+
+
+class PerformanceWindow(w.TopLevelWindow):
+    """
+    Window with timings of the hot paths of the viewer
+    Timings are recorded only while Record timings is checked, capture runs cProfile and tracemalloc
+    """
+    refresh_interval = 1000
+
+    def __init__(self, parent):
+        super().__init__(parent, title='Performance')
+        self.geometry('700x500')
+        # id of the scheduled refresh, it is cancelled when the window is destroyed
+        self._refresh_id = None
+        self.record_var = tk.BooleanVar(value=TRACER.enabled)
+        buttons = ttk.Frame(self)
+        buttons.pack(side=tk.TOP, fill=tk.X, expand=0)
+        ttk.Checkbutton(buttons, text='Record timings', variable=self.record_var,
+                        command=self._on_record).pack(side=tk.LEFT)
+        ttk.Button(buttons, text='Clear', command=self._on_clear).pack(side=tk.LEFT)
+        ttk.Button(buttons, text='Export Chrome trace...', command=self._on_export).pack(side=tk.LEFT)
+        self.capture_button = ttk.Button(buttons, command=self._on_capture,
+                                         text='Stop capture' if TRACER.capturing else 'Start capture')
+        self.capture_button.pack(side=tk.LEFT)
+
+        self.tree = ttk.Treeview(self, columns=('count', 'total', 'mean', 'max'), height=10)
+        self.tree.heading('#0', text='Span')
+        self.tree.column('#0', width=250)
+        for column, text in (('count', 'Calls'), ('total', 'Total, ms'), ('mean', 'Mean, ms'), ('max', 'Max, ms')):
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=90, anchor=tk.E)
+        self.tree.pack(side=tk.TOP, fill=tk.BOTH, expand=1)
+
+        self.report = tk.Text(self, height=12, wrap=tk.NONE)
+        ysb_report = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.report.yview)
+        self.report.configure(yscrollcommand=ysb_report.set)
+        ysb_report.pack(side=tk.RIGHT, fill=tk.Y, expand=0)
+        self.report.pack(side=tk.BOTTOM, fill=tk.BOTH, expand=1)
+        self.refresh()
+        w.TopLevelWindow.center(self)
+
+    def refresh(self):
+        """
+        Showing summary of the recorded spans, it is repeated while the window is open
+        :return: None
+        """
+        self.tree.delete(*self.tree.get_children())
+        for row in TRACER.summary():
+            self.tree.insert('', 'end', text=row['name'], values=(
+                row['count'], f"{row['total'] * 1e3:.1f}", f"{row['mean'] * 1e3:.2f}", f"{row['max'] * 1e3:.1f}"))
+        self._refresh_id = self.after(self.refresh_interval, self.refresh)
+
+    def destroy(self):
+        if self._refresh_id is not None:
+            self.after_cancel(self._refresh_id)
+            self._refresh_id = None
+        super().destroy()
+
+    def _on_record(self):
+        TRACER.enabled = self.record_var.get()
+
+    def _on_clear(self):
+        TRACER.clear()
+        self.tree.delete(*self.tree.get_children())
+
+    def _on_export(self):
+        filename = filedialog.asksaveasfilename(parent=self, title='Export Chrome trace', defaultextension='.json',
+                                                filetypes=[('Chrome trace', '*.json')])
+        if filename:
+            try:
+                TRACER.export(filename)
+            except OSError as error:
+                messagebox.showerror(title='Error', message='Cannot export trace', detail=str(error), parent=self)
+
+    def _on_capture(self):
+        if TRACER.capturing:
+            self.report.delete('1.0', tk.END)
+            self.report.insert('1.0', TRACER.stop_capture())
+            self.capture_button.configure(text='Start capture')
+        else:
+            TRACER.start_capture()
+            self.capture_button.configure(text='Stop capture')
+
+
+class StatusBar(ttk.Frame):
+    """
+    Status bar of the main window with the message and the button to cancel loading
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.status = tk.StringVar()
+        ttk.Label(self, textvariable=self.status, anchor=tk.W).pack(side=tk.LEFT, fill=tk.X, expand=1)
+        self.cancel_button = ttk.Button(self, text='Cancel', state=tk.DISABLED,
+                                        command=lambda: self.event_generate('<<StatusBarCancel>>'))
+        self.cancel_button.pack(side=tk.RIGHT)
+
+    def set(self, message, busy=False):
+        """
+        :param busy: if True, cancel button is enabled
+        :return: None
+        """
+        self.status.set(message)
+        self.cancel_button.configure(state=(tk.NORMAL if busy else tk.DISABLED))
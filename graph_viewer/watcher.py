@@ -0,0 +1,38 @@
+import os
+import threading
+
+
+class FileWatcher(threading.Thread):
+    """
+    Thread which watches files by polling their size and modification time
+    Polling of stat is cheap and works the same way on local and network disks.
+    Callback is called from the thread of the watcher with the name of the changed file,
+    so it must not touch Tk widgets.
+    """
+
+    def __init__(self, filenames, callback, interval=1.0):
+        super().__init__(daemon=True)
+        self.filenames = list(filenames)
+        self.callback = callback
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        signatures = {filename: self._signature(filename) for filename in self.filenames}
+        while not self._stop_event.wait(self.interval):
+            for filename in self.filenames:
+                current = self._signature(filename)
+                if current != signatures[filename]:
+                    signatures[filename] = current
+                    self.callback(filename)
+
+    def stop(self):
+        self._stop_event.set()
+
+    @staticmethod
+    def _signature(filename):
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
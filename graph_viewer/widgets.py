@@ -1,5 +1,6 @@
 import tkinter as tk
 from tkinter import ttk
+from .profiling import timed
 
 
 class ValidateMixin:
@@ -181,3 +182,194 @@ class LabelInput(tk.Frame):
         """
 
         super().grid(sticky=sticky, **kwargs)
+
+
+class VirtualTable(ttk.Frame):
+    """
+    Table which shows DataFrame of any size
+    Only visible rows and a few rows of overscan exist in Treeview. On scrolling they are refilled
+    with values of other rows, so time and memory of the table don't depend on the number of rows.
+    Columns are virtual too: only the visible ones are taken from the source, so columns of the file
+    can be loaded when they are scrolled into view.
+    """
+    overscan = 5
+    wheel_step = 3
+    index_width = 40
+    column_width = 90
+
+    def __init__(self, parent, index_heading='No.', **kwargs):
+        super().__init__(parent, **kwargs)
+        self.index_heading = index_heading
+        self._columns = list()
+        self._rows = 0
+        self._fetch = None
+        self._first = 0
+        self._visible = 1
+        self._first_column = 0
+        self._visible_columns = 1
+        # names of the columns which are configured in Treeview now
+        self._shown_columns = None
+        self.tree = ttk.Treeview(self, show='headings', selectmode='none')
+        ysb = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        ysb.pack(side=tk.RIGHT, fill=tk.Y, expand=0)
+        xsb = ttk.Scrollbar(self, orient=tk.HORIZONTAL, command=self._on_xscrollbar)
+        xsb.pack(side=tk.BOTTOM, fill=tk.X, expand=0)
+        self.tree.pack(fill=tk.BOTH, expand=1)
+        self.ysb = ysb
+        self.xsb = xsb
+
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<Button-1>', lambda _: self.tree.focus_set())
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.tree.bind(sequence, self._on_mouse_wheel)
+        for sequence in ('<Shift-MouseWheel>', '<Shift-Button-4>', '<Shift-Button-5>'):
+            self.tree.bind(sequence, self._on_shift_mouse_wheel)
+        keys = {'<Up>': lambda: self._first - 1, '<Down>': lambda: self._first + 1,
+                '<Prior>': lambda: self._first - self._visible, '<Next>': lambda: self._first + self._visible,
+                '<Home>': lambda: 0, '<End>': lambda: self.rows}
+        for sequence, position in keys.items():
+            self.tree.bind(sequence, lambda _, position=position: self._on_key(position()))
+        self.tree.bind('<Left>', lambda _: self._on_key(self._first, self._first_column - 1))
+        self.tree.bind('<Right>', lambda _: self._on_key(self._first, self._first_column + 1))
+
+    @property
+    def rows(self):
+        return self._rows
+
+    def set_data(self, data):
+        """
+        Showing new data from the first row
+        :param data: DataFrame
+        :return: None
+        """
+        self.set_source(data.columns.tolist(), len(data), lambda columns: data[columns])
+
+    def set_source(self, columns, rows, fetch):
+        """
+        Showing columns which are taken on demand, from the first row and column
+        :param columns: names of all the columns
+        :param rows: number of rows
+        :param fetch: callable which takes names of the columns and returns DataFrame with them
+        or None if they are not loaded yet, then the table is refreshed by the owner when they are loaded
+        :return: None
+        """
+        self._columns = list(columns)
+        self._rows = rows
+        self._fetch = fetch
+        self._first = 0
+        self._first_column = 0
+        self._shown_columns = None
+        self.tree.delete(*self.tree.get_children())
+        self._render()
+
+    def clear(self):
+        self._columns = list()
+        self._rows = 0
+        self._fetch = None
+        self._first = 0
+        self._first_column = 0
+        self._shown_columns = None
+        self.tree.delete(*self.tree.get_children())
+        self.tree.configure(columns=[])
+        self.ysb.set(0, 1)
+        self.xsb.set(0, 1)
+
+    def refresh(self):
+        """
+        Taking values of the visible cells again, it is called when missing columns are loaded
+        :return: None
+        """
+        self._render()
+
+    def scroll_to(self, first, first_column=None):
+        """
+        Showing rows starting from the given one
+        :param first_column: index of the first visible column, by default it is not changed
+        :return: None
+        """
+        self._first = first
+        if first_column is not None:
+            self._first_column = first_column
+        self._render()
+
+    @timed('VirtualTable._render')
+    def _render(self):
+        """
+        Filling of items of Treeview with the values of the visible rows and columns
+        """
+        self._first_column = max(0, min(self._first_column, len(self._columns) - self._visible_columns))
+        names = self._columns[self._first_column:self._first_column + self._visible_columns]
+        if names != self._shown_columns:
+            self._configure_columns(names)
+        rows = self.rows
+        count = min(self._visible + self.overscan, rows)
+        children = self.tree.get_children()
+        if len(children) > count:
+            self.tree.delete(*children[count:])
+        for _ in range(len(children), count):
+            self.tree.insert('', 'end')
+        self._first = max(0, min(self._first, rows - self._visible))
+        if count:
+            data = self._fetch(names) if names else None
+            if data is None:
+                for k, iid in enumerate(self.tree.get_children()):
+                    self.tree.item(iid, values=(self._first + k,))
+            else:
+                window = data.iloc[self._first:self._first + count]
+                for iid, row in zip(self.tree.get_children(), window.itertuples()):
+                    self.tree.item(iid, values=row)
+            self.ysb.set(self._first / rows, min(self._first + self._visible, rows) / rows)
+        else:
+            self.ysb.set(0, 1)
+        if self._columns:
+            self.xsb.set(self._first_column / len(self._columns),
+                         min(self._first_column + self._visible_columns, len(self._columns)) / len(self._columns))
+        else:
+            self.xsb.set(0, 1)
+
+    def _configure_columns(self, names):
+        self._shown_columns = names
+        columns = ['#1'] + [f'#{i + 2}' for i in range(len(names))]
+        self.tree.configure(columns=columns)
+        self.tree.heading(columns[0], text=self.index_heading)
+        self.tree.column(columns[0], stretch=False, width=self.index_width, anchor='center')
+        for column, name in zip(columns[1:], names):
+            self.tree.heading(column, text=name)
+            self.tree.column(column, stretch=False, width=self.column_width, anchor='center')
+
+    def _on_configure(self, event):
+        row_height = ttk.Style(self).lookup('Treeview', 'rowheight') or 20
+        visible = max(int(event.height) // int(row_height) - 1, 1)
+        visible_columns = max((int(event.width) - self.index_width) // self.column_width, 1)
+        if (visible, visible_columns) != (self._visible, self._visible_columns):
+            self._visible = visible
+            self._visible_columns = visible_columns
+            self._render()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == tk.MOVETO:
+            self.scroll_to(int(float(value) * self.rows))
+        elif action == tk.SCROLL:
+            step = self._visible if unit == tk.PAGES else 1
+            self.scroll_to(self._first + int(value) * step)
+
+    def _on_xscrollbar(self, action, value, unit=None):
+        if action == tk.MOVETO:
+            self.scroll_to(self._first, int(float(value) * len(self._columns)))
+        elif action == tk.SCROLL:
+            step = self._visible_columns if unit == tk.PAGES else 1
+            self.scroll_to(self._first, self._first_column + int(value) * step)
+
+    def _on_mouse_wheel(self, event):
+        step = -self.wheel_step if event.num == 4 or event.delta > 0 else self.wheel_step
+        self.scroll_to(self._first + step)
+        return 'break'
+
+    def _on_shift_mouse_wheel(self, event):
+        step = -1 if event.num == 4 or event.delta > 0 else 1
+        self.scroll_to(self._first, self._first_column + step)
+        return 'break'
+
+    def _on_key(self, first, first_column=None):
+        self.scroll_to(first, first_column)
+        return 'break'
@@ -0,0 +1,21 @@
+import subprocess
+import sys
+from pathlib import Path
+from graph_viewer.batch import group_plots
+
+
+def make_plot(name, *files):
+    return {'name': name, 'lines': [{'filename': filename} for filename in files]}
+
+
+def test_plots_of_the_same_files_are_grouped():
+    plots = [make_plot('a', '1'), make_plot('b', '2'), make_plot('c', '3', '1'), make_plot('d', '2', '3'),
+             make_plot('e', '4'), make_plot('f')]
+    assert [[plot['name'] for plot in group] for group in group_plots(plots)] == [['a', 'b', 'c', 'd'], ['e'], ['f']]
+
+
+def test_batch_does_not_import_gui():
+    code = 'import sys, graph_viewer.batch; print("tkinter" in sys.modules)'
+    result = subprocess.run([sys.executable, '-c', code], cwd=Path(__file__).parents[1], capture_output=True, text=True,
+                            check=True)
+    assert result.stdout.strip() == 'False'
@@ -0,0 +1,37 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from graph_viewer import dia
+from graph_viewer.cache import ColumnCache
+
+
+def put_column(directory, path, number):
+    cache = ColumnCache(directory)
+    cache.put_columns(path, pd.DataFrame({f'C{number}': np.full(1000, float(number))}), signature=dia.signature(path))
+    cache.put_arrays(path, 'stats', {'values': np.full(10, number)}, columns=[f'C{number}'])
+
+
+def test_columns_of_concurrent_writers(tmp_path):
+    path = tmp_path / 'a#T1.dia'
+    path.write_text('title\nTime\n0\n', encoding='utf-8')
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        for future in [executor.submit(put_column, tmp_path / 'cache', path, i) for i in range(8)]:
+            future.result()
+    cache = ColumnCache(tmp_path / 'cache')
+    data = cache.get(path)
+    assert sorted(data.columns) == [f'C{i}' for i in range(8)]
+    for name in data.columns:
+        assert np.all(data[name] == float(name[1:]))
+    params, arrays = cache.get_arrays(path, 'stats')
+    assert np.all(arrays['values'] == float(params['columns'][0][1:]))
+
+
+def test_append_replaces_last_rows(tmp_path):
+    path = tmp_path / 'a#T1.dia'
+    path.write_text('title\nTime\n0\n', encoding='utf-8')
+    cache = ColumnCache(tmp_path / 'cache')
+    cache.put(path, pd.DataFrame({'Time': [0.0, 1.0, 2.0]}))
+    mapped = cache.get(path)
+    assert cache.append(path, pd.DataFrame({'Time': [5.0, 6.0]}), replace=1)
+    assert cache.get(path)['Time'].tolist() == [0.0, 1.0, 5.0, 6.0]
+    assert mapped['Time'].tolist()[:2] == [0.0, 1.0]
@@ -0,0 +1,38 @@
+import numpy as np
+from graph_viewer.decimate import minmax, is_monotonic, visible_slice
+
+
+def test_short_line_is_not_decimated():
+    x = np.arange(10.0)
+    y = x ** 2
+    dx, dy = minmax(x, y, buckets=10)
+    assert np.array_equal(dx, x) and np.array_equal(dy, y)
+
+
+def test_peaks_are_kept():
+    x = np.arange(100003.0)
+    y = np.sin(x / 100.0)
+    y[54321] = 10.0
+    y[777] = -10.0
+    dx, dy = minmax(x, y, buckets=500)
+    assert len(dx) <= 2 * 500 + 4
+    assert dx[0] == x[0] and dx[-1] == x[-1]
+    assert np.all(np.diff(dx) >= 0)
+    assert dy.max() == 10.0 and dy.min() == -10.0
+    assert np.array_equal(dy, y[dx.astype(int)])
+
+
+def test_visible_range():
+    x = np.arange(1000.0)
+    y = -x
+    dx, dy = minmax(x, y, x_range=(100.5, 200.5), buckets=10)
+    assert dx[0] == 100.0 and dx[-1] == 201.0
+    assert visible_slice(x, (100.5, 200.5)) == slice(100, 202)
+    assert visible_slice(x, None) == slice(0, 1000)
+    assert visible_slice(x, (-10, -5)) == slice(0, 1)
+
+
+def test_is_monotonic():
+    assert is_monotonic([0, 1, 1, 2])
+    assert is_monotonic([])
+    assert not is_monotonic([0, 2, 1])
@@ -0,0 +1,116 @@
+import gzip
+import numpy as np
+import pandas as pd
+import pytest
+from graph_viewer import dia
+
+
+def write_dia(path, header, rows, end='\n'):
+    lines = ['SOCRAT results', ' '.join(header)] + [' '.join(str(value) for value in row) for row in rows]
+    path.write_text('\n'.join(lines) + end, encoding='utf-8')
+    return path
+
+
+def read_csv(path):
+    return pd.read_csv(path, sep=r'\s+', skiprows=1, engine='c')
+
+
+def test_read_dia_matches_read_csv(tmp_path):
+    path = write_dia(tmp_path / 'a#T1.dia', ['Time', 'T_1', 'P_2'], [[0.0, 300.5, 1e5], [0.1, 301.25, 1.01e5]])
+    pd.testing.assert_frame_equal(dia.read_dia(path), read_csv(path))
+
+
+def test_read_dia_duplicate_headers(tmp_path):
+    path = write_dia(tmp_path / 'a#T1.dia', ['Time', 'T', 'T', 'T.1', 'T'], [[0, 1, 2, 3, 4], [1, 5, 6, 7, 8]])
+    data = dia.read_dia(path)
+    pd.testing.assert_frame_equal(data, read_csv(path))
+    assert data.columns.tolist() == ['Time', 'T', 'T.2', 'T.1', 'T.3']
+
+
+def test_read_columns_mangles_like_pandas(tmp_path):
+    header = ['Time', 'a', 'a', 'a.1', 'a', 'b', 'a.1']
+    path = write_dia(tmp_path / 'a#T1.dia', header, [range(len(header))])
+    assert dia.read_columns(path) == read_csv(path).columns.tolist()
+
+
+def test_read_columns_of_empty_header(tmp_path):
+    path = tmp_path / 'a#T1.dia'
+    path.write_text('SOCRAT results\n\n', encoding='utf-8')
+    with pytest.raises(pd.errors.EmptyDataError):
+        dia.read_columns(path)
+
+
+def test_read_dia_empty_body(tmp_path):
+    path = write_dia(tmp_path / 'a#T1.dia', ['Time', 'T_1'], [])
+    data = dia.read_dia(path)
+    assert data.columns.tolist() == ['Time', 'T_1']
+    assert data.empty and data.dtypes.tolist() == [np.float64, np.float64]
+    assert dia.read_dia(path, usecols=['T_1'], progress=lambda *args: None)['T_1'].dtype == np.float64
+
+
+def test_read_dia_usecols(tmp_path):
+    path = write_dia(tmp_path / 'a#T1.dia', ['Time', 'T_1', 'T_2'], [[0, 1, 2], [1, 3, 4]])
+    data = dia.read_dia(path, usecols=['T_2', 'Time'])
+    assert data.columns.tolist() == ['Time', 'T_2']
+    assert data['T_2'].tolist() == [2, 4]
+
+
+def test_read_dia_parallel_chunks(tmp_path, monkeypatch):
+    rows = [[i * 0.1, i * 2.5, -i] for i in range(5000)]
+    path = write_dia(tmp_path / 'a#T1.dia', ['Time', 'T_1', 'T_2'], rows)
+    monkeypatch.setattr(dia, 'PARALLEL_THRESHOLD', 0)
+    calls = list()
+    data = dia.read_dia(path, workers=2, progress=lambda *args: calls.append(args))
+    pd.testing.assert_frame_equal(data, read_csv(path))
+    assert calls[-1][0] == calls[-1][1]
+    assert calls[-1][2] == len(rows)
+
+
+def test_split_body_ends_chunks_with_lines(tmp_path):
+    path = write_dia(tmp_path / 'a#T1.dia', ['Time', 'T_1'], [[i, i * i] for i in range(1000)])
+    start, stop = dia.body_offset(path), dia.complete_size(path)
+    ranges = dia._split_body(path, start, stop, 7)
+    assert ranges[0][0] == start and ranges[-1][1] == stop
+    content = path.read_bytes()
+    for (_, end), (next_start, _) in zip(ranges, ranges[1:]):
+        assert end == next_start
+        assert content[end - 1:end] == b'\n'
+
+
+def test_last_line_without_line_break_is_read(tmp_path):
+    path = write_dia(tmp_path / 'a#T1.dia', ['Time', 'T_1'], [[0, 1], [1, 2]], end='')
+    pd.testing.assert_frame_equal(dia.read_dia(path), read_csv(path))
+
+
+def test_unfinished_last_line_is_skipped(tmp_path):
+    path = tmp_path / 'a#T1.dia'
+    path.write_text('SOCRAT results\nTime T_1 T_2\n0 1 2\n1 3', encoding='utf-8')
+    assert len(dia.read_dia(path)) == 1
+
+
+def test_read_tail(tmp_path):
+    path = write_dia(tmp_path / 'a#T1.dia', ['Time', 'T_1'], [[0, 1]])
+    offset = dia.complete_size(path)
+    with open(path, 'a') as fh:
+        fh.write('1 2\n2 3\n3')
+    tail, stop = dia.read_tail(path, offset, ['Time', 'T_1'])
+    assert tail['T_1'].tolist() == [2, 3]
+    assert stop == dia.complete_size(path)
+
+
+def test_read_compressed(tmp_path):
+    plain = write_dia(tmp_path / 'a#T1.dia', ['Time', 'T_1'], [[i, i / 3] for i in range(100)])
+    compressed = tmp_path / 'a#T1.dia.gz'
+    with gzip.open(compressed, 'wb') as fh:
+        fh.write(plain.read_bytes())
+    pd.testing.assert_frame_equal(dia.read_dia(compressed), dia.read_dia(plain))
+
+
+def test_index_rows(tmp_path):
+    path = write_dia(tmp_path / 'a#T1.dia', ['Time', 'T_1'], [[i * 0.5, i] for i in range(100)])
+    offsets, times = dia.index_rows(path, dia.body_offset(path), dia.complete_size(path), step=10)
+    assert np.array_equal(times, np.arange(0, 100, 10) * 0.5)
+    with open(path, 'rb') as fh:
+        for offset, time in zip(offsets, times):
+            fh.seek(offset)
+            assert float(fh.readline().split()[0]) == time
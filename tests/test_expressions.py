@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from graph_viewer.expressions import Expression, moving_average, derivative, integral
+
+
+def test_arithmetic_of_columns():
+    expression = Expression('(T_out - T_in) * 1.8 + 32')
+    assert expression.columns == ['T_out', 'T_in']
+    result = expression.evaluate({'T_out': np.array([10.0, 20.0]), 'T_in': np.array([0.0, 5.0])})
+    assert np.allclose(result, [50.0, 59.0])
+
+
+def test_column_which_is_not_identifier():
+    expression = Expression("col('T_1.1') / 2 + T")
+    assert expression.columns == ['T_1.1', 'T']
+    assert np.allclose(expression.evaluate({'T_1.1': np.array([4.0]), 'T': np.array([1.0])}), [3.0])
+
+
+def test_functions_with_time():
+    time = np.array([0.0, 1.0, 2.0, 3.0])
+    values = np.array([0.0, 2.0, 4.0, 6.0])
+    expression = Expression('deriv(P) + integral(P)')
+    assert expression.columns == ['P', 'Time']
+    assert np.allclose(expression.evaluate({'P': values, 'Time': time}), derivative(values, time) + integral(values, time))
+    assert np.allclose(integral(values, time), [0.0, 1.0, 4.0, 9.0])
+    assert np.allclose(derivative(values, time), 2.0)
+
+
+def test_moving_average():
+    assert np.allclose(moving_average([1.0, 2.0, 3.0, 4.0], 2), [1.0, 1.5, 2.5, 3.5])
+    assert np.allclose(Expression('mean(T, 3)').evaluate({'T': np.array([3.0, 3.0, 6.0])}), [3.0, 3.0, 4.0])
+    with pytest.raises(ValueError):
+        moving_average([1.0], 0)
+
+
+def test_constant_expression_has_rows_of_columns():
+    result = Expression('T * 0 + 1').evaluate({'T': np.zeros(3)})
+    assert result.dtype == np.float64 and np.array_equal(result, np.ones(3))
+
+
+@pytest.mark.parametrize('text', ['', '2 + 3', '__import__("os")', 'T.real', 'T[0]', 'foo(T)', 'mean(T, W)',
+                                  'sqrt(T, 2)', "'a' + T", 'T if T else 0', 'lambda: T', 'True + T'])
+def test_invalid_expressions(text):
+    with pytest.raises(ValueError):
+        Expression(text)
@@ -0,0 +1,51 @@
+from graph_viewer.index import ChannelSearch, TaskIndex, split_name
+
+
+def make_search():
+    records = [
+        {'path': 'taskA#T1.dia', 'task': 'taskA', 'transducer': 'T1', 'columns': ['Time', 'T_12', 'P_3']},
+        {'path': 'taskB#T1.dia', 'task': 'taskB', 'transducer': 'T1', 'columns': ['Time', 'PT_12', 't_1']},
+        {'path': 'taskC#T2.dia', 'task': 'taskC', 'transducer': 'T2', 'columns': None},
+    ]
+    return ChannelSearch(records)
+
+
+def test_prefix_matches_go_first():
+    hits = make_search().search('t_1')
+    assert [hit['column'] for hit in hits] == ['t_1', 'T_12', 'PT_12']
+    assert hits[2] == {'column': 'PT_12', 'task': 'taskB', 'transducer': 'T1', 'path': 'taskB#T1.dia'}
+
+
+def test_search_is_case_insensitive_and_skips_unknown_columns():
+    search = make_search()
+    assert len(search) == 6
+    assert [hit['task'] for hit in search.search('  TIME ')] == ['taskA', 'taskB']
+    assert search.search('') == []
+    assert search.search('missing') == []
+
+
+def test_limit():
+    search = make_search()
+    assert len(search.search('t', limit=2)) == 2
+    assert len(search.search('_', limit=10)) == 4
+
+
+def test_split_name():
+    assert split_name('taskA#T1.dia', 'results') == ('taskA', 'T1')
+    assert split_name('run2/sub/T5.dia.gz', 'results') == ('run2/sub', 'T5')
+    assert split_name('T5.dia', 'results') == ('results', 'T5')
+    assert split_name('run2/taskA#T1#x.dia', 'results') == ('run2/taskA', 'T1#x')
+
+
+def test_scan_takes_unchanged_directories_from_index(tmp_path):
+    (tmp_path / 'run').mkdir()
+    (tmp_path / 'taskA#T1.dia').write_text('title\nTime T_1\n0 1\n', encoding='utf-8')
+    (tmp_path / 'run' / 'T5.dia').write_text('title\nTime P\n0 1\n', encoding='utf-8')
+    (tmp_path / 'notes.txt').write_text('', encoding='utf-8')
+    index = TaskIndex(tmp_path / 'index.sqlite', workers=2)
+    progress = list()
+    records = index.scan(tmp_path / 'run' / '..', progress=lambda *args: progress.append(args))
+    assert [(record['task'], record['transducer'], record['columns']) for record in records] == [
+        ('run', 'T5', ['Time', 'P']), ('taskA', 'T1', ['Time', 'T_1'])]
+    assert progress[-1] == (2, 2, 2)
+    assert index.scan(tmp_path) == records
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+from graph_viewer.cache import ColumnCache
+from graph_viewer.memory import MemoryAccountant, compact, frame_bytes
+from graph_viewer.models import GraphData
+
+
+def test_compact_keeps_time_and_precise_values():
+    data = pd.DataFrame({'Time': [0.1, 0.2], 'T_1': [300.5, 301.25], 'P': [1.0 / 3.0, 0.1]})
+    compacted = compact(data, tolerance=1e-6)
+    assert compacted.dtypes.tolist() == [np.float64, np.float32, np.float32]
+    assert compact(data, tolerance=1e-12)['P'].dtype == np.float64
+
+
+def test_shared_columns_are_counted_once():
+    values = np.zeros(1000)
+    assert frame_bytes([{'a': values}, pd.DataFrame({'b': values}, copy=False)]) == values.nbytes
+
+
+def test_budget_counts_columns_of_the_cache(tmp_path):
+    directory = tmp_path / 'results'
+    directory.mkdir()
+    rows = '\n'.join(f'{i} {i * 2}' for i in range(10000))
+    for name in ('a#T1.dia', 'b#T1.dia'):
+        (directory / name).write_text(f'title\nTime T_1\n{rows}\n', encoding='utf-8')
+    cache = ColumnCache(tmp_path / 'cache')
+    for name in ('a#T1.dia', 'b#T1.dia'):
+        GraphData(directory, cache=cache).get_graph_data(name)
+    accountant = MemoryAccountant(budget=10000 * 8 * 2)
+    graph_data = GraphData(directory, cache=cache, accountant=accountant)
+    accountant.track(graph_data, 'files')
+    graph_data.get_graph_data('a#T1.dia')
+    assert graph_data.memory_usage() == {'a#T1.dia': 10000 * 8 * 2}
+    graph_data.get_graph_data('b#T1.dia')
+    assert list(graph_data.memory_usage()) == ['b#T1.dia']
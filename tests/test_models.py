@@ -0,0 +1,155 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from graph_viewer import dia
+from graph_viewer.cache import ColumnCache
+from graph_viewer.models import GraphData
+
+HEADER = ['Time', 'T_1', 'T_2', 'T_3']
+
+
+@pytest.fixture
+def directory(tmp_path):
+    results = tmp_path / 'results'
+    results.mkdir()
+    rows = '\n'.join(f'{i * 0.1:.1f} {i} {i * i} {-i}' for i in range(2000))
+    (results / 'taskA#T1.dia').write_text(f'title\n{" ".join(HEADER)}\n{rows}\n', encoding='utf-8')
+    return results
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ColumnCache(tmp_path / 'cache')
+
+
+def append(directory, text):
+    with open(directory / 'taskA#T1.dia', 'a', encoding='utf-8') as fh:
+        fh.write(text)
+
+
+def assert_parsed(data, directory):
+    expected = pd.read_csv(directory / 'taskA#T1.dia', sep=r'\s+', skiprows=1)
+    assert np.array_equal(data.to_numpy(), expected[data.columns].to_numpy())
+
+
+def test_loaded_columns_are_cached(directory, cache, monkeypatch):
+    GraphData(directory, cache=cache).get_columns('taskA#T1.dia', ['Time', 'T_2'])
+    assert cache.read_meta(directory / 'taskA#T1.dia')['columns'] == ['Time', 'T_2']
+    graph_data = GraphData(directory, cache=cache)
+    parsed = list()
+    read_dia = dia.read_dia
+    monkeypatch.setattr(dia, 'read_dia', lambda *args, **kwargs: parsed.append(kwargs['usecols']) or
+                        read_dia(*args, **kwargs))
+    data = graph_data.get_columns('taskA#T1.dia', ['T_2', 'T_3', 'Time'])
+    assert parsed == [['T_3']]
+    assert data.columns.tolist() == ['T_2', 'T_3', 'Time']
+    assert_parsed(data, directory)
+    assert graph_data.peek_columns('taskA#T1.dia', ['T_3']) is not None
+    assert graph_data.peek_columns('taskA#T1.dia', ['T_1']) is None
+
+
+def test_appended_rows_extend_loaded_columns(directory, cache):
+    graph_data = GraphData(directory, cache=cache)
+    graph_data.get_columns('taskA#T1.dia', ['Time', 'T_1'])
+    append(directory, '200.0 5000 1 -1\n')
+    data = graph_data.get_columns('taskA#T1.dia', ['Time', 'T_1'])
+    assert len(data) == 2001 and data['T_1'].iat[-1] == 5000
+    assert graph_data.get_summary('taskA#T1.dia')['T_1']['max'] == 5000
+    assert cache.read_meta(directory / 'taskA#T1.dia')['rows'] == 2001
+    restored = GraphData(directory, cache=cache)
+    data = restored.get_graph_data('taskA#T1.dia')
+    assert data.columns.tolist() == HEADER
+    assert_parsed(data, directory)
+    assert restored.get_summary('taskA#T1.dia')['T_1']['max'] == 5000
+    assert restored.get_pyramid('taskA#T1.dia') is not None
+
+
+def test_rewritten_file_is_parsed_again(directory, cache):
+    graph_data = GraphData(directory, cache=cache)
+    graph_data.get_columns('taskA#T1.dia', ['T_1'])
+    (directory / 'taskA#T1.dia').write_text('title\nTime T_1\n0 7\n', encoding='utf-8')
+    assert graph_data.refresh('taskA#T1.dia')['T_1'].tolist() == [7]
+
+
+def test_pending_last_line_is_replaced(directory, cache):
+    append(directory, '300.0 1 2 3')
+    graph_data = GraphData(directory, cache=cache)
+    assert graph_data.get_columns('taskA#T1.dia', ['T_3'])['T_3'].iat[-1] == 3
+    assert graph_data.get_summary('taskA#T1.dia')['T_3']['last'] == 3
+    append(directory, '4\n')
+    data = graph_data.get_columns('taskA#T1.dia', ['T_3'])
+    assert len(data) == 2001 and data['T_3'].iat[-1] == 34
+    assert GraphData(directory, cache=cache).get_columns('taskA#T1.dia', ['T_3'])['T_3'].iat[-1] == 34
+
+
+def test_touched_file_keeps_last_line(directory, cache):
+    append(directory, '300.0 1 2 3')
+    graph_data = GraphData(directory, cache=cache)
+    assert len(graph_data.get_columns('taskA#T1.dia', ['T_3'])) == 2001
+    path = directory / 'taskA#T1.dia'
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10 ** 9))
+    assert len(graph_data.get_columns('taskA#T1.dia', ['T_3'])) == 2001
+    assert len(GraphData(directory, cache=cache).get_columns('taskA#T1.dia', ['T_3'])) == 2001
+
+
+@pytest.mark.parametrize('cached', [True, False])
+def test_growing_last_line_is_replaced(directory, tmp_path, cached):
+    cache = ColumnCache(tmp_path / 'cache') if cached else None
+    append(directory, '300.0 1 2 3')
+    graph_data = GraphData(directory, cache=cache)
+    graph_data.get_columns('taskA#T1.dia', ['Time', 'T_3'])
+    for text, last in (('4', 34), ('5', 345)):
+        append(directory, text)
+        data = graph_data.get_columns('taskA#T1.dia', ['Time', 'T_3'])
+        assert len(data) == 2001 and data['T_3'].iat[-1] == last
+    append(directory, '\n301.0 1 2 3\n')
+    data = graph_data.get_columns('taskA#T1.dia', ['Time', 'T_3'])
+    assert len(data) == 2002 and data['T_3'].tolist()[-2:] == [345, 3]
+    assert graph_data.get_summary('taskA#T1.dia')['T_3']['count'] == 2002
+    if cached:
+        assert cache.read_meta(directory / 'taskA#T1.dia')['rows'] == 2002
+        assert_parsed(GraphData(directory, cache=cache).get_columns('taskA#T1.dia', ['Time', 'T_3']), directory)
+
+
+@pytest.mark.parametrize('cached', [True, False])
+def test_rows_appended_to_header_only_file(directory, tmp_path, cached):
+    cache = ColumnCache(tmp_path / 'cache') if cached else None
+    (directory / 'taskA#T1.dia').write_text(f'title\n{" ".join(HEADER)}\n', encoding='utf-8')
+    graph_data = GraphData(directory, cache=cache)
+    assert graph_data.get_columns('taskA#T1.dia', ['Time', 'T_1']).dtypes.tolist() == [np.float64, np.float64]
+    append(directory, '0.0 1 2 3\n0.1 4 5 6\n')
+    data = graph_data.get_columns('taskA#T1.dia', ['Time', 'T_1'])
+    assert data.dtypes.tolist() == [np.float64, np.float64] and data['T_1'].tolist() == [1, 4]
+    assert graph_data.get_summary('taskA#T1.dia')['T_1']['max'] == 4
+    restored = GraphData(directory, cache=cache)
+    assert restored.get_columns('taskA#T1.dia', ['T_1'])['T_1'].tolist() == [1, 4]
+    assert restored.get_summary('taskA#T1.dia')['T_1']['count'] == 2
+
+
+
+def test_derived_channel(directory):
+    graph_data = GraphData(directory, channels={'dT': 'T_2 - T_1'})
+    assert 'dT' in graph_data.get_header('taskA#T1.dia')
+    data = graph_data.get_columns('taskA#T1.dia', ['Time', 'dT'])
+    assert np.array_equal(data['dT'], np.arange(2000) ** 2 - np.arange(2000))
+    with pytest.raises(ValueError):
+        graph_data.define_channel('x', 'x + 1')
+
+
+def test_range(directory, cache):
+    data = GraphData(directory, cache=cache).get_range('taskA#T1.dia', ['T_1'], 10.0, 20.0)
+    assert data['Time'].iat[0] == pytest.approx(9.9) and data['Time'].iat[-1] == pytest.approx(20.1)
+    assert data.columns.tolist() == ['Time', 'T_1']
+
+
+def test_preloaded_columns_are_not_parsed_again(directory, cache, monkeypatch):
+    graph_data = GraphData(directory, cache=cache)
+    graph_data.get_columns('taskA#T1.dia', ['Time', 'T_1'])
+    assert not graph_data._is_cached(str(directory / 'taskA#T1.dia'))
+    assert graph_data.preload(['taskA#T1.dia'], workers=1) == dict()
+    assert graph_data._is_cached(str(directory / 'taskA#T1.dia'))
+    monkeypatch.setattr(dia, 'read_dia', None)
+    data = graph_data.get_columns('taskA#T1.dia', ['T_2', 'T_3'])
+    assert_parsed(data, directory)
+    assert graph_data.get_summary('taskA#T1.dia')['T_3']['min'] == -1999
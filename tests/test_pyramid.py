@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from graph_viewer.pyramid import Pyramid, FIELDS
+
+
+def make_data(rows, seed=0):
+    generator = np.random.default_rng(seed)
+    return pd.DataFrame({'Time': np.arange(rows) * 0.1, 'T_1': generator.normal(size=rows),
+                         'T_2': np.sin(np.arange(rows) / 50.0)})
+
+
+def test_summary_matches_numpy():
+    data = make_data(20000)
+    pyramid = Pyramid.build(data, base=16, factor=4)
+    values = data['T_1'].to_numpy()
+    for start, stop in ((0, 20000), (5, 19999), (1000, 1017), (3, 4), (16, 64)):
+        summary = pyramid.summary('T_1', values, start, stop)
+        part = values[start:stop]
+        assert summary['min'] == part.min()
+        assert summary['max'] == part.max()
+        assert np.isclose(summary['mean'], part.mean())
+        assert summary['argmin'] == start + int(np.argmin(part))
+        assert summary['argmax'] == start + int(np.argmax(part))
+
+
+def test_minmax_indices_keep_extremes():
+    data = make_data(100000)
+    pyramid = Pyramid.build(data, base=16, factor=4)
+    values = data['T_1'].to_numpy()
+    start, stop = 123, 99000
+    index = pyramid.minmax_indices('T_1', values, start, stop, buckets=100)
+    assert index is not None
+    assert index[0] == start and index[-1] == stop - 1
+    assert np.all(np.diff(index) >= 0)
+    assert len(index) < 2 * 4 * 100 + 10
+    assert values[index].min() == values[start:stop].min()
+    assert values[index].max() == values[start:stop].max()
+
+
+def test_minmax_indices_of_short_range():
+    data = make_data(1000)
+    pyramid = Pyramid.build(data, base=16, factor=4)
+    assert pyramid.minmax_indices('T_1', data['T_1'].to_numpy(), 0, 100, buckets=1000) is None
+
+
+def test_extend_equals_build():
+    data = make_data(10000)
+    pyramid = Pyramid.build(data.iloc[:3000], base=16, factor=4)
+    new = pyramid.extend(data)
+    assert new
+    built = Pyramid.build(data, base=16, factor=4)
+    assert pyramid.rows == built.rows == 10000 // 16 * 16
+    for level, expected in zip(pyramid.levels, built.levels):
+        for field in FIELDS:
+            assert np.array_equal(level[field], expected[field])
+
+
+def test_merge_and_arrays():
+    data = make_data(5000)
+    pyramid = Pyramid.build(data[['Time', 'T_1']], base=16, factor=4)
+    merged = pyramid.merge(Pyramid.build(data[['T_2']], base=16, factor=4))
+    built = Pyramid.build(data, base=16, factor=4)
+    restored = Pyramid.from_arrays(merged.columns, merged.to_arrays(), merged.base, merged.factor)
+    assert restored.columns == ['Time', 'T_1', 'T_2']
+    for level, expected in zip(restored.levels, built.levels):
+        for field in FIELDS:
+            assert np.array_equal(level[field], expected[field])
+
+
+def test_build_skips_columns_which_are_not_numeric():
+    data = make_data(100)
+    data['name'] = 'x'
+    pyramid = Pyramid.build(data, base=16)
+    assert 'name' not in pyramid and 'T_1' in pyramid
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from graph_viewer.stats import ColumnStats
+
+
+def make_data(rows):
+    values = np.cos(np.arange(rows) / 7.0) * np.arange(rows)
+    values[::13] = np.nan
+    return pd.DataFrame({'Time': np.arange(rows) * 0.5, 'T_1': values, 'N': np.arange(rows, dtype=np.int64)})
+
+
+def assert_summary(stats, data):
+    summary = stats.summary()
+    time = data['Time'].to_numpy()
+    for name in ('T_1', 'N'):
+        values = data[name]
+        assert summary[name]['count'] == values.count()
+        assert summary[name]['min'] == values.min()
+        assert summary[name]['max'] == values.max()
+        assert np.isclose(summary[name]['mean'], values.mean())
+        assert summary[name]['time_min'] == time[values.idxmin()]
+        assert summary[name]['time_max'] == time[values.idxmax()]
+        assert np.array_equal(summary[name]['last'], float(values.iloc[-1]), equal_nan=True)
+
+
+def test_build_matches_pandas():
+    data = make_data(1000)
+    assert_summary(ColumnStats.build(data, data['Time'].to_numpy()), data)
+
+
+def test_extend_by_appended_rows():
+    data = make_data(1000)
+    stats = ColumnStats.build(data.iloc[:10], data['Time'].to_numpy()[:10])
+    assert not stats.extend(data.iloc[:10], data['Time'].to_numpy()[:10])
+    for stop in (11, 500, 1000):
+        part = data.iloc[:stop]
+        assert stats.extend(part, part['Time'].to_numpy())
+        assert stats.rows == stop
+        assert_summary(stats, part)
+    assert not stats.extend(data, data['Time'].to_numpy())
+
+
+def test_extend_keeps_fields_of_copy():
+    data = make_data(100)
+    stats = ColumnStats.build(data.iloc[:50], data['Time'].to_numpy()[:50])
+    copy = ColumnStats(stats.columns, rows=stats.rows, fields=stats.fields)
+    copy.extend(data, data['Time'].to_numpy())
+    assert stats.rows == 50
+    assert_summary(stats, data.iloc[:50])
+    assert_summary(copy, data)
+
+
+def test_column_of_nan_only():
+    data = pd.DataFrame({'Time': [0.0, 1.0], 'T_1': [np.nan, np.nan]})
+    summary = ColumnStats.build(data, data['Time'].to_numpy()).summary()['T_1']
+    assert summary['count'] == 0
+    assert np.isnan(summary['min']) and np.isnan(summary['mean'])
+
+
+def test_merge_and_arrays():
+    data = make_data(300)
+    time = data['Time'].to_numpy()
+    stats = ColumnStats.build(data[['Time', 'T_1']], time).merge(ColumnStats.build(data[['N', 'T_1']], time))
+    assert sorted(stats.columns) == ['N', 'T_1', 'Time']
+    restored = ColumnStats.from_arrays(stats.columns, stats.to_arrays(), stats.rows)
+    assert_summary(restored, data)